@@ -1,26 +1,50 @@
+import os
+from typing import Dict, Optional
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
 from .models import db
 from .routes import api_bp
 from .auth import auth_bp
+from .jobs import job_queue
+from .history import history_writer
+from .related import related_graph
+from . import instrumentation
+from .schema import backfill_typed_fields_command
 
-def create_app():
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+migrate = Migrate(directory=MIGRATIONS_DIR)
+
+# `config` overrides the defaults, e.g. {'SQLALCHEMY_DATABASE_URI': 'sqlite:///bench.db'}
+def create_app(config: Optional[Dict] = None):
     app = Flask(__name__)
-    app.config['SECRET_KEY'] = 'your-secret-key-change-in-prod'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://postgres:123456@db:5432/hf_papers_2025'
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-prod')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'postgresql://postgres:123456@db:5432/hf_papers_2025')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['JWT_SECRET_KEY'] = 'jwt-secret-key-change-in-prod'
+    app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-prod')
+    if config:
+        app.config.update(config)
 
     db.init_app(app)
+    migrate.init_app(app, db)
     CORS(app)
     jwt = JWTManager(app)
+    job_queue.init_app(app)
+    history_writer.init_app(app)
+    instrumentation.init_app(app)
 
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(auth_bp, url_prefix='/auth')
 
+    app.cli.add_command(backfill_typed_fields_command)
+
+    # Only creates missing tables; columns and indexes added to existing ones
+    # come from `flask db upgrade`, run once per deploy rather than per worker
     with app.app_context():
         db.create_all()
+    # Built offline by build_related.py; absent until the first build
+    related_graph.ensure_loaded()
 
     return app
\ No newline at end of file
@@ -1,28 +1,46 @@
-from zhipuai import ZhipuAI
 from datetime import datetime
-import json
+from typing import Dict, Iterator, List, Optional
 from .models import db, Paper
+from .search import search_papers
+from .llm import gateway, LLMError
+from .structured import Field, Schema, StructuredOutputError, parse_stats, parse_structured
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
-client = ZhipuAI(api_key="39f1dbb6c1f94c698b072bc6a60067df.zTt4wg3FEWGgdiZk")
+KEYWORD_SHORTLIST_SIZE = 50
+# Bump whenever the content_analysis prompt changes so cached analyses are not reused
+CONTENT_PROMPT_VERSION = "v2"
+# Transport failures are retried inside the gateway and malformed replies are
+# repaired locally; a second completion is only requested on a schema failure
+PARSE_ATTEMPTS = 2
+
+SUGGESTION_SCHEMA = Schema("keyword_suggest", {
+    "arxiv_id": Field(str, required=True),
+    "title": Field(str),
+    "suggest_score": Field(float, default=0.0, minimum=0, maximum=10),
+}, many=True, min_items=1)
+CONTENT_FIELDS = [
+    "abstract_summary", "research_problem", "core_contribution", "method_name", "method_innovation",
+    "datasets", "experimental_results", "ablation_study", "limitations", "conclusion_and_future_work",
+]
+CONTENT_SCHEMA = Schema("content_analysis", {name: Field(str) for name in CONTENT_FIELDS})
+
+def clean_glm_output(content: str) -> str:
+    return content.replace("```python", "").replace("```json", "").replace("```", "").strip()
 
 def glm_analysis(content: str, system_prompt: str) -> dict:
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": content},
-    ]
     try:
-        response = client.chat.completions.create(
-            model="glm-4-flash",
-            messages=messages
-        )
-        markdown_content = response.choices[0].message.content.replace("```python", "").replace("```", "").strip()
+        markdown_content = clean_glm_output(gateway.complete(system_prompt, content))
         return {"glm_result": markdown_content}
-    except:
+    except LLMError as e:
+        print(f"[DEBUG] GLM call failed: {e}")
         return {}
 
-def keyword_suggest(content: str) -> dict:
+# Yields the completion text as the model produces it
+def glm_analysis_stream(content: str, system_prompt: str) -> Iterator[str]:
+    return gateway.stream(system_prompt, content)
+
+def keyword_suggest(content: str, candidates: Optional[List[Dict]] = None) -> dict:
     current_year = datetime.now().year  # Keep as is, but not used for filtering during testing
     prompt = '''Roleplay: You are now a professional paper recommendation expert. You can quickly provide users with suitable papers based on the keywords provided by the user.
         Task: Analyze and parse based on the keywords provided by the user, conduct a comprehensive analysis of the paper titles, and provide appropriate suggestions:
@@ -32,20 +50,26 @@ def keyword_suggest(content: str) -> dict:
         4. If the fragment information is insufficient to fill any fields or cannot be determined, output an empty dictionary {}.
         5. Must output a valid, directly parsable Python dictionary string.
     '''
-    sql = """
-        SELECT title, id, img_link, like_num, github_num, publish_time
-        FROM papers 
-        WHERE title IS NOT NULL AND title != '' 
-        ORDER BY month DESC, title ASC
-    """
     try:
-        result = db.session.execute(text(sql)).fetchall()
+        if candidates is None:
+            candidates = search_papers(content, limit=KEYWORD_SHORTLIST_SIZE)
+        if not candidates:
+            # Nothing matched lexically: let the model pick from the most recent papers instead
+            sql = text("""
+                SELECT title, id, img_link, like_num, github_num, publish_time
+                FROM papers
+                WHERE title IS NOT NULL AND title != ''
+                ORDER BY year DESC, month DESC, title ASC
+                LIMIT :limit
+            """)
+            candidates = [row._asdict() for row in db.session.execute(sql, {"limit": KEYWORD_SHORTLIST_SIZE}).fetchall()]
         titles = []
         index_dict = {}
-        for row in result:
-            if row[0]:
-                titles.append(f"arxiv: {row[1]}, title: {row[0]}")
-                index_dict.update({row[1]: {"title": row[0], "img_link": row[2], "like_num": row[3], "github_num": row[4], "publish_time": row[5]}})
+        for row in candidates:
+            if row["title"]:
+                paper_id = row.get("arxiv_id", row.get("id"))
+                titles.append(f"arxiv: {paper_id}, title: {row['title']}")
+                index_dict.update({paper_id: {"title": row["title"], "img_link": row["img_link"], "like_num": row["like_num"], "github_num": row["github_num"], "publish_time": row["publish_time"]}})
     except SQLAlchemyError as e:
         print(f"[DEBUG] SQL query failed: {e}")
         titles = []
@@ -53,24 +77,31 @@ def keyword_suggest(content: str) -> dict:
         print(f"[DEBUG] Other error: {e}")
         titles = []
     
+    if not titles:
+        return {}
     title_content = "\n".join(titles)
     
     full_content = f"Keywords: {content}\nPaper title list:\n{title_content}"
-    for _ in range(5):
+    for attempt in range(PARSE_ATTEMPTS):
+        if attempt:
+            parse_stats.count("reprompts")
+        response = glm_analysis(full_content, prompt)
+        if not response:
+            break
         try:
-            info = glm_analysis(full_content, prompt)['glm_result'].strip()
-            glm_result = json.loads(info)
-            for data in glm_result:
-                info = index_dict[data['arxiv_id']]
-                data.update(info)
-            return glm_result
-        except Exception:
-            print("Failed, retrying...")
+            suggestions = parse_structured(response['glm_result'], SUGGESTION_SCHEMA)
+        except StructuredOutputError as e:
+            print(f"[DEBUG] Unusable suggestions, retrying: {e}")
             continue
+        # Ids the model made up are dropped rather than failing the whole answer
+        glm_result = [data for data in suggestions if data['arxiv_id'] in index_dict]
+        for data in glm_result:
+            data.update(index_dict[data['arxiv_id']])
+        if glm_result:
+            return glm_result
     return {}
 
-def content_analysis(content: str) -> dict:
-    prompt = '''Roleplay: You are now a professional paper analysis expert. You can quickly analyze based on the truncated paper information provided by the user.
+CONTENT_ANALYSIS_PROMPT = '''Roleplay: You are now a professional paper analysis expert. You can quickly analyze based on the truncated paper information provided by the user.
         Task: Analyze and parse the paper fragment provided by the user, and provide a comprehensive structured summary of the paper:
         1. Extract the following key fields (if there is no relevant information in the fragment, leave the field as empty string ""):
         - Abstract core one-sentence summary (abstract_summary)
@@ -89,10 +120,23 @@ def content_analysis(content: str) -> dict:
         4. If the fragment information is insufficient to fill any fields or cannot be determined, output an empty dictionary {}.
         5. Must output a valid, directly parsable Python dictionary string (keys and values use double quotes, list fields represented as strings like "item1; item2").
     '''
-    for _ in range(5):
+
+def parse_content_analysis(reply: str) -> dict:
+    return parse_structured(reply, CONTENT_SCHEMA)
+
+def content_analysis(content: str) -> dict:
+    for attempt in range(PARSE_ATTEMPTS):
+        if attempt:
+            parse_stats.count("reprompts")
+        response = glm_analysis(content, CONTENT_ANALYSIS_PROMPT)
+        if not response:
+            break
         try:
-            glm_result = json.loads(glm_analysis(content, prompt)['glm_result'].strip())
-            return glm_result
-        except Exception:
+            return parse_content_analysis(response['glm_result'])
+        except StructuredOutputError as e:
+            print(f"[DEBUG] Unusable analysis, retrying: {e}")
             continue
-    return {}
\ No newline at end of file
+    return {}
+
+def content_analysis_stream(content: str) -> Iterator[str]:
+    return glm_analysis_stream(content, CONTENT_ANALYSIS_PROMPT)
@@ -0,0 +1,191 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy.exc import SQLAlchemyError
+from .models import db, AnalysisCache
+
+ANALYSIS_CACHE_TTL_DAYS = int(os.environ.get("ANALYSIS_CACHE_TTL_DAYS", "30"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", "20000"))
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Lets one caller per key do the work while concurrent callers for the same key
+# wait for its result instead of repeating it
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    # Registers a caller for `key`: (call, True) for the one that must do the work
+    # and finish() it, (call, False) for the ones that should wait() for it
+    def join(self, key) -> Tuple[Dict, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = {"event": threading.Event(), "result": None, "error": None}
+            return call, True
+
+    def wait(self, call: Dict):
+        call["event"].wait()
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+    def finish(self, key, call: Dict, result=None, error: Optional[Exception] = None):
+        call["result"], call["error"] = result, error
+        with self._lock:
+            del self._calls[key]
+        call["event"].set()
+
+    def do(self, key, fn: Callable):
+        call, leader = self.join(key)
+        if not leader:
+            return self.wait(call), False
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result, True
+
+class AnalysisResultCache:
+    def __init__(self, ttl_days: int = ANALYSIS_CACHE_TTL_DAYS, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.ttl = timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        self.flight = SingleFlight()
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "evictions": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def get(self, arxiv_id: str, pdf_hash: str, prompt_version: str) -> Optional[Dict]:
+        try:
+            entry = db.session.get(AnalysisCache, (arxiv_id, pdf_hash, prompt_version))
+            if entry is None:
+                return None
+            now = datetime.utcnow()
+            if entry.created_at < now - self.ttl:
+                db.session.delete(entry)
+                db.session.commit()
+                return None
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_hit_at = now
+            db.session.commit()
+            return json.loads(entry.result)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            self._count("errors")
+            print(f"[DEBUG] Analysis cache read failed: {e}")
+            return None
+
+    def put(self, arxiv_id: str, pdf_hash: str, prompt_version: str, result: Dict):
+        try:
+            now = datetime.utcnow()
+            db.session.merge(AnalysisCache(
+                arxiv_id=arxiv_id,
+                pdf_hash=pdf_hash,
+                prompt_version=prompt_version,
+                result=json.dumps(result, ensure_ascii=False),
+                created_at=now,
+                last_hit_at=now,
+                hits=0
+            ))
+            db.session.commit()
+            self._count("stores")
+            self._evict()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            self._count("errors")
+            print(f"[DEBUG] Analysis cache write failed: {e}")
+
+    def _evict(self):
+        expired = AnalysisCache.query.filter(AnalysisCache.created_at < datetime.utcnow() - self.ttl)\
+            .delete(synchronize_session=False)
+        overflow = AnalysisCache.query.count() - self.max_entries
+        if overflow > 0:
+            # Least recently used entries go first
+            stale = db.session.query(AnalysisCache.arxiv_id, AnalysisCache.pdf_hash, AnalysisCache.prompt_version)\
+                .order_by(AnalysisCache.last_hit_at.asc()).limit(overflow).all()
+            for key in stale:
+                AnalysisCache.query.filter_by(arxiv_id=key[0], pdf_hash=key[1], prompt_version=key[2])\
+                    .delete(synchronize_session=False)
+            expired += len(stale)
+        if expired:
+            db.session.commit()
+            self._count("evictions", expired)
+
+    def lookup(self, arxiv_id: str, pdf_hash: str, prompt_version: str) -> Optional[Dict]:
+        cached = self.get(arxiv_id, pdf_hash, prompt_version)
+        self._count("hits" if cached is not None else "misses")
+        return cached
+
+    # Returns the cached analysis for this exact PDF and prompt, or runs `compute`
+    # once for all concurrent callers. Empty or None results are not stored.
+    def get_or_compute(self, arxiv_id: str, pdf_path: str, prompt_version: str, compute: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        pdf_hash = file_sha256(pdf_path)
+        cached = self.lookup(arxiv_id, pdf_hash, prompt_version)
+        if cached is not None:
+            return cached
+
+        def fill():
+            # A caller that finished just before this flight started may have stored it already
+            cached = self.get(arxiv_id, pdf_hash, prompt_version)
+            if cached is not None:
+                return cached
+            result = compute()
+            if result:
+                self.put(arxiv_id, pdf_hash, prompt_version, result)
+            return result
+
+        result, leader = self.flight.do((arxiv_id, pdf_hash, prompt_version), fill)
+        if not leader:
+            self._count("coalesced")
+        return result
+
+    # For a caller that produces the analysis itself, token by token. Returns
+    # (analysis, None) when it is cached or was just computed by a concurrent
+    # caller (None if that caller failed). Otherwise returns (None, done): this
+    # caller must compute it and call done(result) exactly once, which stores a
+    # non-empty result and hands it to everyone who waited, blocking or streaming.
+    def claim(self, arxiv_id: str, pdf_hash: str, prompt_version: str) -> Tuple[Optional[Dict], Optional[Callable]]:
+        key = (arxiv_id, pdf_hash, prompt_version)
+        cached = self.lookup(*key)
+        if cached is not None:
+            return cached, None
+        call, leader = self.flight.join(key)
+        if not leader:
+            self._count("coalesced")
+            return self.flight.wait(call), None
+        cached = self.get(*key)
+        if cached is not None:
+            self.flight.finish(key, call, cached)
+            return cached, None
+
+        def done(result: Optional[Dict]):
+            try:
+                if result:
+                    self.put(*key, result)
+            finally:
+                self.flight.finish(key, call, result)
+        return None, done
+
+analysis_cache = AnalysisResultCache()
@@ -1,9 +1,19 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from typing import Optional
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt, get_jwt_identity
 from .models import db, User
 
 auth_bp = Blueprint('auth', __name__)
 
+# The user id travels in the token's "uid" claim; tokens issued before it was
+# added fall back to a lookup by username
+def current_user_id() -> Optional[int]:
+    uid = get_jwt().get('uid')
+    if uid is not None:
+        return uid
+    user = User.query.filter_by(username=get_jwt_identity()).first()
+    return user.id if user else None
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.json
@@ -20,7 +30,7 @@ def login():
     data = request.json
     user = User.query.filter_by(username=data['username']).first()
     if user and user.check_password(data['password']):
-        access_token = create_access_token(identity=user.username)
+        access_token = create_access_token(identity=user.username, additional_claims={'uid': user.id})
         return jsonify({'access_token': access_token}), 200
     return jsonify({'error': 'Login failed'}), 401
 
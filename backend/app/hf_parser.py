@@ -0,0 +1,163 @@
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import lxml.html
+from lxml import etree
+
+# Hugging Face renders its Svelte components with their props inlined as JSON;
+# when present they carry every field we scrape, including authors and abstract
+PROPS_XPATH = etree.XPath('//*[@data-props]/@data-props')
+ARTICLE_XPATH = etree.XPath('//article[@class="relative flex flex-col overflow-hidden rounded-xl border"]')
+DETAIL_AUTHORS_XPATH = etree.XPath('//div[@class="relative flex flex-wrap items-center gap-2 text-base leading-tight"]//button/text()')
+DETAIL_ABSTRACT_XPATH = etree.XPath('//p[@class="text-gray-600"]//text()')
+DETAIL_PUBLISHED_XPATH = etree.XPath('//div[contains(text(), "Published")]//text()')
+
+def _document(html: str):
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+# Same as XPath text(): the element's own text nodes, not its descendants'
+def _own_text(el) -> str:
+    return (el.text or "") + "".join(child.tail or "" for child in el)
+
+def _to_int(text: str) -> int:
+    try:
+        return int(text.strip())
+    except ValueError:
+        return 0
+
+def _published_text(value: Optional[str]) -> str:
+    # Keep the wording of the rendered page, which normalize.parse_published reads
+    if not value:
+        return ""
+    try:
+        published = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return ""
+    return f"Published on {published:%b} {published.day}, {published.year}"
+
+def _props(doc) -> Iterable:
+    for raw in PROPS_XPATH(doc):
+        try:
+            yield json.loads(raw)
+        except ValueError:
+            continue
+
+def _find_entries(value, depth: int = 0) -> Optional[List[Dict]]:
+    # The paper list is a list of {"paper": {"id": ...}, ...} somewhere in the props
+    if depth > 4:
+        return None
+    if isinstance(value, list):
+        if value and all(isinstance(v, dict) and isinstance(v.get("paper"), dict) and v["paper"].get("id") for v in value):
+            return value
+        return None
+    if isinstance(value, dict):
+        for child in value.values():
+            found = _find_entries(child, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+def _item(base_url: str, href: str) -> Dict:
+    link = base_url + href
+    return {"id": link.split('/')[-1], "link": link.replace('//', '/'), "detail_url": link}
+
+def _listing_from_props(doc, base_url: str) -> Optional[List[Dict]]:
+    for props in _props(doc):
+        entries = _find_entries(props)
+        if entries is None:
+            continue
+        result = []
+        for entry in entries:
+            paper = entry["paper"]
+            item = _item(base_url, f"/papers/{paper['id']}")
+            authors = [a.get("name", "").strip() for a in paper.get("authors") or [] if isinstance(a, dict)]
+            stars = paper.get("githubStars")
+            item.update({
+                "title": " ".join((entry.get("title") or paper.get("title") or "").split()),
+                "like_num": paper.get("upvotes") or 0,
+                "img_link": entry.get("thumbnail") or "",
+                "author_num": f"{len(authors)} authors" if authors else "",
+                "github_num": str(stars) if stars is not None else "",
+                "comment_num": entry.get("numComments") or 0,
+            })
+            summary = paper.get("summary")
+            published = _published_text(paper.get("publishedAt") or entry.get("publishedAt"))
+            if authors and summary and published:
+                # Complete enough that the detail page does not need fetching
+                item.update({"authors": "|".join(authors), "abstract": summary, "publish_time": published})
+            result.append(item)
+        return result
+    return None
+
+# One walk over each article's subtree picks up every field; the markup checks
+# mirror the original per-field XPaths
+def _listing_from_markup(doc, base_url: str) -> List[Dict]:
+    result = []
+    for article in ARTICLE_XPATH(doc):
+        likes = authors = github = comments = title = img = href = None
+        for el in article.iter():
+            tag = el.tag
+            if not isinstance(tag, str):
+                continue
+            cls = el.get("class") or ""
+            if tag == "div":
+                if likes is None and cls == "leading-none":
+                    likes = _own_text(el)
+                elif authors is None and "flex truncate text-sm" in cls:
+                    authors = _own_text(el)
+            elif tag == "a":
+                parent = el.getparent()
+                if href is None and parent is not None and parent.tag == "h3":
+                    href = el.get("href")
+                    title = _own_text(el)
+                if comments is None and el.get("slot") == "anchor":
+                    comments = _own_text(el)
+                if github is None and "flex translate-y-px items-center" in cls:
+                    github = "".join(_own_text(span) for span in el if span.tag == "span")
+            elif tag == "img" and img is None:
+                parent = el.getparent()
+                if parent is not None and parent.tag == "a" and parent.getparent() is article:
+                    img = el.get("src") or ""
+        if href is None:
+            continue
+        item = _item(base_url, href.strip())
+        item.update({
+            "title": (title or "").strip().replace('\n', '').replace('\t', ''),
+            "like_num": _to_int(likes) if likes else 0,
+            "img_link": img or "",
+            "author_num": (authors or "").strip(),
+            "github_num": (github or "").strip(),
+            "comment_num": _to_int(comments) if comments else 0,
+        })
+        result.append(item)
+    return result
+
+def parse_listing(content_html: str, base_url: str) -> List[Dict]:
+    doc = _document(content_html)
+    if doc is None:
+        return []
+    from_props = _listing_from_props(doc, base_url)
+    return from_props if from_props is not None else _listing_from_markup(doc, base_url)
+
+def parse_detail(content_html: str) -> Dict:
+    doc = _document(content_html)
+    if doc is None:
+        return {"authors": "", "abstract": "", "publish_time": ""}
+    for props in _props(doc):
+        paper = props.get("paper") if isinstance(props, dict) else None
+        if isinstance(paper, dict) and paper.get("summary"):
+            return {
+                "authors": "|".join(a.get("name", "").strip() for a in paper.get("authors") or [] if isinstance(a, dict)),
+                "abstract": paper["summary"],
+                "publish_time": _published_text(paper.get("publishedAt")),
+            }
+    return {
+        "authors": '|'.join(text.strip() for text in DETAIL_AUTHORS_XPATH(doc)),
+        "abstract": ''.join(DETAIL_ABSTRACT_XPATH(doc)),
+        "publish_time": ' '.join(DETAIL_PUBLISHED_XPATH(doc)),
+    }
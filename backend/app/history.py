@@ -0,0 +1,168 @@
+import os
+import atexit
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from .models import db, History, Paper
+from .instrumentation import span
+
+HISTORY_FLUSH_INTERVAL = float(os.environ.get("HISTORY_FLUSH_INTERVAL", "2"))  # seconds
+HISTORY_FLUSH_SIZE = int(os.environ.get("HISTORY_FLUSH_SIZE", "200"))
+HISTORY_MAX_PENDING = int(os.environ.get("HISTORY_MAX_PENDING", "50000"))
+
+# Reading history is written behind the request: record() only buffers the
+# read, and a background thread writes the buffer out every few seconds or as
+# soon as it holds HISTORY_FLUSH_SIZE reads. Reads are keyed by (user, paper),
+# so re-reading a paper moves its existing row to the top instead of adding one.
+class HistoryWriter:
+    def __init__(self, interval: float = HISTORY_FLUSH_INTERVAL, flush_size: int = HISTORY_FLUSH_SIZE,
+                 max_pending: int = HISTORY_MAX_PENDING):
+        self.interval = interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self.app = None
+        self._pending: "OrderedDict[Tuple[int, str], datetime]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._counters = {"recorded": 0, "deduped": 0, "inserted": 0, "updated": 0, "flushes": 0, "failed": 0, "dropped": 0,
+                          "rejected": 0}
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["history_writer"] = self
+
+    def record(self, user_id: Optional[int], arxiv_id: str, access_time: Optional[datetime] = None):
+        key = (user_id, arxiv_id)
+        with self._lock:
+            if user_id is None:
+                # The token's user no longer exists; the row could never be written
+                self._counters["rejected"] += 1
+                return
+            self._counters["recorded"] += 1
+            if key in self._pending:
+                self._counters["deduped"] += 1
+                del self._pending[key]
+            elif len(self._pending) >= self.max_pending:
+                # The database has been unreachable for a while; keep the newest reads
+                self._pending.popitem(last=False)
+                self._counters["dropped"] += 1
+            self._pending[key] = access_time or datetime.utcnow()
+            full = len(self._pending) >= self.flush_size
+            if self._thread is None and self.app is not None:
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self._flush_in_context)
+        if full:
+            self._wake.set()
+
+    def has_pending(self, user_id: int) -> bool:
+        with self._lock:
+            return any(uid == user_id for uid, _ in self._pending)
+
+    # Writes out everything buffered so far; needs an app context
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, OrderedDict()
+            if not batch:
+                return 0
+            try:
+                with span("history_flush"):
+                    try:
+                        inserted, updated = self._write(batch)
+                    except IntegrityError:
+                        db.session.rollback()
+                        inserted, updated = self._write_each(batch)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                print(f"[DEBUG] History flush failed, {len(batch)} reads kept for retry: {e}")
+                with self._lock:
+                    self._counters["failed"] += 1
+                    # Reads recorded since the swap are newer and win
+                    for key, access_time in batch.items():
+                        self._pending.setdefault(key, access_time)
+                return 0
+            with self._lock:
+                self._counters["flushes"] += 1
+                self._counters["inserted"] += inserted
+                self._counters["updated"] += updated
+            return inserted + updated
+
+    def _write(self, batch: "OrderedDict[Tuple[int, str], datetime]") -> Tuple[int, int]:
+        user_ids = {uid for uid, _ in batch}
+        arxiv_ids = {aid for _, aid in batch}
+        papers = {row.id: row for row in db.session.query(
+            Paper.id, Paper.title, Paper.like_num, Paper.github_num, Paper.img_link
+        ).filter(Paper.id.in_(list(arxiv_ids))).all()}
+        # Newest stored row per (user, paper); served by ix_history_user_arxiv
+        stored = {}
+        for row in db.session.query(History.id, History.user_id, History.arxiv_id)\
+                .filter(History.user_id.in_(list(user_ids)), History.arxiv_id.in_(list(arxiv_ids))).all():
+            key = (row.user_id, row.arxiv_id)
+            if key in batch and row.id > stored.get(key, 0):
+                stored[key] = row.id
+
+        new_rows: List[Dict] = []
+        updates: List[Dict] = []
+        for (user_id, arxiv_id), access_time in batch.items():
+            paper = papers.get(arxiv_id)
+            if paper is None:
+                continue
+            fields = {
+                "title": paper.title,
+                "like_num": paper.like_num or 0,
+                "github_num": paper.github_num,
+                "img_link": paper.img_link,
+                "access_time": access_time,
+            }
+            if (user_id, arxiv_id) in stored:
+                updates.append(dict(fields, id=stored[(user_id, arxiv_id)]))
+            else:
+                new_rows.append(dict(fields, user_id=user_id, arxiv_id=arxiv_id))
+        if new_rows:
+            db.session.execute(History.__table__.insert(), new_rows)
+        if updates:
+            db.session.execute(update(History), updates)
+        db.session.commit()
+        return len(new_rows), len(updates)
+
+    # One bad row (e.g. a stale uid claim failing the foreign key) must not hold
+    # back everyone else's reads: write them one by one and drop the ones rejected
+    def _write_each(self, batch: "OrderedDict[Tuple[int, str], datetime]") -> Tuple[int, int]:
+        inserted = updated = 0
+        for key, access_time in batch.items():
+            try:
+                i, u = self._write(OrderedDict([(key, access_time)]))
+            except IntegrityError as e:
+                db.session.rollback()
+                print(f"[DEBUG] History read dropped for user {key[0]}, paper {key[1]}: {e.orig}")
+                with self._lock:
+                    self._counters["rejected"] += 1
+                continue
+            inserted += i
+            updated += u
+        return inserted, updated
+
+    def _flush_in_context(self):
+        with self.app.app_context():
+            self.flush()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self._flush_in_context()
+            except Exception as e:
+                print(f"[DEBUG] History writer error: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counters, pending=len(self._pending))
+
+history_writer = HistoryWriter()
@@ -0,0 +1,276 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional, Sequence, Tuple
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "0"))  # 0 disables the sampling profiler
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "./cache/profiles")
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class CounterMetric:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+class HistogramMetric:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # per-bucket counts (non-cumulative), then sum and count
+                state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._values.items())
+        names = self.label_names + ("le",)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {round(total, 6)}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> CounterMetric:
+        metric = CounterMetric(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), **kwargs) -> HistogramMetric:
+        metric = HistogramMetric(name, help_text, labels, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    # Prometheus text exposition format 0.0.4
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+REQUEST_SECONDS = registry.histogram("app_request_seconds", "HTTP request latency.", ("method", "endpoint", "status"))
+STAGE_SECONDS = registry.histogram("app_stage_seconds", "Time spent in an instrumented stage.", ("stage",))
+STAGE_ERRORS = registry.counter("app_stage_errors_total", "Instrumented stages that raised.", ("stage",))
+SQL_SECONDS = registry.histogram("app_sql_seconds", "SQL statement execution time.", ("statement",))
+SQL_PER_REQUEST = registry.histogram("app_sql_queries_per_request", "SQL statements issued per request.", ("endpoint",),
+                                     buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500))
+SLOW_PROFILES = registry.counter("app_slow_request_profiles_total", "Slow requests dumped by the sampling profiler.", ("endpoint",))
+
+def _request_state() -> Optional[Dict]:
+    if has_request_context():
+        return g.get("_instrumentation")
+    return None
+
+# Times a stage into app_stage_seconds and, inside a request, into its
+# Server-Timing breakdown. Works from background threads too.
+@contextmanager
+def span(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage)
+        state = _request_state()
+        if state is not None:
+            state["spans"][stage] = state["spans"].get(stage, 0.0) + elapsed
+
+def timed(stage: str):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["_query_started"].pop()
+    elapsed = time.perf_counter() - started
+    SQL_SECONDS.observe(elapsed, statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER")
+    state = _request_state()
+    if state is not None:
+        state["sql_count"] += 1
+        state["spans"]["db"] = state["spans"].get("db", 0.0) + elapsed
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    started = context.connection.info.get("_query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+# One background thread samples the stacks of every thread currently serving a
+# request. Samples are kept as folded stacks ("a;b;c count"), the input format of
+# flamegraph.pl and speedscope, and written out only for requests that end up slow.
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._active: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id: int):
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id: int) -> Counter:
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[self._fold(frame)] += 1
+
+    @staticmethod
+    def _fold(frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+profiler = SamplingProfiler()
+
+def _dump_profile(endpoint: str, elapsed: float, samples: Counter) -> Optional[str]:
+    if not samples:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = endpoint.strip("/").replace("/", "_").replace("<", "").replace(">", "") or "root"
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{int(elapsed * 1000)}ms.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+def _before_request():
+    g._instrumentation = {"started": time.perf_counter(), "spans": {}, "sql_count": 0,
+                          "thread": threading.get_ident(), "streaming": False}
+    if PROFILE_SLOW_MS:
+        profiler.start(threading.get_ident())
+
+def _record(state: Dict, method: str, endpoint: str, status: int) -> float:
+    elapsed = time.perf_counter() - state["started"]
+    REQUEST_SECONDS.observe(elapsed, method, endpoint, status)
+    SQL_PER_REQUEST.observe(state["sql_count"], endpoint)
+    if PROFILE_SLOW_MS:
+        samples = profiler.stop(state["thread"])
+        if elapsed * 1000 >= PROFILE_SLOW_MS:
+            path = _dump_profile(endpoint, elapsed, samples)
+            if path:
+                SLOW_PROFILES.inc(endpoint)
+            breakdown = ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in state["spans"].items())
+            print(f"[SLOW] {method} {endpoint} {elapsed:.3f}s sql={state['sql_count']} {breakdown} profile={path}")
+    return elapsed
+
+def _after_request(response):
+    state = g.get("_instrumentation")
+    if state is None:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    timings = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in state["spans"].items()]
+    if response.is_streamed:
+        # The body (SSE, NDJSON, CSV) has not run yet: headers can only carry the
+        # setup time, and the request is recorded and profiled once the server
+        # closes the body
+        state["streaming"] = True
+        method, status = request.method, response.status_code
+        response.call_on_close(lambda: _record(state, method, endpoint, status))
+        timings.append(f"headers;dur={(time.perf_counter() - state['started']) * 1000:.1f}")
+    else:
+        timings.append(f"total;dur={_record(state, request.method, endpoint, response.status_code) * 1000:.1f}")
+    response.headers["Server-Timing"] = ", ".join(timings)
+    response.headers["X-SQL-Queries"] = str(state["sql_count"])
+    return response
+
+def _teardown_request(error=None):
+    # after_request is skipped when a view raises; make sure the sampler lets go,
+    # unless a streamed body still has to run
+    state = g.get("_instrumentation")
+    if PROFILE_SLOW_MS and not (state and state["streaming"]):
+        profiler.stop(threading.get_ident())
+
+def metrics_view():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import traceback
+from typing import Callable, Dict, Hashable, Iterable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from .models import db, JobRecord
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", "3600"))
+JOB_SYNC_INTERVAL = float(os.environ.get("JOB_SYNC_INTERVAL", "2"))  # seconds between progress saves
+JOB_STALE_SECONDS = float(os.environ.get("JOB_STALE_SECONDS", "60"))  # unsaved this long: its worker is gone
+
+class Job:
+    def __init__(self, key: Hashable, kind: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.status = "queued"
+        self.pages_total = 0
+        self.pages_fetched = 0
+        self.papers_upserted = 0
+        self.errors = []
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stages: Optional[Callable[[], Dict]] = None  # live per-stage progress, for pipeline jobs
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    # Progress hook called by the spiders; every argument is an increment
+    def advance(self, pages: int = 0, total: int = 0, upserted: int = 0, error: Optional[str] = None):
+        with self._lock:
+            self.pages_fetched += pages
+            self.pages_total += total
+            self.papers_upserted += upserted
+            if error:
+                self.errors.append(error)
+
+    def eta_seconds(self) -> Optional[float]:
+        if self.status != "running" or not self.pages_fetched or not self.pages_total:
+            return None
+        elapsed = time.time() - self.started_at
+        remaining = max(self.pages_total - self.pages_fetched, 0)
+        return round(elapsed / self.pages_fetched * remaining, 1)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "pages_total": self.pages_total,
+                "pages_fetched": self.pages_fetched,
+                "papers_upserted": self.papers_upserted,
+                "errors": list(self.errors),
+                "eta_seconds": self.eta_seconds(),
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "result": self.result,
+                "stages": self.stages() if self.stages else None,
+            }
+
+# A job as last saved by the worker process running it
+class StoredJob:
+    def __init__(self, state: Dict):
+        self.id = state["job_id"]
+        self.status = state["status"]
+        self._state = state
+
+    def to_dict(self) -> Dict:
+        return dict(self._state)
+
+def _active_key(key: Hashable) -> str:
+    return hashlib.sha1(json.dumps(key, default=str).encode("utf-8")).hexdigest()
+
+# Runs jobs on a thread pool and keeps their state in the jobs table, so that
+# any worker process can report on them and coalesce onto them. A process saves
+# the progress of the jobs it runs every sync_interval seconds; an active job
+# not saved for stale_seconds belonged to a process that died and is failed.
+class JobQueue:
+    def __init__(self, max_workers: int = JOB_WORKERS, sync_interval: float = JOB_SYNC_INTERVAL,
+                 stale_seconds: float = JOB_STALE_SECONDS):
+        self.max_workers = max_workers
+        self.sync_interval = sync_interval
+        self.stale_seconds = stale_seconds
+        self.app = None
+        self._executor = None
+        self._running: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        app.extensions["job_queue"] = self
+
+    # Jobs with the same key coalesce: while one is queued or running in any
+    # worker, submitting the key again returns it instead of starting a second
+    # crawl. Needs an app context.
+    def submit(self, key: Hashable, kind: str, fn: Callable, *args, **kwargs) -> Union[Job, StoredJob]:
+        self._prune()
+        job = Job(key, kind)
+        active_key = _active_key(key)
+        while True:
+            try:
+                db.session.add(JobRecord(id=job.id, kind=kind, status=job.status, active_key=active_key,
+                                         state=self._dump(job), created_at=job.created_at, updated_at=time.time()))
+                db.session.commit()
+                break
+            except IntegrityError:
+                db.session.rollback()
+            existing = JobRecord.query.filter_by(active_key=active_key).first()
+            if existing is None:
+                continue  # it finished in the meantime
+            if not self._abandoned(existing):
+                with self._lock:
+                    return self._running.get(existing.id) or StoredJob(json.loads(existing.state))
+            self._fail_abandoned(existing)
+        with self._lock:
+            self._running[job.id] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sync, name="job-sync", daemon=True)
+                self._thread.start()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    # Live progress for jobs running in this process, the last saved state for
+    # the others. Needs an app context.
+    def get(self, job_id: str) -> Optional[Union[Job, StoredJob]]:
+        with self._lock:
+            job = self._running.get(job_id)
+        if job is not None:
+            return job
+        record = db.session.get(JobRecord, job_id)
+        if record is None:
+            return None
+        if record.active_key and self._abandoned(record):
+            return StoredJob(self._fail_abandoned(record))
+        return StoredJob(json.loads(record.state))
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            with self.app.app_context():
+                self._save([job])
+                job.result = fn(*args, progress=job, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            traceback.print_exc()
+            job.advance(error=f"{type(e).__name__}: {e}")
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            try:
+                with self.app.app_context():
+                    self._save([job])
+            except SQLAlchemyError as e:
+                print(f"[DEBUG] Could not save the final state of job {job.id}: {e}")
+            with self._lock:
+                self._running.pop(job.id, None)
+
+    @staticmethod
+    def _dump(job: Job) -> str:
+        return json.dumps(job.to_dict(), default=str)
+
+    # Snapshot and write under one lock, so a periodic save can never land
+    # after (and undo) the final one
+    def _save(self, jobs: Iterable[Job]):
+        with self._save_lock:
+            now = time.time()
+            for job in jobs:
+                values = {"status": job.status, "state": self._dump(job), "updated_at": now}
+                if not job.active:
+                    values.update(active_key=None, finished_at=job.finished_at)
+                db.session.execute(update(JobRecord).where(JobRecord.id == job.id).values(**values))
+            db.session.commit()
+
+    def _sync(self):
+        while True:
+            time.sleep(self.sync_interval)
+            with self._lock:
+                jobs = list(self._running.values())
+            if not jobs:
+                continue
+            try:
+                with self.app.app_context():
+                    self._save(jobs)
+            except Exception as e:
+                print(f"[DEBUG] Job progress save failed: {e}")
+
+    def _abandoned(self, record: JobRecord) -> bool:
+        with self._lock:
+            if record.id in self._running:
+                return False
+        return time.time() - (record.updated_at or 0) > self.stale_seconds
+
+    def _fail_abandoned(self, record: JobRecord) -> Dict:
+        state = json.loads(record.state)
+        state["errors"] = state.get("errors", []) + ["Worker stopped before the job finished"]
+        state.update(status="failed", finished_at=time.time())
+        # Only if no one saved it (or failed it) since we looked
+        failed = db.session.execute(update(JobRecord).where(
+            JobRecord.id == record.id, JobRecord.updated_at == record.updated_at
+        ).values(status="failed", active_key=None, state=json.dumps(state), finished_at=state["finished_at"])).rowcount
+        db.session.commit()
+        return state if failed else json.loads(db.session.get(JobRecord, record.id).state)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        db.session.execute(delete(JobRecord).where(JobRecord.finished_at < cutoff))
+        db.session.commit()
+
+job_queue = JobQueue()
@@ -0,0 +1,298 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .instrumentation import span, timed
+
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "zhipu")
+LLM_MODEL = os.environ.get("LLM_MODEL", "glm-4-flash")
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "8"))
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.environ.get("LLM_BREAKER_RESET", "30"))
+ZHIPUAI_API_KEY = os.environ.get("ZHIPUAI_API_KEY", "39f1dbb6c1f94c698b072bc6a60067df.zTt4wg3FEWGgdiZk")
+
+class LLMError(Exception):
+    pass
+
+class TransientLLMError(LLMError):
+    pass
+
+class CircuitOpenError(LLMError):
+    pass
+
+class ZhipuBackend:
+    name = "zhipu"
+
+    def __init__(self, api_key: str = ZHIPUAI_API_KEY, model: str = LLM_MODEL, timeout: float = LLM_TIMEOUT):
+        import zhipuai
+        self.model = model
+        self.zhipuai = zhipuai
+        # Retries are owned by the gateway, so the SDK must not retry on its own
+        self.client = zhipuai.ZhipuAI(api_key=api_key, timeout=timeout, max_retries=0)
+        self.transient = (
+            zhipuai.APIConnectionError, zhipuai.APITimeoutError, zhipuai.APIReachLimitError,
+            zhipuai.APIInternalError, zhipuai.APIServerFlowExceedError,
+        )
+
+    def _call(self, fn: Callable):
+        try:
+            return fn()
+        except self.transient as e:
+            raise TransientLLMError(f"{type(e).__name__}: {e}") from e
+        except (self.zhipuai.ZhipuAIError, AttributeError, IndexError, TypeError) as e:
+            raise LLMError(f"{type(e).__name__}: {e}") from e
+
+    def complete(self, messages: List[Dict], timeout: float) -> Tuple[str, Dict]:
+        # Unpacked inside _call so a malformed response (no choices) is an LLMError too
+        def create():
+            response = self.client.chat.completions.create(model=self.model, messages=messages, timeout=timeout)
+            usage = getattr(response, "usage", None)
+            return response.choices[0].message.content or "", {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            }
+        return self._call(create)
+
+    def stream(self, messages: List[Dict], timeout: float) -> Iterator[str]:
+        response = self._call(lambda: self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=True, timeout=timeout
+        ))
+        iterator = iter(response)
+
+        def next_text():
+            chunk = next(iterator, None)
+            if chunk is None:
+                return None
+            return (chunk.choices[0].delta.content or "") if chunk.choices else ""
+        while True:
+            text = self._call(next_text)
+            if text is None:
+                return
+            if text:
+                yield text
+
+# Offline stand-in that answers the platform's two prompts with well-formed,
+# deterministic output, so the analysis path can be load-tested without GLM.
+class FakeBackend:
+    name = "fake"
+    ARXIV_LINE_RE = re.compile(r"arxiv: (\S+), title: (.+)")
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, chunk_size: int = 16):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chunk_size = chunk_size
+
+    def _answer(self, messages: List[Dict]) -> str:
+        system_prompt, content = messages[0]["content"], messages[-1]["content"]
+        digest = hashlib.md5(content.encode("utf-8")).hexdigest()
+        if "suggest_score" in system_prompt:
+            picks = self.ARXIV_LINE_RE.findall(content)[:10]
+            return json.dumps([
+                {"arxiv_id": arxiv_id, "title": title.strip(), "suggest_score": 10 - i}
+                for i, (arxiv_id, title) in enumerate(picks)
+            ])
+        if "abstract_summary" in system_prompt:
+            return json.dumps({
+                "abstract_summary": f"Synthetic summary {digest[:8]}",
+                "research_problem": content[:80],
+                "core_contribution": "contribution one; contribution two",
+                "method_name": f"Method-{digest[:4]}",
+                "method_innovation": "innovation one",
+                "datasets": "SyntheticSet",
+                "experimental_results": "accuracy 90.0",
+                "ablation_study": "",
+                "limitations": "",
+                "conclusion_and_future_work": "future work",
+            })
+        return json.dumps({"echo": content[:200]})
+
+    def _simulate(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransientLLMError("fake backend failure")
+
+    def complete(self, messages: List[Dict], timeout: float) -> Tuple[str, Dict]:
+        self._simulate()
+        text = self._answer(messages)
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        return text, {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(text) // 4}
+
+    def stream(self, messages: List[Dict], timeout: float) -> Iterator[str]:
+        self._simulate()
+        text = self._answer(messages)
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+BACKENDS = {"zhipu": ZhipuBackend, "fake": FakeBackend}
+
+# Closed: calls pass. After `threshold` consecutive failures it opens and rejects
+# calls outright for `reset_timeout` seconds, then lets one trial call through.
+# Only transient or server-side failures count; a refused request does not.
+class CircuitBreaker:
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, reset_timeout: float = LLM_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self._trial_in_flight):
+                raise CircuitOpenError("LLM circuit breaker is open")
+            if state == "half_open":
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+class LLMGateway:
+    def __init__(self, backend=None, max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX, breaker: Optional[CircuitBreaker] = None):
+        self._backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0, "failures": 0, "retries": 0, "rejected": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "latency_seconds": 0.0,
+        }
+
+    @property
+    def backend(self):
+        # Built lazily so importing the app never needs the SDK or network
+        if self._backend is None:
+            self._backend = BACKENDS[LLM_BACKEND]()
+        return self._backend
+
+    def set_backend(self, backend):
+        self._backend = backend
+
+    def _account(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = self.backend.name
+        stats["breaker"] = self.breaker.state
+        stats["avg_latency_seconds"] = round(stats["latency_seconds"] / stats["calls"], 4) if stats["calls"] else 0.0
+        return stats
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _with_retries(self, call: Callable):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.breaker.before_call()
+            except CircuitOpenError:
+                self._account(rejected=1)
+                raise
+            try:
+                result = call()
+                self.breaker.record_success()
+                return result
+            except TransientLLMError:
+                self.breaker.record_failure()
+                self._account(failures=1)
+                if attempt == self.max_retries:
+                    raise
+                self._account(retries=1)
+                time.sleep(self._backoff(attempt))
+            except LLMError:
+                # The service answered and refused this one request (a 400, the
+                # content filter, bad credentials): nothing says it is down, and a
+                # few unlucky papers must not lock every user out of the LLM
+                self.breaker.record_success()
+                self._account(failures=1)
+                raise
+            except Exception as e:
+                # Anything else (a backend bug, a malformed response) still has to
+                # release a half-open trial, or the breaker would stay open for good
+                self.breaker.record_failure()
+                self._account(failures=1)
+                raise LLMError(f"{type(e).__name__}: {e}") from e
+
+    @staticmethod
+    def messages(system_prompt: str, content: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content},
+        ]
+
+    @timed("llm")
+    def complete(self, system_prompt: str, content: str) -> str:
+        messages = self.messages(system_prompt, content)
+        with self._slots:
+            started = time.monotonic()
+            try:
+                text, usage = self._with_retries(lambda: self.backend.complete(messages, self.timeout))
+            finally:
+                self._account(calls=1, latency_seconds=time.monotonic() - started)
+        self._account(prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0))
+        return text
+
+    # Retries only cover opening the stream; once tokens flow a failure is surfaced
+    def stream(self, system_prompt: str, content: str) -> Iterator[str]:
+        messages = self.messages(system_prompt, content)
+        with self._slots, span("llm_stream"):
+            started = time.monotonic()
+            chars = 0
+            try:
+                def open_stream():
+                    iterator = self.backend.stream(messages, self.timeout)
+                    return iterator, next(iterator, None)
+                iterator, first = self._with_retries(open_stream)
+                if first is None:
+                    return
+                chars += len(first)
+                yield first
+                try:
+                    for token in iterator:
+                        chars += len(token)
+                        yield token
+                except LLMError:
+                    raise
+                except Exception as e:
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+            finally:
+                self._account(calls=1, latency_seconds=time.monotonic() - started, completion_tokens=chars // 4)
+
+gateway = LLMGateway()
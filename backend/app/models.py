@@ -32,6 +32,19 @@ class Paper(db.Model):
     github_num = db.Column(db.String(100))
     comment_num = db.Column(db.Integer, default=0)
     img_link = db.Column(db.Text)
+    # Typed copies of the scraped text fields, filled by app.normalize on ingest
+    github_stars = db.Column(db.Integer)
+    author_count = db.Column(db.Integer)
+    published_date = db.Column(db.Date)
+    trending_score = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index('ix_papers_year_month_id', 'year', 'month', 'id'),
+        db.Index('ix_papers_like_num_id', 'like_num', 'id'),
+        db.Index('ix_papers_comment_num_id', 'comment_num', 'id'),
+        db.Index('ix_papers_trending_id', 'trending_score', 'id'),
+        db.Index('ix_papers_year_month_trending', 'year', 'month', 'trending_score', 'id'),
+    )
 
 class History(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -43,4 +56,74 @@ class History(db.Model):
     img_link = db.Column(db.Text)
     access_time = db.Column(db.DateTime, default=datetime.utcnow)
 
-    user = db.relationship('User', backref=db.backref('histories', lazy=True))
\ No newline at end of file
+    user = db.relationship('User', backref=db.backref('histories', lazy=True))
+
+    __table_args__ = (
+        # /api/history reads a user's newest rows straight off this index
+        db.Index('ix_history_user_time', 'user_id', 'access_time'),
+        db.Index('ix_history_user_arxiv', 'user_id', 'arxiv_id'),
+    )
+
+class CrawlCheckpoint(db.Model):
+    __tablename__ = 'crawl_checkpoints'
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Integer, primary_key=True, default=0)  # 0 marks a whole-month unit
+    pages = db.Column(db.Integer, default=0)
+    papers = db.Column(db.Integer, default=0)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# HTTP validators of the last listing page we stored, sent back as
+# If-None-Match / If-Modified-Since by the incremental sync
+class PageValidator(db.Model):
+    __tablename__ = 'page_validators'
+    url = db.Column(db.String(500), primary_key=True)
+    etag = db.Column(db.String(200))
+    last_modified = db.Column(db.String(100))
+    checked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Analyses precomputed by the batch pipeline (app/summaries.py). Unlike the
+# analysis cache they never expire, and carry the arXiv metadata so that
+# assist_read can answer without touching the PDF.
+class PaperSummary(db.Model):
+    __tablename__ = 'paper_summaries'
+    arxiv_id = db.Column(db.String(50), primary_key=True)
+    prompt_version = db.Column(db.String(20), primary_key=True)
+    pdf_hash = db.Column(db.String(64))
+    title = db.Column(db.String(500))
+    authors = db.Column(db.Text)  # JSON list
+    pdf_url = db.Column(db.Text)
+    published = db.Column(db.String(20))
+    result = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class AnalysisCache(db.Model):
+    __tablename__ = 'analysis_cache'
+    arxiv_id = db.Column(db.String(50), primary_key=True)
+    pdf_hash = db.Column(db.String(64), primary_key=True)
+    prompt_version = db.Column(db.String(20), primary_key=True)
+    result = db.Column(db.Text, nullable=False)
+    hits = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+# Background jobs (app/jobs.py), shared by every worker process. active_key is
+# set while a job is queued or running and cleared when it ends; being unique,
+# it lets the database pick one job per key. state holds the job's to_dict().
+class JobRecord(db.Model):
+    __tablename__ = 'jobs'
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20))
+    status = db.Column(db.String(20))
+    active_key = db.Column(db.String(40), unique=True)
+    state = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.Float)
+    updated_at = db.Column(db.Float)  # heartbeat of the process running it
+    finished_at = db.Column(db.Float, index=True)
+
+# Version counters shared by every process, e.g. the corpus version the
+# recommendation cache compares its entries against (app/result_cache.py)
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
\ No newline at end of file
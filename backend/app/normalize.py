@@ -0,0 +1,57 @@
+import re
+import math
+from datetime import date, datetime
+from typing import Dict, Optional
+
+COUNT_RE = re.compile(r"(\d+(?:,\d{3})*(?:\.\d+)?)\s*([kKmM]?)")
+PUBLISHED_RE = re.compile(r"([A-Z][a-z]{2,8})\.?\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?")
+TRENDING_EPOCH = date(2023, 1, 1)
+# Every TRENDING_DECAY_DAYS of recency is worth e times the engagement. Because the
+# time term is additive, scores never need recomputing as papers age.
+TRENDING_DECAY_DAYS = 7.0
+
+# "1.2k" -> 1200, "5 authors" -> 5, "" -> 0
+def parse_count(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = COUNT_RE.search(str(value))
+    if not match:
+        return 0
+    number, suffix = match.groups()
+    return int(round(float(number.replace(",", "")) * {"": 1, "k": 1_000, "m": 1_000_000}[suffix.lower()]))
+
+# "Published on Sep 2, 2025" -> date(2025, 9, 2); the year defaults to the crawl year
+def parse_published(value: Optional[str], default_year: Optional[int] = None) -> Optional[date]:
+    if not value:
+        return None
+    for match in PUBLISHED_RE.finditer(value):
+        month_name, day, year = match.groups()
+        year = int(year) if year else default_year
+        if not year:
+            continue
+        for fmt in ("%b", "%B"):
+            try:
+                month = datetime.strptime(month_name, fmt).month
+                return date(year, month, int(day))
+            except ValueError:
+                continue
+    return None
+
+def trending_score(like_num: int, comment_num: int, github_stars: int, published: Optional[date]) -> float:
+    engagement = (like_num or 0) + 2 * (comment_num or 0) + 5 * math.log1p(github_stars or 0)
+    days = ((published or TRENDING_EPOCH) - TRENDING_EPOCH).days
+    return round(math.log1p(engagement) + days / TRENDING_DECAY_DAYS, 6)
+
+def typed_fields(row: Dict, year: Optional[int] = None, month: Optional[int] = None) -> Dict:
+    published = parse_published(row.get("publish_time"), year)
+    if published is None and year and month:
+        published = date(year, month, 1)
+    github_stars = parse_count(row.get("github_num"))
+    return {
+        "github_stars": github_stars,
+        "author_count": parse_count(row.get("author_num")),
+        "published_date": published,
+        "trending_score": trending_score(row.get("like_num"), row.get("comment_num"), github_stars, published),
+    }
@@ -0,0 +1,214 @@
+import os
+import re
+import json
+import threading
+import multiprocessing
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import fitz
+from .analysis_cache import file_sha256
+from .instrumentation import timed
+
+EXTRACT_CACHE_DIR = os.environ.get("EXTRACT_CACHE_DIR", "./cache/pdf_text")
+EXTRACT_CACHE_MAX_BYTES = int(os.environ.get("EXTRACT_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARALLEL_MIN_PAGES = 16  # below this, process start-up costs more than it saves
+CHARS_PER_TOKEN = 4
+ANALYSIS_MAX_PAGES = 20
+ANALYSIS_TOKEN_BUDGET = 6000
+CACHE_FORMAT_VERSION = 1
+
+SECTION_PATTERNS = [
+    ("abstract", r"abstract"),
+    ("introduction", r"introduction"),
+    ("related_work", r"related\s+works?|background|preliminar(?:y|ies)"),
+    ("method", r"methods?|methodology|approach|proposed\s+method|our\s+approach|model|framework"),
+    ("experiments", r"experiments?|experimental\s+(?:setup|results)|evaluation|results"),
+    ("ablation", r"ablation(?:\s+stud(?:y|ies))?|analysis"),
+    ("limitations", r"limitations?"),
+    ("conclusion", r"conclusions?(?:\s+and\s+future\s+work)?|discussion"),
+    ("references", r"references|bibliography"),
+    ("appendix", r"appendix|supplementary\s+material"),
+]
+SECTION_RE = re.compile(
+    r"^\s*(?:(?:\d+(?:\.\d+)*|[IVX]+|[A-Z])[.)]?\s+)?(?:" +
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_PATTERNS) +
+    r")\s*[:.]?\s*$",
+    re.IGNORECASE,
+)
+NUMBERED_RE = re.compile(r"^\s*(?:\d+(?:\.\d+)*|[IVX]+)[.)]?\s+\S")
+
+# Share of the token budget each section may use; unused share flows to later sections
+SECTION_BUDGET = [
+    ("abstract", 0.12),
+    ("introduction", 0.13),
+    ("method", 0.28),
+    ("experiments", 0.24),
+    ("ablation", 0.06),
+    ("limitations", 0.05),
+    ("conclusion", 0.12),
+]
+
+# Runs in a worker process: returns (text, heading_hint) lines for each page.
+# A line is a heading hint when it is set larger than the page's body text or fully bold.
+def _extract_range(pdf_path: str, start: int, end: int) -> List[List[Tuple[str, bool]]]:
+    doc = fitz.open(pdf_path)
+    try:
+        pages = []
+        for i in range(start, end + 1):
+            lines = []
+            sizes = Counter()
+            for block in doc[i].get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    text = "".join(span["text"] for span in spans).strip()
+                    size = max(span["size"] for span in spans)
+                    bold = all(span["flags"] & 16 for span in spans)
+                    sizes[round(size, 1)] += len(text)
+                    lines.append((text, size, bold))
+            body_size = sizes.most_common(1)[0][0] if sizes else 0
+            pages.append([(text, size > body_size * 1.05 or bold) for text, size, bold in lines])
+        return pages
+    finally:
+        doc.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a threaded server can copy a held lock (DB pool, logging) into the
+            # child; forkserver starts workers from a clean single-threaded process
+            _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+def _page_count(pdf_path: str) -> int:
+    doc = fitz.open(pdf_path)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+def _extract_lines(pdf_path: str, start: int, end: int) -> List[List[Tuple[str, bool]]]:
+    n_pages = end - start + 1
+    if n_pages < PARALLEL_MIN_PAGES or EXTRACT_WORKERS <= 1:
+        return _extract_range(pdf_path, start, end)
+    chunk = -(-n_pages // EXTRACT_WORKERS)
+    ranges = [(s, min(s + chunk - 1, end)) for s in range(start, end + 1, chunk)]
+    pool = _get_pool()
+    futures = [pool.submit(_extract_range, pdf_path, s, e) for s, e in ranges]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+def detect_sections(pages: List[List[Tuple[str, bool]]]) -> Dict[str, str]:
+    sections: Dict[str, List[str]] = {"front": []}
+    current = "front"
+    for lines in pages:
+        for text, hint in lines:
+            match = SECTION_RE.match(text) if len(text) < 80 else None
+            if match and (hint or NUMBERED_RE.match(text) or text.isupper()):
+                current = next(name for name, value in match.groupdict().items() if value)
+                # A section name seen again (e.g. "Analysis" inside experiments) keeps appending
+                sections.setdefault(current, [])
+                continue
+            sections[current].append(text)
+    result = {name: "\n".join(lines).strip() for name, lines in sections.items()}
+    if not result.get("abstract") and result.get("front"):
+        # Many templates set "Abstract" inline with the first sentence; the front matter holds it
+        result["abstract"] = result["front"]
+    return {name: text for name, text in result.items() if text}
+
+# Removes the least recently used cached extracts until the directory fits in max_bytes
+def evict_extracts(cache_dir: str = EXTRACT_CACHE_DIR, max_bytes: int = EXTRACT_CACHE_MAX_BYTES, keep: Optional[str] = None):
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith(".json") and os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def _cache_path(pdf_hash: str, start: int, end: int) -> str:
+    return os.path.join(EXTRACT_CACHE_DIR, f"{pdf_hash}_{start}_{end}_v{CACHE_FORMAT_VERSION}.json")
+
+# Extracts pages start..end (inclusive, clamped to the document) with section
+# detection. Results are cached on disk per (pdf hash, page range).
+@timed("pdf_extract")
+def extract_document(pdf_path: str, start: int = 0, end: Optional[int] = None) -> Optional[Dict]:
+    if not pdf_path or not os.path.isfile(pdf_path):
+        return None
+    try:
+        total_pages = _page_count(pdf_path)
+        start = max(start, 0)
+        end = total_pages - 1 if end is None else min(end, total_pages - 1)
+        if start >= total_pages or end < start:
+            return None
+        pdf_hash = file_sha256(pdf_path)
+        cache_path = _cache_path(pdf_hash, start, end)
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, encoding="utf-8") as f:
+                    document = json.load(f)
+                os.utime(cache_path)  # mtime doubles as last-access time for eviction
+                return document
+            except (OSError, ValueError):
+                pass
+        pages = _extract_lines(pdf_path, start, end)
+        document = {
+            "pdf_hash": pdf_hash,
+            "page_count": total_pages,
+            "start_page": start,
+            "end_page": end,
+            "pages": ["\n".join(text for text, _ in lines) for lines in pages],
+            "sections": detect_sections(pages),
+        }
+        os.makedirs(EXTRACT_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+        evict_extracts(keep=cache_path)
+        return document
+    except Exception as e:
+        print(f"[DEBUG] PDF extraction failed for {pdf_path}: {e}")
+        return None
+
+def build_analysis_context(document: Dict, token_budget: int = ANALYSIS_TOKEN_BUDGET) -> str:
+    budget = token_budget * CHARS_PER_TOKEN
+    sections = document.get("sections", {})
+    picked = [(name, share) for name, share in SECTION_BUDGET if sections.get(name)]
+    if len(picked) < 2:
+        # No usable structure detected: fall back to the leading pages
+        return "\n".join(document.get("pages", []))[:budget]
+    total_share = sum(share for _, share in picked)
+    parts = []
+    carry = 0
+    for name, share in picked:
+        allowance = int(budget * share / total_share) + carry
+        content = sections[name]
+        parts.append(f"## {name.replace('_', ' ').title()}\n{content[:allowance]}")
+        carry = max(allowance - len(content), 0)
+    return "\n\n".join(parts)
+
+def analysis_context(pdf_path: str, max_pages: int = ANALYSIS_MAX_PAGES, token_budget: int = ANALYSIS_TOKEN_BUDGET) -> Optional[str]:
+    document = extract_document(pdf_path, 0, max_pages - 1)
+    if not document:
+        return None
+    return build_analysis_context(document, token_budget) or None
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+import base64
+from datetime import date
+from typing import Dict, Iterator, List, Tuple
+from sqlalchemy import select, tuple_
+from .models import db, Paper
+
+papers = Paper.__table__
+
+QUERY_FIELDS = [
+    'id', 'title', 'authors', 'abstract', 'publish_time', 'pdf_link', 'year', 'month',
+    'like_num', 'author_num', 'github_num', 'comment_num', 'img_link',
+    'github_stars', 'author_count', 'published_date', 'trending_score',
+]
+FILTER_FIELDS = {
+    'id', 'title', 'publish_time', 'year', 'month', 'like_num', 'author_num', 'github_num', 'comment_num',
+    'github_stars', 'author_count', 'published_date', 'trending_score',
+}
+# Each sort is a column tuple scanned in one direction, with id as the tie-breaker,
+# so keyset pagination is a single row-value comparison backed by a composite index
+SORTS = {
+    'recent': (('year', 'month', 'id'), 'desc'),
+    'oldest': (('year', 'month', 'id'), 'asc'),
+    'likes': (('like_num', 'id'), 'desc'),
+    'comments': (('comment_num', 'id'), 'desc'),
+    'trending': (('trending_score', 'id'), 'desc'),
+}
+RANGE_OPS = {'gt': '__gt__', 'gte': '__ge__', 'lt': '__lt__', 'lte': '__le__'}
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+class QueryError(ValueError):
+    pass
+
+def encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise QueryError('Invalid cursor')
+    # Anything else decodes fine but breaks the row-value comparison in SQL
+    if not isinstance(values, list) or any(isinstance(v, (list, dict)) for v in values):
+        raise QueryError('Invalid cursor')
+    return values
+
+def parse_limit(value, default: int) -> int:
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        raise QueryError(f'Invalid limit {value!r}')
+
+def _filter_clauses(where: Dict) -> List:
+    clauses = []
+    for key, value in where.items():
+        if key not in FILTER_FIELDS:
+            raise QueryError(f'Cannot filter on {key!r}')
+        column = papers.c[key]
+        if isinstance(value, list):
+            clauses.append(column.in_(value))
+        elif isinstance(value, dict):
+            for op, operand in value.items():
+                if op == 'in':
+                    clauses.append(column.in_(list(operand)))
+                elif op in RANGE_OPS:
+                    clauses.append(getattr(column, RANGE_OPS[op])(operand))
+                else:
+                    raise QueryError(f'Unknown operator {op!r} for {key!r}')
+        else:
+            clauses.append(column == value)
+    return clauses
+
+def build_query(data: Dict) -> Tuple:
+    fields = data.get('fields') or ['id']
+    unknown = [f for f in fields if f not in QUERY_FIELDS]
+    if unknown:
+        raise QueryError(f'Unknown fields: {", ".join(unknown)}')
+    sort = data.get('sort', 'recent')
+    if sort not in SORTS:
+        raise QueryError(f'Unknown sort {sort!r}, expected one of {", ".join(SORTS)}')
+    sort_fields, direction = SORTS[sort]
+    sort_columns = [papers.c[f] for f in sort_fields]
+
+    selected = list(dict.fromkeys(list(fields) + list(sort_fields)))
+    stmt = select(*[papers.c[f] for f in selected]).where(*_filter_clauses(data.get('where') or {}))
+    if data.get('cursor'):
+        values = decode_cursor(data['cursor'])
+        if len(values) != len(sort_columns):
+            raise QueryError('Cursor does not match sort')
+        key = tuple_(*sort_columns)
+        stmt = stmt.where(key < tuple_(*values) if direction == 'desc' else key > tuple_(*values))
+    stmt = stmt.order_by(*[c.desc() if direction == 'desc' else c.asc() for c in sort_columns])
+    return stmt, fields, sort_fields
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+# Dates go out as ISO strings rather than Flask's default HTTP-date format
+def _json_value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+def query_page(data: Dict) -> Dict:
+    stmt, fields, sort_fields = build_query(data)
+    limit = max(1, min(parse_limit(data.get('limit'), 100), MAX_PAGE_SIZE))
+    # One extra row tells us whether another page exists
+    result = db.session.execute(stmt.limit(limit + 1)).fetchall()
+    rows = [row._mapping for row in result[:limit]]
+    next_cursor = None
+    if len(result) > limit:
+        next_cursor = encode_cursor(rows[-1][f] for f in sort_fields)
+    return {'rows': [{f: _json_value(row[f]) for f in fields} for row in rows], 'next_cursor': next_cursor}
+
+
+# Streams every matching row from a server-side cursor (ignores `limit` unless given)
+def export_rows(data: Dict, fmt: str) -> Iterator[str]:
+    stmt, fields, _ = build_query(data)
+    if data.get('limit'):
+        stmt = stmt.limit(max(0, parse_limit(data['limit'], 0)))
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for partition in result.partitions():
+            for row in partition:
+                writer.writerow([row._mapping[f] for f in fields])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        for partition in result.partitions():
+            yield ''.join(
+                json.dumps({f: row._mapping[f] for f in fields}, ensure_ascii=False, default=_json_default) + '\n'
+                for row in partition
+            )
@@ -0,0 +1,258 @@
+import os
+import json
+import math
+import time
+import zlib
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import text, bindparam
+from .models import db
+from .search import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: fall back to the in-process lock only
+    fcntl = None
+
+RECOMMEND_INDEX_DIR = os.environ.get("RECOMMEND_INDEX_DIR", "./index")
+VECTOR_DIM = int(os.environ.get("RECOMMEND_VECTOR_DIM", "512"))
+SYNC_INTERVAL_SECONDS = 60
+# Rebuild the idf table from scratch once the corpus has grown this much since the last fit
+REFIT_GROWTH = 0.5
+
+def _features(title: str, abstract: str) -> Counter:
+    counts = Counter()
+    for field, weight in ((title, 2.0), (abstract, 1.0)):
+        tokens = tokenize(field)
+        for token in tokens:
+            counts[token] += weight
+        for left, right in zip(tokens, tokens[1:]):
+            counts[f"{left} {right}"] += weight
+    return counts
+
+# Dense paper vectors from hashed TF-IDF over title + abstract unigrams and bigrams.
+# Feature hashing is a fixed random projection, so a new paper's vector can be
+# appended without refitting anything; only the idf table is refreshed on rebuild.
+class VectorIndex:
+    def __init__(self, index_dir: str = RECOMMEND_INDEX_DIR, dim: int = VECTOR_DIM):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._idf: Dict[str, float] = {}
+        self._fit_docs = 0
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._meta_mtime = 0.0
+        self._synced_at = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.index_dir, "vectors.f32")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, "vectors.json")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._synced_at)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._positions
+
+    def vectorize(self, title: str, abstract: str = "") -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        default_idf = math.log(self._fit_docs + 1) + 1
+        for feature, tf in _features(title, abstract).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign * (1 + math.log(tf)) * self._idf.get(feature, default_idf)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def vector(self, paper_id: str):
+        position = self._positions.get(paper_id)
+        return None if position is None else np.asarray(self._matrix[position])
+
+    def query(self, content: str, k: int = 10, exclude: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        return self.query_vectors(self.vectorize(content)[None, :], k, exclude)[0]
+
+    # Cosine top-k for a batch of unit query vectors in one matrix product
+    def query_vectors(self, queries: np.ndarray, k: int = 10, exclude: Sequence[str] = ()) -> List[List[Tuple[str, float]]]:
+        with self._lock:
+            matrix, ids = self._matrix, self.ids
+        if not len(ids):
+            return [[] for _ in range(len(queries))]
+        scores = queries.astype(np.float32) @ matrix.T
+        for paper_id in exclude:
+            if paper_id in self._positions:
+                scores[:, self._positions[paper_id]] = -np.inf
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates])]
+            results.append([(ids[i], float(row[i])) for i in ordered if np.isfinite(row[i])])
+        return results
+
+    def fit(self, rows: Sequence[Dict]):
+        df = Counter()
+        for row in rows:
+            df.update(_features(row.get("title") or "", row.get("abstract") or "").keys())
+        n = len(rows)
+        # Features seen in a single paper carry no similarity signal; skip them to keep the table small
+        self._idf = {f: math.log((n + 1) / (c + 1)) + 1 for f, c in df.items() if c > 1}
+        self._fit_docs = n
+
+    def build(self, rows: Sequence[Dict]):
+        with self._file_lock():
+            self._build(rows)
+
+    def _build(self, rows: Sequence[Dict]):
+        self.fit(rows)
+        ids = [row["id"] for row in rows]
+        matrix = np.stack([self.vectorize(r.get("title") or "", r.get("abstract") or "") for r in rows]) \
+            if rows else np.zeros((0, self.dim), dtype=np.float32)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._release_matrix()
+        tmp = self._vectors_path + ".tmp"
+        matrix.astype(np.float32).tofile(tmp)
+        os.replace(tmp, self._vectors_path)
+        self._write_meta(ids)
+        self._load()
+
+    def add_many(self, rows: Iterable[Dict]):
+        with self._file_lock():
+            self._load_if_changed()
+            rows = [r for r in rows if r["id"] not in self._positions]
+            if not rows:
+                return
+            if not self.ids or len(self.ids) + len(rows) > self._fit_docs * (1 + REFIT_GROWTH):
+                self._build(self._stored_rows() + rows)
+                return
+            vectors = np.stack([self.vectorize(r.get("title") or "", r.get("abstract") or "") for r in rows])
+            with open(self._vectors_path, "r+b") as f:
+                # Drop any tail left by an append that died before its metadata was written
+                f.truncate(len(self.ids) * self.dim * 4)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.astype(np.float32).tobytes())
+            self._write_meta(self.ids + [r["id"] for r in rows])
+            self._load()
+
+    def _stored_rows(self) -> List[Dict]:
+        if not self.ids:
+            return []
+        sql = text("SELECT id, title, abstract FROM papers WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+        rows = []
+        for i in range(0, len(self.ids), 500):
+            rows.extend(row._asdict() for row in db.session.execute(sql, {"ids": self.ids[i:i + 500]}))
+        return rows
+
+    def _write_meta(self, ids: List[str]):
+        meta = {"dim": self.dim, "fit_docs": self._fit_docs, "idf": self._idf, "ids": ids}
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path)
+
+    def _load_if_changed(self):
+        if os.path.exists(self._meta_path) and os.path.getmtime(self._meta_path) != self._meta_mtime:
+            self._load()
+
+    def _load(self):
+        with self._lock:
+            with open(self._meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dim"] != self.dim:
+                raise ValueError(f"Index at {self.index_dir} has dim {meta['dim']}, expected {self.dim}")
+            ids = meta["ids"]
+            # Memory-map the rows listed in the metadata; bytes past them belong to an append in progress
+            matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(ids), self.dim)) \
+                if ids else np.zeros((0, self.dim), dtype=np.float32)
+            self.ids = ids
+            self._positions = {paper_id: i for i, paper_id in enumerate(ids)}
+            self._idf = meta["idf"]
+            self._fit_docs = meta["fit_docs"]
+            self._matrix = matrix
+            self._meta_mtime = os.path.getmtime(self._meta_path)
+
+    def _release_matrix(self):
+        with self._lock:
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+
+    def _file_lock(self):
+        return _FileLock(os.path.join(self.index_dir, ".lock"), self._lock)
+
+    # Loads the on-disk index (building it on first run) and appends papers that
+    # were inserted since. Must be called inside an app context.
+    def ensure_loaded(self):
+        if self._synced_at and time.time() - self._synced_at < SYNC_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            if self._synced_at and time.time() - self._synced_at < SYNC_INTERVAL_SECONDS:
+                return
+            self._load_if_changed()
+            stored = [row[0] for row in db.session.execute(text("SELECT id FROM papers")).fetchall()]
+            missing = [paper_id for paper_id in stored if paper_id not in self._positions]
+            if missing:
+                sql = text("SELECT id, title, abstract FROM papers WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+                rows = []
+                for i in range(0, len(missing), 500):
+                    rows.extend(row._asdict() for row in db.session.execute(sql, {"ids": missing[i:i + 500]}))
+                self.add_many(rows)
+            self._synced_at = time.time()
+
+class _FileLock:
+    def __init__(self, path: str, thread_lock):
+        self.path = path
+        self.thread_lock = thread_lock
+        self._file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self.thread_lock.release()
+
+vector_index = VectorIndex()
+
+def recommend_papers(keywords: str, k: int = 10) -> List[Dict]:
+    vector_index.ensure_loaded()
+    hits = vector_index.query(keywords, k)
+    if not hits:
+        return []
+    sql = text("""
+        SELECT id, title, img_link, like_num, github_num, publish_time
+        FROM papers WHERE id IN :ids
+    """).bindparams(bindparam("ids", expanding=True))
+    rows = {row[0]: row._asdict() for row in db.session.execute(sql, {"ids": [h[0] for h in hits]}).fetchall()}
+    result = []
+    for paper_id, similarity in hits:
+        row = rows.get(paper_id)
+        if row is None or similarity <= 0:
+            continue
+        result.append({
+            "arxiv_id": paper_id,
+            "title": row["title"],
+            "suggest_score": round(similarity * 10, 1),
+            "img_link": row["img_link"],
+            "like_num": row["like_num"],
+            "github_num": row["github_num"],
+            "publish_time": row["publish_time"],
+        })
+    return result
@@ -0,0 +1,303 @@
+import os
+import math
+import time
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import text
+from .models import db
+from .recommender import vector_index, RECOMMEND_INDEX_DIR, SYNC_INTERVAL_SECONDS, _FileLock
+
+RELATED_K = int(os.environ.get("RELATED_K", "10"))
+RELATED_CANDIDATES = 50  # nearest vectors considered per paper
+AUTHOR_MAX_PAPERS = 200  # a name on more papers than this is too common to mean anything
+READER_MAX_PAPERS = 500  # very heavy readers add noise and quadratic work
+BUILD_CHUNK = 256
+WEIGHT_CONTENT, WEIGHT_AUTHORS, WEIGHT_CO_READ = 0.5, 0.3, 0.2
+CONTENT_REASON_MIN = 0.2
+REASON_CONTENT, REASON_AUTHORS, REASON_CO_READ = 1, 2, 4
+REASON_NAMES = ((REASON_AUTHORS, "authors"), (REASON_CONTENT, "content"), (REASON_CO_READ, "co_read"))
+
+def split_authors(authors: Optional[str]) -> List[str]:
+    return sorted({name.strip().lower() for name in (authors or "").split("|") if name.strip()})
+
+# Strings kept as one UTF-8 buffer plus offsets: a few bytes per entry instead
+# of a Python object each, and storable in an .npz without pickling
+def _pack(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(), offsets
+
+def _unpack(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+# Top-k related papers per paper, as a CSR adjacency list: the neighbours of
+# paper i are indices[indptr[i]:indptr[i + 1]], best first, with their scores
+# in `weights` and a bitmask of the signals that linked them in `reasons`.
+# Built offline by build_related.py; papers inserted later are linked in by add_many().
+class RelatedGraph:
+    def __init__(self, index_dir: str = RECOMMEND_INDEX_DIR, k: int = RELATED_K):
+        self.index_dir = index_dir
+        self.k = k
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._reasons = np.zeros(0, dtype=np.uint8)
+        self._authors: Optional[Dict[str, List[int]]] = None
+        self._author_counts: List[int] = []
+        self._mtime = 0.0
+        self._synced_at = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def _path(self) -> str:
+        return os.path.join(self.index_dir, "related.npz")
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._mtime)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._positions
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._indices)
+
+    def related(self, paper_id: str, k: Optional[int] = None) -> Optional[List[Dict]]:
+        with self._lock:
+            position = self._positions.get(paper_id)
+            if position is None:
+                return None
+            start, end = self._indptr[position], self._indptr[position + 1]
+            if k is not None:
+                end = min(end, start + k)
+            return [{
+                "arxiv_id": self.ids[j],
+                "title": self.titles[j],
+                "score": round(float(w), 4),
+                "reasons": [name for bit, name in REASON_NAMES if r & bit],
+            } for j, w, r in zip(self._indices[start:end].tolist(), self._weights[start:end], self._reasons[start:end])]
+
+    # Loads the graph written by build() or by another worker; cheap when unchanged
+    def ensure_loaded(self):
+        if self._synced_at and time.time() - self._synced_at < SYNC_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            if os.path.exists(self._path) and os.path.getmtime(self._path) != self._mtime:
+                self._load()
+            self._synced_at = time.time()
+
+    def _load(self):
+        with np.load(self._path, allow_pickle=False) as data:
+            ids = _unpack(data["id_blob"], data["id_offsets"])
+            titles = _unpack(data["title_blob"], data["title_offsets"])
+            indptr, indices = data["indptr"], data["indices"]
+            weights, reasons = data["weights"], data["reasons"]
+        with self._lock:
+            self.ids, self.titles = ids, titles
+            self._positions = {paper_id: i for i, paper_id in enumerate(ids)}
+            self._indptr, self._indices, self._weights, self._reasons = indptr, indices, weights, reasons
+            self._authors = None
+            self._mtime = os.path.getmtime(self._path)
+
+    def _save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        id_blob, id_offsets = _pack(self.ids)
+        title_blob, title_offsets = _pack(self.titles)
+        tmp = self._path + ".tmp.npz"
+        np.savez(tmp, id_blob=id_blob, id_offsets=id_offsets, title_blob=title_blob, title_offsets=title_offsets,
+                 indptr=self._indptr, indices=self._indices, weights=self._weights, reasons=self._reasons)
+        os.replace(tmp, self._path)
+        self._mtime = os.path.getmtime(self._path)
+
+    def _author_index(self, authors: Sequence[List[str]]) -> Dict[str, List[int]]:
+        index = defaultdict(list)
+        for position, names in enumerate(authors):
+            for name in names:
+                index[name].append(position)
+        return index
+
+    def _rank(self, position: int, vector, content: Dict[int, float], names: List[str],
+              co_read: Optional[Counter], readers: Counter) -> List[Tuple[int, float, int]]:
+        shared = Counter()
+        for name in names:
+            papers = self._authors.get(name, ())
+            if len(papers) <= AUTHOR_MAX_PAPERS:
+                shared.update(papers)
+        shared.pop(position, None)
+        candidates = set(content) | set(shared) | set(co_read or ())
+        candidates.discard(position)
+        edges = []
+        for j in candidates:
+            similarity = content.get(j)
+            if similarity is None and vector is not None:
+                other = vector_index.vector(self.ids[j])
+                similarity = float(vector @ other) if other is not None else 0.0
+            similarity = max(similarity or 0.0, 0.0)
+            authors = shared[j] / math.sqrt(len(names) * self._author_counts[j]) if shared[j] else 0.0
+            co = co_read[j] / math.sqrt(readers[position] * readers[j]) if co_read and co_read[j] else 0.0
+            score = WEIGHT_CONTENT * similarity + WEIGHT_AUTHORS * authors + WEIGHT_CO_READ * co
+            if score <= 0:
+                continue
+            reasons = (REASON_CONTENT if similarity >= CONTENT_REASON_MIN else 0) \
+                | (REASON_AUTHORS if authors else 0) | (REASON_CO_READ if co else 0)
+            edges.append((j, score, reasons))
+        edges.sort(key=lambda e: -e[1])
+        return edges[:self.k]
+
+    def _content_neighbours(self, paper_ids: Sequence[str], vectors: List) -> List[Dict[int, float]]:
+        present = [i for i, v in enumerate(vectors) if v is not None]
+        result = [{} for _ in paper_ids]
+        if not present:
+            return result
+        hits = vector_index.query_vectors(np.stack([vectors[i] for i in present]), RELATED_CANDIDATES + 1)
+        for i, row in zip(present, hits):
+            result[i] = {self._positions[h]: score for h, score in row
+                         if h != paper_ids[i] and h in self._positions}
+        return result
+
+    def _co_reads(self) -> Tuple[Dict[int, Counter], Counter]:
+        by_user = defaultdict(set)
+        for user_id, arxiv_id in db.session.execute(text("SELECT user_id, arxiv_id FROM history")):
+            position = self._positions.get(arxiv_id)
+            if position is not None:
+                by_user[user_id].add(position)
+        co_reads, readers = defaultdict(Counter), Counter()
+        for papers in by_user.values():
+            if len(papers) > READER_MAX_PAPERS:
+                continue
+            readers.update(papers)
+            for i in papers:
+                co_reads[i].update(papers)
+        for i, counts in co_reads.items():
+            counts.pop(i, None)
+        return co_reads, readers
+
+    # Full rebuild over every stored paper and the whole reading history. Must be
+    # called inside an app context; progress(done, total) is called per chunk.
+    def build(self, progress=None):
+        vector_index.ensure_loaded()
+        rows = db.session.execute(text("SELECT id, title, authors FROM papers ORDER BY id")).fetchall()
+        with _FileLock(os.path.join(self.index_dir, ".related.lock"), self._lock):
+            self.ids = [row.id for row in rows]
+            self.titles = [row.title or "" for row in rows]
+            self._positions = {paper_id: i for i, paper_id in enumerate(self.ids)}
+            names = [split_authors(row.authors) for row in rows]
+            self._authors = self._author_index(names)
+            self._author_counts = [len(n) for n in names]
+            co_reads, readers = self._co_reads()
+
+            adjacency = []
+            for start in range(0, len(self.ids), BUILD_CHUNK):
+                chunk = self.ids[start:start + BUILD_CHUNK]
+                vectors = [vector_index.vector(paper_id) for paper_id in chunk]
+                content = self._content_neighbours(chunk, vectors)
+                for offset in range(len(chunk)):
+                    i = start + offset
+                    adjacency.append(self._rank(i, vectors[offset], content[offset], names[i], co_reads.get(i), readers))
+                if progress:
+                    progress(min(start + BUILD_CHUNK, len(self.ids)), len(self.ids))
+            self._set_adjacency(adjacency)
+            self._save()
+
+    def _set_adjacency(self, adjacency: Sequence[List[Tuple[int, float, int]]]):
+        lengths = [len(edges) for edges in adjacency]
+        indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(lengths) if lengths else []
+        flat = [edge for edges in adjacency for edge in edges]
+        with self._lock:
+            self._indptr = indptr
+            self._indices = np.fromiter((e[0] for e in flat), dtype=np.int32, count=len(flat))
+            self._weights = np.fromiter((e[1] for e in flat), dtype=np.float32, count=len(flat))
+            self._reasons = np.fromiter((e[2] for e in flat), dtype=np.uint8, count=len(flat))
+
+    def _row(self, position: int) -> List[Tuple[int, float, int]]:
+        start, end = self._indptr[position], self._indptr[position + 1]
+        return list(zip(self._indices[start:end].tolist(), self._weights[start:end].tolist(),
+                        self._reasons[start:end].tolist()))
+
+    # Rebuilds the CSR arrays with the given rows replaced (or appended), copying
+    # the untouched runs between them as whole slices
+    def _splice(self, changed: Dict[int, List[Tuple[int, float, int]]]):
+        old_n = len(self._indptr) - 1
+        lengths = np.zeros(len(self.ids), dtype=np.int64)
+        lengths[:old_n] = np.diff(self._indptr)
+        parts, previous = [], 0
+        for position in sorted(changed):
+            end = min(position, old_n)
+            if previous < end:
+                s, e = self._indptr[previous], self._indptr[end]
+                parts.append((self._indices[s:e], self._weights[s:e], self._reasons[s:e]))
+            edges = changed[position]
+            parts.append((np.array([e[0] for e in edges], dtype=np.int32), np.array([e[1] for e in edges], dtype=np.float32),
+                          np.array([e[2] for e in edges], dtype=np.uint8)))
+            lengths[position] = len(edges)
+            previous = position + 1
+        if previous < old_n:
+            s, e = self._indptr[previous], self._indptr[old_n]
+            parts.append((self._indices[s:e], self._weights[s:e], self._reasons[s:e]))
+        indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(lengths)
+        with self._lock:
+            self._indptr = indptr
+            self._indices = np.concatenate([p[0] for p in parts]) if parts else np.zeros(0, dtype=np.int32)
+            self._weights = np.concatenate([p[1] for p in parts]) if parts else np.zeros(0, dtype=np.float32)
+            self._reasons = np.concatenate([p[2] for p in parts]) if parts else np.zeros(0, dtype=np.uint8)
+
+    # Links newly inserted papers into the graph: each gets its own top-k, and
+    # existing papers whose lists they beat get them added. Co-reads only come
+    # from the next full build. Rows need id, title, abstract and authors.
+    def add_many(self, rows: Iterable[Dict]):
+        with _FileLock(os.path.join(self.index_dir, ".related.lock"), self._lock):
+            if os.path.exists(self._path) and os.path.getmtime(self._path) != self._mtime:
+                self._load()
+            rows = [r for r in rows if r["id"] not in self._positions]
+            if not rows:
+                return
+            vector_index.ensure_loaded()
+            if self._authors is None:
+                stored = {row.id: row.authors for row in db.session.execute(text("SELECT id, authors FROM papers"))}
+                names = [split_authors(stored.get(paper_id)) for paper_id in self.ids]
+                self._authors = self._author_index(names)
+                self._author_counts = [len(n) for n in names]
+
+            first = len(self.ids)
+            new_ids = [r["id"] for r in rows]
+            self.ids = self.ids + new_ids
+            self.titles = self.titles + [r.get("title") or "" for r in rows]
+            for offset, row in enumerate(rows):
+                names = split_authors(row.get("authors"))
+                self._positions[row["id"]] = first + offset
+                self._author_counts.append(len(names))
+                for name in names:
+                    self._authors[name].append(first + offset)
+
+            vectors = [vector_index.vectorize(r.get("title") or "", r.get("abstract") or "") for r in rows]
+            content = self._content_neighbours(new_ids, vectors)
+            changed = {}
+            for offset, row in enumerate(rows):
+                changed[first + offset] = self._rank(first + offset, vectors[offset], content[offset],
+                                                     split_authors(row.get("authors")), None, Counter())
+            # Scores are symmetric, so an edge i -> j also belongs in j's list if it beats j's weakest
+            for i in range(first, len(self.ids)):
+                for j, score, reasons in changed[i]:
+                    if j >= first:
+                        continue
+                    current = changed[j] if j in changed else self._row(j)
+                    if len(current) < self.k or score > current[-1][1]:
+                        changed[j] = sorted(current + [(i, score, reasons)], key=lambda e: -e[1])[:self.k]
+            self._splice(changed)
+            self._save()
+
+related_graph = RelatedGraph()
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from .models import db, CacheVersion
+from .search import tokenize
+from .analysis_cache import SingleFlight
+
+RECOMMEND_CACHE_BACKEND = os.environ.get("RECOMMEND_CACHE_BACKEND", "memory")
+RECOMMEND_CACHE_FRESH_SECONDS = int(os.environ.get("RECOMMEND_CACHE_FRESH_SECONDS", "600"))
+RECOMMEND_CACHE_TTL_SECONDS = int(os.environ.get("RECOMMEND_CACHE_TTL_SECONDS", "86400"))
+RECOMMEND_CACHE_MAX_ENTRIES = int(os.environ.get("RECOMMEND_CACHE_MAX_ENTRIES", "5000"))
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+REFRESH_WORKERS = 2
+
+# "AI image generation" and "ai  image-generation" share a key. Word order is
+# dropped too: both the vector index and the keyword shortlist are bag-of-words.
+def normalize_keywords(keywords: str) -> str:
+    tokens = tokenize(keywords)
+    return " ".join(sorted(tokens)) if tokens else " ".join((keywords or "").lower().split())
+
+# Entries are per process, but the corpus version lives in the database, so an
+# insert by any process (another worker, backfill.py, sync.py) invalidates
+# every worker's entries. Needs an app context.
+class MemoryBackend:
+    name = "memory"
+    VERSION_NAME = "recommend:corpus_version"
+
+    def __init__(self, max_entries: int = RECOMMEND_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict, ttl: int):
+        with self._lock:
+            self._entries[key] = (entry, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def version(self) -> int:
+        with db.engine.connect() as conn:
+            return conn.execute(select(CacheVersion.version).where(CacheVersion.name == self.VERSION_NAME)).scalar() or 0
+
+    def bump_version(self) -> int:
+        bump = update(CacheVersion).where(CacheVersion.name == self.VERSION_NAME).values(version=CacheVersion.version + 1)
+        try:
+            with db.engine.begin() as conn:
+                if not conn.execute(bump).rowcount:
+                    conn.execute(insert(CacheVersion).values(name=self.VERSION_NAME, version=1))
+        except IntegrityError:
+            # Another process created the row first
+            with db.engine.begin() as conn:
+                conn.execute(bump)
+        return self.version()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+# Entries as well as the corpus version are shared across workers and processes,
+# so a result computed by one worker serves them all. LRU is Redis's own
+# maxmemory-policy.
+class RedisBackend:
+    name = "redis"
+    VERSION_KEY = "recommend:corpus_version"
+
+    def __init__(self, url: str = REDIS_URL):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        raw = self.client.get(f"recommend:{key}")
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, entry: Dict, ttl: int):
+        self.client.set(f"recommend:{key}", json.dumps(entry, ensure_ascii=False), ex=ttl)
+
+    def version(self) -> int:
+        return int(self.client.get(self.VERSION_KEY) or 0)
+
+    def bump_version(self) -> int:
+        return int(self.client.incr(self.VERSION_KEY))
+
+    def size(self) -> int:
+        return self.client.dbsize()
+
+BACKENDS = {"memory": MemoryBackend, "redis": RedisBackend}
+
+# Entries are fresh for `fresh_seconds` and while the corpus version is unchanged.
+# After that they are still served, but the first caller schedules a background
+# refresh, so popular queries never wait on the LLM once cached.
+class RecommendationCache:
+    def __init__(self, backend=None, fresh_seconds: int = RECOMMEND_CACHE_FRESH_SECONDS,
+                 ttl_seconds: int = RECOMMEND_CACHE_TTL_SECONDS):
+        self._backend = backend
+        self.fresh_seconds = fresh_seconds
+        self.ttl_seconds = ttl_seconds
+        self.flight = SingleFlight()
+        self._refreshing = set()
+        self._pool = None
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = BACKENDS[RECOMMEND_CACHE_BACKEND]()
+        return self._backend
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        stats["backend"] = self.backend.name
+        stats["evictions"] = self.backend.evictions
+        try:
+            stats["entries"] = self.backend.size()
+            stats["corpus_version"] = self.backend.version()
+        except Exception as e:
+            stats["entries"] = stats["corpus_version"] = None
+            print(f"[DEBUG] Recommendation cache unavailable: {e}")
+        return stats
+
+    # Called by the spider whenever new papers are inserted
+    def bump_version(self):
+        try:
+            self.backend.bump_version()
+        except Exception as e:
+            self._count("errors")
+            print(f"[DEBUG] Recommendation cache version bump failed: {e}")
+
+    def _store(self, key: str, version: int, result):
+        try:
+            self.backend.set(key, {"result": result, "version": version, "stored_at": time.time()}, self.ttl_seconds)
+        except Exception as e:
+            self._count("errors")
+            print(f"[DEBUG] Recommendation cache write failed: {e}")
+
+    def _refresh(self, app, key: str, compute: Callable):
+        try:
+            with app.app_context():
+                version = self.backend.version()
+                self._store(key, version, compute())
+            self._count("refreshes")
+        except Exception as e:
+            self._count("refresh_errors")
+            print(f"[DEBUG] Recommendation refresh failed for {key!r}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key: str, compute: Callable):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="recommend-refresh")
+        self._pool.submit(self._refresh, current_app._get_current_object(), key, compute)
+
+    # `variant` separates result shapes for the same keywords (e.g. reranked or not).
+    # Must be called inside an app context.
+    def get_or_compute(self, keywords: str, variant: str, compute: Callable):
+        key = f"{variant}:{normalize_keywords(keywords)}"
+        try:
+            version = self.backend.version()
+            entry = self.backend.get(key)
+        except Exception as e:
+            # A cache outage degrades to uncached answers rather than errors
+            self._count("errors")
+            print(f"[DEBUG] Recommendation cache read failed: {e}")
+            return compute()
+        if entry is not None:
+            fresh = entry["version"] == version and time.time() - entry["stored_at"] < self.fresh_seconds
+            self._count("hits" if fresh else "stale_hits")
+            if not fresh:
+                self._schedule_refresh(key, compute)
+            return entry["result"]
+
+        self._count("misses")
+
+        def fill():
+            result = compute()
+            self._store(key, version, result)
+            return result
+
+        result, _ = self.flight.do(key, fill)
+        return result
+
+recommend_cache = RecommendationCache()
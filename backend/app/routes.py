@@ -1,97 +1,134 @@
-from flask import Blueprint, request, jsonify, send_from_directory
+import os
+import json
+from itertools import chain
+from flask import Blueprint, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_jwt_extended import jwt_required
-from .spider import monthly_spider, daily_spider, download_arxiv_pdf, extract_text_from_pdf
-from .analysis import content_analysis, keyword_suggest
-from .models import db, Paper, History, User
-from sqlalchemy import text
+from .spider import monthly_spider, daily_spider, arxiv_metadata, download_arxiv_pdf, clean_arxiv_id, ARXIV_PDF_DIR
+from .pdf_extract import analysis_context
+from .analysis import content_analysis, content_analysis_stream, parse_content_analysis, keyword_suggest, CONTENT_PROMPT_VERSION
+from .analysis_cache import analysis_cache, file_sha256
+from .llm import gateway, LLMError
+from .structured import parse_stats, StructuredOutputError
+from .models import History
+from .auth import current_user_id
+from .history import history_writer
+from .jobs import job_queue
+from .search import search_papers
+from .recommender import recommend_papers
+from .related import related_graph
+from .summaries import get_summary, summarize_papers
+from .result_cache import recommend_cache
+from .query import QueryError, query_page, export_rows
 from sqlalchemy.exc import SQLAlchemyError
-from flask_jwt_extended import get_jwt_identity
 from datetime import datetime
 
 api_bp = Blueprint('api', __name__)
 
+RERANK_POOL_SIZE = 30
+
 @api_bp.route('/collect/monthly', methods=['POST'])
 @jwt_required()
 def collect_monthly():
     data = request.json
     year, month = data['year'], data['month']
-    result = monthly_spider(year, month)
-    return jsonify(result)
+    job = job_queue.submit(('monthly', year, month), 'monthly', monthly_spider, year, month)
+    return jsonify(job.to_dict()), 202
 
 @api_bp.route('/collect/daily', methods=['POST'])
 @jwt_required()
 def collect_daily():
     data = request.json
     year, month, day = data['year'], data['month'], data['day']
-    result = daily_spider(year, month, day)
-    return jsonify(result)
+    job = job_queue.submit(('daily', year, month, day), 'daily', daily_spider, year, month, day,
+                           incremental=bool(data.get('incremental', False)))
+    return jsonify(job.to_dict()), 202
+
+# Pre-summarizes a month's papers ({"year", "month"}) or a list ({"arxiv_ids": [...]});
+# add "force": true to redo papers that already have a summary
+@api_bp.route('/summaries/batch', methods=['POST'])
+@jwt_required()
+def summarize_batch():
+    data = request.json or {}
+    force = bool(data.get('force', False))
+    if data.get('arxiv_ids'):
+        arxiv_ids = [str(arxiv_id) for arxiv_id in data['arxiv_ids']]
+        job = job_queue.submit(('summaries',) + tuple(sorted(arxiv_ids)), 'summaries', summarize_papers,
+                               arxiv_ids=arxiv_ids, force=force)
+    elif data.get('year') and data.get('month'):
+        year, month = int(data['year']), int(data['month'])
+        job = job_queue.submit(('summaries', year, month), 'summaries', summarize_papers, year=year, month=month, force=force)
+    else:
+        return jsonify({'error': 'Provide "year" and "month" or "arxiv_ids"'}), 400
+    return jsonify(job.to_dict()), 202
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
 
 @api_bp.route('/query', methods=['POST'])
 @jwt_required()
 def query_papers():
+    data = request.json or {}
+    fmt = data.get('format', 'json')
     try:
-        data = request.json or {}
-        fields = data.get('fields', ['id'])
-        if not fields:
-            fields = ['id']
-        limit = min(data.get('limit', 100), 100)
-        where_clause = data.get('where', {})
-        
-        select_fields = ', '.join(fields)
-        query_str = f"SELECT {select_fields} FROM papers"
-        params = {'limit': limit}
-        
-        if where_clause:
-            conditions = ' AND '.join([f"{k}=:{k}" for k in where_clause.keys()])  # Use :param named
-            query_str += f" WHERE {conditions}"
-            params.update(where_clause) 
-        
-        query_str += " LIMIT :limit"
-        query = text(query_str)
-        result = db.session.execute(query, params).fetchall()
-        rows = []
-        for row in result:
-            row_dict = dict(row._asdict())
-            rows.append(row_dict)
-        return jsonify(rows)
+        if fmt in ('ndjson', 'csv'):
+            rows = export_rows(data, fmt)
+            first = next(rows, '')  # surface query errors before the response starts
+            mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/csv'
+            body = stream_with_context(chain([first], rows))
+            return Response(body, mimetype=mimetype, headers={
+                'Content-Disposition': f'attachment; filename=papers.{fmt}',
+            })
+        return jsonify(query_page(data))
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
     except SQLAlchemyError as e:
         return jsonify({'error': f'DB Error: {str(e)}'}), 500
     except Exception as e:
         return jsonify({'error': f'Server Error: {str(e)}'}), 500
 
+def analyze_pdf(pdf_path: str):
+    content = analysis_context(pdf_path)
+    if not content:
+        return None
+    return content_analysis(content)
+
+# Buffered; the history writer looks up the paper and stores the row in batches
+def record_history(user_id: int, arxiv_id: str):
+    history_writer.record(user_id, arxiv_id, datetime.utcnow())
+
 @api_bp.route('/assist/read', methods=['POST'])
 @jwt_required()
 def assist_read():
     data = request.json
     arxiv_id = data['arxiv_id']
-    current_user = get_jwt_identity()  # Get current username
-    user = User.query.filter_by(username=current_user).first()
+    user_id = current_user_id()
+
+    summary = get_summary(clean_arxiv_id(arxiv_id))
+    if summary is not None:
+        # Precomputed by the batch pipeline: no download, extraction or LLM call
+        record_history(user_id, arxiv_id)
+        return jsonify({
+            'pdf_url': summary['download_info']['pdf_url'],
+            'analysis': summary['analysis'],
+            'download_info': summary['download_info']
+        })
 
     download_info = download_arxiv_pdf(arxiv_id)
     if 'error' in download_info:
         return jsonify(download_info), 400
     pdf_path = download_info['pdf_path']
     if pdf_path:
-        text = extract_text_from_pdf(pdf_path, 0, 10)
-        if text:
-            analysis = content_analysis(text)
-            from sqlalchemy import text
-            sql = text("SELECT title, like_num, github_num, img_link FROM papers WHERE id = :arxiv_id")
-            result = db.session.execute(sql, {"arxiv_id": arxiv_id}).first()
-            if result:
-                title, like_num, github_num, img_link = result
-                history = History(
-                    user_id=user.id,
-                    arxiv_id=arxiv_id,
-                    title=title,
-                    like_num=like_num or 0,
-                    github_num=github_num,
-                    img_link=img_link,
-                    access_time=datetime.utcnow()
-                )
-                db.session.add(history)
-                db.session.commit()
-
+        analysis = analysis_cache.get_or_compute(
+            download_info['arxiv_id'], pdf_path, CONTENT_PROMPT_VERSION,
+            lambda: analyze_pdf(pdf_path)
+        )
+        if analysis is not None:
+            record_history(user_id, arxiv_id)
             return jsonify({
                 'pdf_url': download_info['pdf_url'],
                 'analysis': analysis,
@@ -99,26 +136,158 @@ def assist_read():
             })
     return jsonify({'error': 'Extraction failed'}), 400
 
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Yields the extraction and token events for one PDF and returns the parsed
+# analysis, or None after yielding an error event
+def stream_analysis(pdf_path: str):
+    content = analysis_context(pdf_path)
+    if not content:
+        yield sse_event('error', {'error': 'Extraction failed'})
+        return None
+    yield sse_event('extracted', {'chars': len(content)})
+    chunks = []
+    try:
+        for token in content_analysis_stream(content):
+            chunks.append(token)
+            yield sse_event('token', {'text': token})
+        return parse_content_analysis(''.join(chunks))
+    except LLMError as e:
+        # The model is unreachable: re-prompting it would only fail again
+        print(f"[DEBUG] Streaming analysis failed: {e}")
+        yield sse_event('error', {'error': f'Analysis failed: {e}'})
+        return None
+    except StructuredOutputError as e:
+        print(f"[DEBUG] Unusable streamed analysis: {e}")
+        # Fall back to the blocking path, which re-prompts on a schema failure
+        parse_stats.count("reprompts")
+        return content_analysis(content)
+
+@api_bp.route('/assist/read/stream', methods=['POST'])
+@jwt_required()
+def assist_read_stream():
+    data = request.json
+    arxiv_id = data['arxiv_id']
+    user_id = current_user_id()
+
+    def generate():
+        summary = get_summary(clean_arxiv_id(arxiv_id))
+        if summary is not None:
+            download_info = summary['download_info']
+            yield sse_event('metadata', {key: download_info[key] for key in ('arxiv_id', 'title', 'authors', 'published')})
+            # The PDF itself may have been cleaned up since; the client loads it from pdf_url
+            yield sse_event('pdf_ready', {'pdf_url': download_info['pdf_url'], 'filename': f"{download_info['arxiv_id']}.pdf"})
+            yield sse_event('analysis', summary['analysis'])
+            record_history(user_id, arxiv_id)
+            yield sse_event('done', {'download_info': download_info})
+            return
+        # Metadata goes out before the PDF download, so the title shows right away
+        metadata = arxiv_metadata(arxiv_id)
+        if metadata is None:
+            yield sse_event('error', {'error': f'arXiv ID {arxiv_id} not found or invalid'})
+            return
+        yield sse_event('metadata', {key: metadata[key] for key in ('arxiv_id', 'title', 'authors', 'published')})
+        download_info = download_arxiv_pdf(arxiv_id, metadata=metadata)
+        if 'error' in download_info:
+            yield sse_event('error', download_info)
+            return
+        pdf_path = download_info['pdf_path']
+        if not pdf_path:
+            yield sse_event('error', {'error': 'Download failed'})
+            return
+        yield sse_event('pdf_ready', {'pdf_url': download_info['pdf_url'], 'filename': os.path.basename(pdf_path)})
+
+        # Shares the blocking endpoint's single-flight: one GLM completion per PDF,
+        # however many readers open it at once
+        analysis, done = analysis_cache.claim(download_info['arxiv_id'], file_sha256(pdf_path), CONTENT_PROMPT_VERSION)
+        if done is not None:
+            try:
+                analysis = yield from stream_analysis(pdf_path)
+            finally:
+                done(analysis)
+            if analysis is None:
+                return
+        elif analysis is None:
+            yield sse_event('error', {'error': 'Analysis failed'})
+            return
+        yield sse_event('analysis', analysis)
+        record_history(user_id, arxiv_id)
+        yield sse_event('done', {'download_info': download_info})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
 @api_bp.route('/recommend', methods=['POST'])
 @jwt_required()
 def recommend():
     data = request.json
     keywords = data['keywords']
-    result = keyword_suggest(keywords)
-    print(result)
+    rerank = bool(data.get('rerank', False))
+
+    def compute():
+        result = recommend_papers(keywords, RERANK_POOL_SIZE if rerank else 10)
+        if rerank and result:
+            # The model only re-orders the locally retrieved candidates
+            result = keyword_suggest(keywords, candidates=result) or result[:10]
+        return result
+
+    try:
+        result = recommend_cache.get_or_compute(keywords, 'rerank' if rerank else 'vector', compute)
+    except SQLAlchemyError as e:
+        return jsonify({'error': f'DB Error: {str(e)}'}), 500
     return jsonify(result)
 
+@api_bp.route('/papers/<arxiv_id>/related', methods=['GET'])
+@jwt_required()
+def related_papers(arxiv_id):
+    related_graph.ensure_loaded()
+    if not related_graph.loaded:
+        return jsonify({'error': 'Related-papers graph has not been built; run build_related.py'}), 503
+    result = related_graph.related(arxiv_id, request.args.get('k', type=int))
+    if result is None:
+        return jsonify({'error': 'Paper not found'}), 404
+    return jsonify({'arxiv_id': arxiv_id, 'related': result})
+
+@api_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing query parameter q'}), 400
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    try:
+        return jsonify(search_papers(query, limit, offset))
+    except SQLAlchemyError as e:
+        return jsonify({'error': f'DB Error: {str(e)}'}), 500
+
+@api_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def cache_stats():
+    return jsonify({
+        'analysis': analysis_cache.stats(),
+        'recommend': recommend_cache.stats(),
+        'llm': gateway.stats(),
+        'parser': parse_stats.stats(),
+        'history': history_writer.stats(),
+    })
+
 @api_bp.route('/pdf/<path:filename>')
 def serve_pdf(filename):
-    return send_from_directory('./arxiv_pdfs', filename)
+    return send_from_directory(os.path.abspath(ARXIV_PDF_DIR), filename)
 
 @api_bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_history():
-    current_user = get_jwt_identity()
-    user = User.query.filter_by(username=current_user).first()
-    
-    histories = History.query.filter_by(user_id=user.id)\
+    user_id = current_user_id()
+    if history_writer.has_pending(user_id):
+        # Let the user see the paper they just read
+        history_writer.flush()
+
+    histories = History.query.filter_by(user_id=user_id)\
         .order_by(History.access_time.desc())\
         .limit(50)\
         .all()
@@ -0,0 +1,30 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import update
+from .models import db, Paper
+from .normalize import typed_fields
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Fills the typed paper columns for rows stored before they existed. Rows
+# ingested since are typed on the way in, so this only runs once per database,
+# after `flask db upgrade` has added the columns.
+def backfill_typed_fields() -> int:
+    updated = 0
+    while True:
+        rows = db.session.query(Paper.id, Paper.publish_time, Paper.year, Paper.month, Paper.like_num,
+                                Paper.author_num, Paper.github_num, Paper.comment_num)\
+            .filter(Paper.trending_score.is_(None)).limit(BACKFILL_BATCH_SIZE).all()
+        if not rows:
+            return updated
+        db.session.execute(update(Paper), [
+            dict(typed_fields(row._asdict(), row.year, row.month), id=row.id) for row in rows
+        ])
+        db.session.commit()
+        updated += len(rows)
+
+@click.command("backfill-typed-fields")
+@with_appcontext
+def backfill_typed_fields_command():
+    """Fill the typed paper columns of rows stored before they existed."""
+    click.echo(f"{backfill_typed_fields()} papers updated")
@@ -0,0 +1,127 @@
+import re
+import math
+import time
+import heapq
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import text, bindparam
+from .models import db
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "that", "the", "their", "this", "to", "via", "we", "with",
+}
+TITLE_WEIGHT = 3.0
+ABSTRACT_WEIGHT = 1.0
+SYNC_INTERVAL_SECONDS = 60
+
+def tokenize(content: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall((content or "").lower()) if t not in STOPWORDS]
+
+# BM25 over title + abstract, with title terms counted TITLE_WEIGHT times.
+# Postings are kept per term so updates touch only the terms of one paper.
+class SearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._total_len = 0.0
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._synced_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: str, title: str, abstract: str):
+        tf = Counter()
+        for term in tokenize(title):
+            tf[term] += TITLE_WEIGHT
+        for term in tokenize(abstract):
+            tf[term] += ABSTRACT_WEIGHT
+        with self._lock:
+            self._remove(doc_id)
+            for term, weight in tf.items():
+                self._postings.setdefault(term, {})[doc_id] = weight
+            self._doc_terms[doc_id] = tuple(tf)
+            self._doc_len[doc_id] = sum(tf.values())
+            self._total_len += self._doc_len[doc_id]
+
+    def add_many(self, rows: Iterable[Dict]):
+        for row in rows:
+            self.add(row["id"], row.get("title") or "", row.get("abstract") or "")
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id, 0.0)
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        terms = set(tokenize(query))
+        scores: Dict[str, float] = {}
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs or not terms:
+                return []
+            avg_len = self._total_len / n_docs
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    # Loads the corpus on first use, then periodically picks up rows that other
+    # processes inserted. Must be called inside an app context.
+    def ensure_loaded(self):
+        if self._loaded and time.time() - self._synced_at < SYNC_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            if self._loaded and time.time() - self._synced_at < SYNC_INTERVAL_SECONDS:
+                return
+            stored_ids = {row[0] for row in db.session.execute(text("SELECT id FROM papers")).fetchall()}
+            missing = stored_ids - self._doc_len.keys()
+            for doc_id in self._doc_len.keys() - stored_ids:
+                self._remove(doc_id)
+            if missing:
+                sql = text("SELECT id, title, abstract FROM papers WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+                missing = list(missing)
+                for i in range(0, len(missing), 500):
+                    result = db.session.execute(sql, {"ids": missing[i:i + 500]})
+                    self.add_many(row._asdict() for row in result)
+            self._loaded = True
+            self._synced_at = time.time()
+
+search_index = SearchIndex()
+
+def search_papers(query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+    search_index.ensure_loaded()
+    hits = search_index.search(query, limit + offset)[offset:]
+    if not hits:
+        return []
+    sql = text("""
+        SELECT id, title, img_link, like_num, github_num, publish_time, year, month
+        FROM papers WHERE id IN :ids
+    """).bindparams(bindparam("ids", expanding=True))
+    rows = {row[0]: row._asdict() for row in db.session.execute(sql, {"ids": [h[0] for h in hits]}).fetchall()}
+    result = []
+    for doc_id, score in hits:
+        if doc_id in rows:
+            rows[doc_id]["score"] = round(score, 4)
+            result.append(rows[doc_id])
+    return result
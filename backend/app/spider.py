@@ -1,12 +1,36 @@
 import os
+import json
+import time
+import uuid
+import random
+import threading
 import arxiv
-import fitz
 from tqdm import tqdm
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from parsel import Selector
+from requests.adapters import HTTPAdapter
 from datetime import datetime
-from .models import db, Paper
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+from .models import db, Paper, PageValidator
+from .search import search_index
+from .recommender import vector_index
+from .related import related_graph
+from .result_cache import recommend_cache
+from .instrumentation import span, timed
+from .pdf_extract import extract_document
+from .normalize import typed_fields
+from . import hf_parser
+
+HF_BASE_URL = os.environ.get("HF_BASE_URL", "https://huggingface.co").rstrip("/")
+SPIDER_CONCURRENCY = int(os.environ.get("SPIDER_CONCURRENCY", "8"))
+SPIDER_RATE_LIMIT = float(os.environ.get("SPIDER_RATE_LIMIT", "5"))  # requests per second per host, 0 disables
+SPIDER_MAX_RETRIES = int(os.environ.get("SPIDER_MAX_RETRIES", "3"))
+SPIDER_BACKOFF = float(os.environ.get("SPIDER_BACKOFF", "0.5"))
+SPIDER_TIMEOUT = float(os.environ.get("SPIDER_TIMEOUT", "30"))
+RETRY_STATUS = {429, 500, 502, 503, 504}
 
 headers = {
     "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
@@ -16,144 +40,410 @@ headers = {
     "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36"
 }
 
+# Spaces out requests to the same host so that at most `rate` start per second
+class HostRateLimiter:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        if self.rate <= 0:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+_session = None
+_session_lock = threading.Lock()
+rate_limiter = HostRateLimiter(SPIDER_RATE_LIMIT)
+
+def get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(SPIDER_CONCURRENCY, 1))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(headers)
+            _session = session
+    return _session
+
+@timed("spider_fetch")
+def fetch_response(url: str, max_retries: int = SPIDER_MAX_RETRIES, extra_headers: Optional[Dict] = None) -> requests.Response:
+    for attempt in range(max_retries + 1):
+        rate_limiter.wait(url)
+        try:
+            response = get_session().get(url, headers=extra_headers, timeout=SPIDER_TIMEOUT)
+            if response.status_code not in RETRY_STATUS:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            error = requests.HTTPError(f"{response.status_code} for {url}", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            retry_after = ""
+            error = e
+        if attempt == max_retries:
+            raise error
+        delay = float(retry_after) if retry_after.isdigit() else SPIDER_BACKOFF * (2 ** attempt)
+        time.sleep(delay + random.uniform(0, SPIDER_BACKOFF))
+
+def fetch_html(url: str, max_retries: int = SPIDER_MAX_RETRIES) -> str:
+    return fetch_response(url, max_retries).text
+
+# Conditional GET. Returns (None, validators) on 304 Not Modified, otherwise the
+# page and the validators to send next time; either may be absent.
+def fetch_if_changed(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Tuple[Optional[str], Dict]:
+    conditions = {}
+    if etag:
+        conditions["If-None-Match"] = etag
+    if last_modified:
+        conditions["If-Modified-Since"] = last_modified
+    response = fetch_response(url, extra_headers=conditions or None)
+    if response.status_code == 304:
+        return None, {
+            "etag": response.headers.get("ETag") or etag,
+            "last_modified": response.headers.get("Last-Modified") or last_modified,
+        }
+    # A block or error page would parse as an empty listing and be reported as a success
+    response.raise_for_status()
+    return response.text, {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
 def get_paper_detail(link: str):
-    content_html = requests.get(link, headers=headers).text
-    response = Selector(content_html)
-    authors = '|'.join([data.strip() for data in response.xpath('//div[@class="relative flex flex-wrap items-center gap-2 text-base leading-tight"]//button/text()').extract()])
-    abstract = ''.join(response.xpath('//p[@class="text-gray-600"]//text()').extract())
-    publish_time = ' '.join(response.xpath('//div[contains(text(), "Published")]//text()').extract())
-    return {"authors": authors, "abstract": abstract, 'publish_time': publish_time}
-
-def parsel_html(content_html: str) -> List[Dict]:
-    response = Selector(content_html)
-    result = []
-    for data in response.xpath('//article[@class="relative flex flex-col overflow-hidden rounded-xl border"]'):
+    response = fetch_response(link)
+    # An error page would parse as a paper with no authors or abstract
+    response.raise_for_status()
+    with span("parse"):
+        return hf_parser.parse_detail(response.text)
+
+# Details come back in link order; a page that could not be fetched yields None
+def fetch_details(links: List[str], max_workers: Optional[int] = None, progress=None) -> List[Optional[Dict]]:
+    def safe_detail(link: str) -> Optional[Dict]:
         try:
-            like_num = int(''.join(data.xpath('.//div[@class="leading-none"]/text()').extract())) if data.xpath('.//div[@class="leading-none"]/text()').extract() else 0
-        except:
-            like_num = 0
-        author_num = ''.join(data.xpath('.//div[contains(@class, "flex truncate text-sm")]/text()').extract()).strip()
-        github_num = ''.join(data.xpath('.//a[contains(@class, "flex translate-y-px items-center")]/span/text()').extract()).strip()
-        comment_num = int(''.join(data.xpath('.//a[@slot="anchor"]/text()').extract()).strip()) if data.xpath('.//a[@slot="anchor"]/text()').extract() else 0
-        link = "https://huggingface.co" + data.xpath('.//h3/a/@href').extract_first().strip()
-        img_link = ''.join(data.xpath('./a/img/@src').extract())
-        title = ''.join(data.xpath('.//h3/a/text()').extract()).strip().replace('\n', '').replace('\t', '')
-        info_dict = get_paper_detail(link)
-        save_dict = {
-            "id": link.split('/')[-1],
-            "link": link.replace('//', '/'),
-            "title": title,
-            "like_num": like_num,
-            "img_link": img_link,
+            detail = get_paper_detail(link)
+            if progress:
+                progress.advance(pages=1)
+            return detail
+        except requests.RequestException as e:
+            print(f"[DEBUG] Detail fetch failed for {link}: {e}")
+            if progress:
+                progress.advance(pages=1, error=f"{link}: {e}")
+            return None
+
+    max_workers = max_workers or SPIDER_CONCURRENCY
+    if max_workers <= 1 or len(links) <= 1:
+        return [safe_detail(link) for link in links]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # map() yields in submission order, so details line up with the listing
+        return list(pool.map(safe_detail, links))
+
+@timed("parse")
+def parse_listing(content_html: str) -> List[Dict]:
+    return hf_parser.parse_listing(content_html, HF_BASE_URL)
+
+# With incremental=True, papers already stored keep only their listing fields:
+# abstract and authors never change, and upsert_papers refreshes just the counters.
+# Also returns the ids left out because their detail page could not be fetched.
+def _listing_items(content_html: str, max_workers: Optional[int] = None, progress=None,
+                   incremental: bool = False) -> Tuple[List[Dict], set]:
+    result = parse_listing(content_html)
+    known = set()
+    if incremental:
+        stored = stored_papers([item["id"] for item in result])
+        # A row stored without its abstract still needs its detail page
+        known = {paper_id for paper_id, row in stored.items() if row.abstract}
+    # Items built from the page's embedded JSON already carry their details
+    pending = [item for item in result if "abstract" not in item and item["id"] not in known]
+    if progress:
+        progress.advance(total=len(pending))
+    details = fetch_details([item["detail_url"] for item in pending], max_workers, progress)
+    failed = set()
+    for item, info_dict in zip(pending, details):
+        if info_dict is None:
+            # Left out rather than stored blank; the next crawl picks it up again
+            failed.add(item["id"])
+            continue
+        item.update({
             "publish_time": info_dict['publish_time'],
-            "author_num": author_num,
-            "github_num": github_num,
-            "comment_num": comment_num,
             "authors": info_dict['authors'],
             "abstract": info_dict['abstract']
-        }
-        result.append(save_dict)
-    return result
+        })
+    for item in result:
+        del item["detail_url"]
+    return [item for item in result if item["id"] not in failed], failed
+
+def parsel_html(content_html: str, max_workers: Optional[int] = None, progress=None, incremental: bool = False) -> List[Dict]:
+    return _listing_items(content_html, max_workers, progress, incremental)[0]
+
+UPSERT_CHUNK_SIZE = 500
+COUNTER_FIELDS = ("like_num", "github_num", "comment_num")
+DETAIL_FIELDS = ("authors", "abstract", "publish_time")
+TYPED_FIELDS = ("github_stars", "trending_score")
+
+def _paper_row(item: Dict, year: int, month: int) -> Dict:
+    row = {
+        "id": item['id'],
+        "title": item['title'],
+        "authors": item['authors'],
+        "abstract": item['abstract'],
+        "pdf_link": item['link'],
+        "publish_time": item['publish_time'],
+        "year": year,
+        "month": month,
+        "like_num": item['like_num'],
+        "author_num": item['author_num'],
+        "github_num": item['github_num'],
+        "comment_num": item['comment_num'],
+        "img_link": item['img_link'],
+    }
+    row.update(typed_fields(row, year, month))
+    return row
+
+def _insert_ignoring_conflicts(rows: List[Dict]) -> int:
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy import insert
+    stmt = insert(Paper.__table__).values(rows)
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        # Another crawl may have stored the same id since we looked
+        stmt = stmt.on_conflict_do_nothing(index_elements=["id"])
+    result = db.session.execute(stmt)
+    return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(rows)
+
+# Stored counters, detail fields and what typed_fields needs for the given ids, keyed by id
+def stored_papers(ids: List[str]) -> Dict:
+    existing = {}
+    for i in range(0, len(ids), UPSERT_CHUNK_SIZE):
+        chunk = ids[i:i + UPSERT_CHUNK_SIZE]
+        rows = db.session.query(Paper.id, Paper.title, Paper.authors, Paper.abstract, Paper.like_num,
+                                Paper.github_num, Paper.comment_num, Paper.publish_time, Paper.year, Paper.month)\
+            .filter(Paper.id.in_(chunk)).all()
+        existing.update({row.id: row for row in rows})
+    return existing
+
+def upsert_papers(items: List[Dict], year: int, month: int) -> Dict:
+    batch = {}
+    for item in items:
+        if item.get('id'):
+            batch[item['id']] = item
+    skipped = len(items) - len(batch)
+    ids = list(batch)
+
+    existing = stored_papers(ids)
+
+    new_rows = []
+    updates = []
+    refilled = []
+    for paper_id, item in batch.items():
+        stored = existing.get(paper_id)
+        if stored is None:
+            new_rows.append(_paper_row(item, year, month))
+            continue
+        changed = {field: item[field] for field in COUNTER_FIELDS if getattr(stored, field) != item[field]}
+        # Rows stored with blank details (e.g. by a detail fetch that failed) are filled in
+        refill = {field: item[field] for field in DETAIL_FIELDS if not getattr(stored, field) and item.get(field)}
+        changed.update(refill)
+        if changed:
+            current = dict(stored._asdict(), **changed)
+            typed = typed_fields(current, stored.year, stored.month)
+            changed.update({field: typed[field] for field in TYPED_FIELDS})
+            if "publish_time" in refill:
+                changed["published_date"] = typed["published_date"]
+            changed["id"] = paper_id
+            updates.append(changed)
+            if refill:
+                refilled.append(current)
+        else:
+            skipped += 1
+
+    inserted = 0
+    try:
+        for i in range(0, len(new_rows), UPSERT_CHUNK_SIZE):
+            inserted += _insert_ignoring_conflicts(new_rows[i:i + UPSERT_CHUNK_SIZE])
+        if updates:
+            # ORM bulk UPDATE by primary key, executed as one executemany
+            db.session.execute(update(Paper), updates)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    if refilled:
+        search_index.add_many(refilled)
+    if new_rows:
+        search_index.add_many(new_rows)
+        if vector_index.loaded:
+            vector_index.add_many(new_rows)
+        related_graph.ensure_loaded()
+        if related_graph.loaded:
+            related_graph.add_many(new_rows)
+    if inserted:
+        recommend_cache.bump_version()
+    skipped += len(new_rows) - inserted
+    return {"inserted": inserted, "updated": len(updates), "skipped": skipped}
+
+# Incremental crawls send the listing's stored validators, so an unchanged page
+# costs one 304 and no parsing, and fetch detail pages only for unseen papers
+def crawl_listing(link: str, year: int, month: int, progress=None, incremental: bool = False) -> Dict:
+    stored = db.session.get(PageValidator, link) if incremental else None
+    if progress:
+        progress.advance(total=1)
+    content_html, validators = fetch_if_changed(link, stored and stored.etag, stored and stored.last_modified)
+    if progress:
+        progress.advance(pages=1)
+    failed = set()
+    if content_html is None:
+        result, stats, info = [], {"inserted": 0, "updated": 0, "skipped": 0}, "Not modified"
+    else:
+        result, failed = _listing_items(content_html, progress=progress, incremental=incremental)
+        stats = upsert_papers(result, year, month)
+        info = "Success"
+    if validators and not failed:
+        # Stored only after a complete upsert, so a crawl that failed or left
+        # papers out is retried in full instead of answering 304
+        db.session.merge(PageValidator(url=link, checked_at=datetime.utcnow(), **validators))
+        db.session.commit()
+    if progress:
+        progress.advance(upserted=stats["inserted"] + stats["updated"])
+    return {"info": info, "result": result, "stats": stats}
 
-def monthly_spider(year: int, month: int) -> Dict:
+def monthly_spider(year: int, month: int, progress=None, incremental: bool = False) -> Dict:
     if year < 2023 and month < 5:
         return {"info": "Error", "result": []}
-    link = f"https://huggingface.co/papers/month/{str(year)}-{str(month).zfill(2)}"
-    content_html = requests.get(link, headers=headers).text
-    result = parsel_html(content_html)
-    for item in result:
-        existing = Paper.query.filter_by(title=item['title']).first()
-        if not existing:
-            paper = Paper(
-                id=item['id'],
-                title=item['title'],
-                authors=item['authors'],  
-                abstract=item['abstract'],  
-                pdf_link=item['link'],
-                publish_time=item['publish_time'],
-                year=year,
-                month=month,
-                like_num=item['like_num'],
-                author_num=item['author_num'],
-                github_num=item['github_num'],
-                comment_num=item['comment_num'],
-                img_link=item['img_link']
-            )
-            db.session.add(paper)
-    db.session.commit()
-    return {"info": "Success", "result": result}
-
-def daily_spider(year: int, month: int, day: int) -> Dict:
+    link = f"{HF_BASE_URL}/papers/month/{str(year)}-{str(month).zfill(2)}"
+    return crawl_listing(link, year, month, progress, incremental)
+
+def daily_spider(year: int, month: int, day: int, progress=None, incremental: bool = False) -> Dict:
     if year < 2023 and month < 5 and day < 4:
         return {"info": "Error", "result": []}
-    link = f"https://huggingface.co/papers/date/{str(year)}-{str(month).zfill(2)}-{str(day).zfill(2)}"
-    content_html = requests.get(link, headers=headers).text
-    result = parsel_html(content_html)
-    for item in result:
-        existing = Paper.query.filter_by(title=item['title']).first()
-        if not existing:
-            paper = Paper(
-                id=item['id'],
-                title=item['title'],
-                authors=item['authors'],  
-                abstract=item['abstract'],  
-                pdf_link=item['link'],
-                publish_time=item['publish_time'],
-                year=year,
-                month=month,
-                like_num=item['like_num'],
-                author_num=item['author_num'],
-                github_num=item['github_num'],
-                comment_num=item['comment_num'],
-                img_link=item['img_link']
-            )
-            db.session.add(paper)
-    db.session.commit()
-    return {"info": "Success", "result": result}
-
-def download_arxiv_pdf(arxiv_id: str, download_dir: str = "./arxiv_pdfs", keep_pdf: bool = True) -> Dict:
-    os.makedirs(download_dir, exist_ok=True)
-    clean_id = arxiv_id.split("v")[0] if "v" in arxiv_id else arxiv_id
-    search = arxiv.Search(id_list=[arxiv_id])
+    link = f"{HF_BASE_URL}/papers/date/{str(year)}-{str(month).zfill(2)}-{str(day).zfill(2)}"
+    return crawl_listing(link, year, month, progress, incremental)
+
+ARXIV_PDF_DIR = os.environ.get("ARXIV_PDF_DIR", "./arxiv_pdfs")
+ARXIV_PDF_MAX_BYTES = int(os.environ.get("ARXIV_PDF_MAX_BYTES", str(2 * 1024 ** 3)))
+_arxiv_client = arxiv.Client()
+_arxiv_lock = threading.Lock()
+
+def _read_metadata(meta_path: str) -> Optional[Dict]:
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Writes `path` through a temp file in the same directory and renames it into
+# place, so concurrent readers see either nothing or the complete file
+def _atomic_write(path: str, write) -> None:
+    tmp_path = f"{path}.{uuid.uuid4().hex}.part"
     try:
-        paper = next(arxiv.Client().results(search))
-    except StopIteration:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+@timed("arxiv_lookup")
+def lookup_arxiv_metadata(arxiv_id: str) -> Optional[Dict]:
+    search = arxiv.Search(id_list=[arxiv_id])
+    # arxiv.Client paces its own requests; sharing one behind a lock keeps us within its rate limit
+    with _arxiv_lock:
+        try:
+            paper = next(_arxiv_client.results(search))
+        except StopIteration:
+            return None
+    return {
+        "title": paper.title,
+        "authors": [author.name for author in paper.authors],
+        "pdf_url": paper.pdf_url,
+        "published": paper.published.strftime("%Y-%m-%d"),
+    }
+
+@timed("pdf_download")
+def _download_pdf(pdf_url: str, pdf_path: str):
+    with requests.get(pdf_url, stream=True, timeout=SPIDER_TIMEOUT) as response:
+        response.raise_for_status()
+        def write(f):
+            for chunk in response.iter_content(1 << 16):
+                f.write(chunk)
+        _atomic_write(pdf_path, write)
+
+# Drops the least recently used PDFs until the directory fits in max_bytes.
+# Metadata sidecars are tiny and kept, so an evicted paper re-downloads without an API lookup.
+def evict_pdfs(download_dir: str, max_bytes: int = ARXIV_PDF_MAX_BYTES, keep: Optional[str] = None):
+    entries = []
+    for name in os.listdir(download_dir):
+        path = os.path.join(download_dir, name)
+        if name.endswith(".pdf") and os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+# Drops the version suffix: PDFs and summaries are stored per paper, not per version
+def clean_arxiv_id(arxiv_id: str) -> str:
+    return arxiv_id.split("v")[0] if "v" in arxiv_id else arxiv_id
+
+# Title, authors, pdf_url and published from the sidecar, or from the arXiv API
+# on first use; None if arXiv does not know the id. Needs no PDF download.
+def arxiv_metadata(arxiv_id: str, download_dir: str = ARXIV_PDF_DIR) -> Optional[Dict]:
+    os.makedirs(download_dir, exist_ok=True)
+    clean_id = clean_arxiv_id(arxiv_id)
+    meta_path = os.path.join(download_dir, f"{clean_id}.json")
+    metadata = _read_metadata(meta_path)
+    if metadata is None:
+        metadata = lookup_arxiv_metadata(arxiv_id)
+        if metadata is None:
+            return None
+        _atomic_write(meta_path, lambda f: f.write(json.dumps(metadata, ensure_ascii=False).encode("utf-8")))
+    return dict(metadata, arxiv_id=clean_id)
+
+def download_arxiv_pdf(arxiv_id: str, download_dir: str = ARXIV_PDF_DIR, keep_pdf: bool = True,
+                       metadata: Optional[Dict] = None) -> Dict:
+    metadata = metadata or arxiv_metadata(arxiv_id, download_dir)
+    if metadata is None:
         return {"error": f"arXiv ID {arxiv_id} not found or invalid"}
-    title = paper.title
-    authors = [author.name for author in paper.authors]
-    pdf_url = paper.pdf_url
-    published = paper.published.strftime("%Y-%m-%d")
+    clean_id = metadata["arxiv_id"]
     pdf_filename = f"{clean_id}.pdf"
     pdf_path = os.path.join(download_dir, pdf_filename)
-    if not os.path.exists(pdf_path):
-        paper.download_pdf(dirpath=download_dir, filename=pdf_filename)
+    if os.path.exists(pdf_path):
+        os.utime(pdf_path)  # mtime doubles as last-access time for eviction
+    else:
+        try:
+            _download_pdf(metadata["pdf_url"], pdf_path)
+        except requests.RequestException as e:
+            return {"error": f"PDF download failed for {arxiv_id}: {e}"}
+        evict_pdfs(download_dir, keep=pdf_path)
     if not keep_pdf and os.path.exists(pdf_path):
         os.remove(pdf_path)
         pdf_path = None
     return {
         "arxiv_id": clean_id,
         "pdf_path": pdf_path,
-        "title": title,
-        "authors": authors,
-        "pdf_url": pdf_url,
-        "published": published,
+        "title": metadata["title"],
+        "authors": metadata["authors"],
+        "pdf_url": metadata["pdf_url"],
+        "published": metadata["published"],
     }
 
 def extract_text_from_pdf(pdf_path: str, start_page: int = 0, end_page: int = 10) -> Optional[str]:
-    if not pdf_path or not os.path.isfile(pdf_path):
+    document = extract_document(pdf_path, start_page, end_page)
+    if not document:
         return None
-    try:
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
-        if start_page < 0: start_page = 0
-        if start_page >= total_pages: return None
-        if end_page is None: end_page = total_pages - 1
-        else: end_page = min(end_page, total_pages - 1)
-        if end_page < start_page: return None
-        pages_to_extract = list(range(start_page, end_page + 1))
-        pages_text = [doc[i].get_text() for i in pages_to_extract]
-        text = "\n".join(pages_text)
-        doc.close()
-        return text
-    except Exception:
-        return None
\ No newline at end of file
+    return "\n".join(document["pages"])
@@ -0,0 +1,242 @@
+import re
+import ast
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+FENCE_RE = re.compile(r"```[a-zA-Z]*")
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+JSON_LITERALS = {"true": "True", "false": "False", "null": "None"}
+LITERAL_RE = re.compile(r"\b(true|false|null)\b")
+CLOSING_QUOTE_RE = re.compile(r"\s*(?:[,:}\]]|$)")
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+class StructuredOutputError(ValueError):
+    pass
+
+class Field:
+    def __init__(self, kind: type = str, required: bool = False, default: Any = "",
+                 minimum: Optional[float] = None, maximum: Optional[float] = None):
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+
+    # Returns (value, repaired); raises StructuredOutputError if it cannot be coerced
+    def coerce(self, name: str, value) -> Tuple[Any, bool]:
+        if self.kind is str:
+            if isinstance(value, str):
+                return value.strip(), False
+            if value is None:
+                return self.default, True
+            if isinstance(value, (list, tuple)):
+                # The prompts ask for "item1; item2" but models often return a real list
+                return "; ".join(str(item).strip() for item in value if item not in (None, "")), True
+            if isinstance(value, dict):
+                return "; ".join(f"{k}: {v}" for k, v in value.items()), True
+            return str(value), True
+        if self.kind in (int, float):
+            repaired = not isinstance(value, (int, float)) or isinstance(value, bool)
+            if isinstance(value, str):
+                # "8/10" or "score: 8" -> 8
+                match = NUMBER_RE.search(value)
+                value = match.group() if match else value
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise StructuredOutputError(f"{name}: expected a number, got {value!r}")
+            if self.minimum is not None and number < self.minimum:
+                number, repaired = self.minimum, True
+            if self.maximum is not None and number > self.maximum:
+                number, repaired = self.maximum, True
+            if self.kind is int:
+                repaired = repaired or number != int(number)
+                number = int(round(number))
+            return number, repaired
+        raise StructuredOutputError(f"{name}: unsupported field type {self.kind!r}")
+
+# An object with known fields, or a list of them when many=True. Unknown keys are
+# dropped and missing optional fields get their default.
+class Schema:
+    def __init__(self, name: str, fields: Dict[str, Field], many: bool = False, min_items: int = 0,
+                 allow_empty: bool = True):
+        self.name = name
+        self.fields = fields
+        self.many = many
+        self.min_items = min_items
+        self.allow_empty = allow_empty
+
+    def _coerce_object(self, value: Dict) -> Tuple[Dict, bool]:
+        result = {}
+        normalized = bool(set(value) - set(self.fields))
+        for name, field in self.fields.items():
+            if name not in value or value[name] in (None, ""):
+                if field.required:
+                    raise StructuredOutputError(f"{self.name}: missing required field {name!r}")
+                result[name] = field.default
+                normalized = normalized or name not in value
+                continue
+            result[name], fixed = field.coerce(name, value[name])
+            normalized = normalized or fixed
+        return result, normalized
+
+    # Returns (value, reshaped, normalized). Reshaped means the reply had the wrong
+    # container (an object where a list was asked for, or the reverse), which the
+    # callers used to reject; normalized means fields were filled in, dropped or
+    # coerced, which they used to accept as-is.
+    def validate(self, value) -> Tuple[Any, bool, bool]:
+        reshaped = normalized = False
+        if self.many:
+            if isinstance(value, dict):
+                lists = [v for v in value.values() if isinstance(v, list)]
+                # {"papers": [...]} wraps the list we want; a bare object is a list of one
+                value = lists[0] if len(lists) == 1 else [value]
+                reshaped = True
+            if not isinstance(value, list):
+                raise StructuredOutputError(f"{self.name}: expected a list, got {type(value).__name__}")
+            items = []
+            for item in value:
+                if not isinstance(item, dict):
+                    normalized = True
+                    continue
+                try:
+                    coerced, fixed = self._coerce_object(item)
+                except StructuredOutputError:
+                    # One bad entry should not cost a whole new completion
+                    normalized = True
+                    continue
+                items.append(coerced)
+                normalized = normalized or fixed
+            if len(items) < self.min_items:
+                raise StructuredOutputError(f"{self.name}: {len(items)} valid items, need {self.min_items}")
+            return items, reshaped, normalized
+        if isinstance(value, list):
+            objects = [item for item in value if isinstance(item, dict)]
+            if not objects:
+                raise StructuredOutputError(f"{self.name}: expected an object, got a list")
+            value, reshaped = objects[0], True
+        if not isinstance(value, dict):
+            raise StructuredOutputError(f"{self.name}: expected an object, got {type(value).__name__}")
+        if not value:
+            if self.allow_empty:
+                return {}, reshaped, False
+            raise StructuredOutputError(f"{self.name}: empty object")
+        if not set(value) & set(self.fields):
+            raise StructuredOutputError(f"{self.name}: none of the expected fields present")
+        result, normalized = self._coerce_object(value)
+        return result, reshaped, normalized
+
+# Cuts the outermost {...} or [...] out of surrounding prose and rewrites
+# single-quoted strings with double quotes. A truncated reply yields two
+# candidates: everything closed as-is, and everything up to the last complete item.
+def _json_spans(text: str) -> List[str]:
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return []
+    out = []
+    stack = []
+    quote = None
+    escaped = False
+    last_comma = None
+    for i in range(min(starts), len(text)):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+                if ch == "'":
+                    out[-1] = "'"  # \' needs no escape inside double quotes
+                else:
+                    out.append(ch)
+            elif ch == "\\":
+                escaped = True
+                out.append(ch)
+            elif ch == quote and (quote == '"' or CLOSING_QUOTE_RE.match(text, i + 1)):
+                # A single quote only closes the string before a delimiter; "it's" stays text
+                quote = None
+                out.append('"')
+            elif ch == '"':
+                out.append('\\"')
+            else:
+                out.append(ch)
+            continue
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+            continue
+        if ch == ",":
+            last_comma = (len(out), list(stack))
+        out.append(ch)
+        if ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack and stack[-1] == ch:
+                stack.pop()
+            if not stack:
+                return ["".join(out)]
+    tail = "".join(out).rstrip()
+    if quote:
+        tail += '"'
+    spans = [tail.rstrip(",") + "".join(reversed(stack))]
+    if last_comma:
+        cut, open_brackets = last_comma
+        spans.append("".join(out[:cut]) + "".join(reversed(open_brackets)))
+    return spans
+
+# Returns (value, repaired). Strict JSON first; then the rewritten span with and
+# without trailing commas; then a Python-literal reading for True/None output.
+def loads_tolerant(text: str) -> Tuple[Any, bool]:
+    if text is None:
+        raise StructuredOutputError("empty reply")
+    cleaned = FENCE_RE.sub("", text).strip()
+    try:
+        # Fences are expected from GLM and were always stripped, so they are not a repair
+        return json.loads(cleaned), False
+    except ValueError:
+        pass
+    spans = _json_spans(cleaned.translate(SMART_QUOTES))
+    if not spans:
+        raise StructuredOutputError("no JSON object or list in reply")
+    for span in spans:
+        for candidate in (span, TRAILING_COMMA_RE.sub(r"\1", span)):
+            try:
+                return json.loads(candidate), True
+            except ValueError:
+                pass
+        for candidate in (span, LITERAL_RE.sub(lambda m: JSON_LITERALS[m.group(1)], span)):
+            try:
+                return ast.literal_eval(candidate), True
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                pass
+    raise StructuredOutputError("reply is not parsable as JSON or a Python literal")
+
+class ParseStats:
+    def __init__(self):
+        self._counters = {"parsed": 0, "clean": 0, "repaired": 0, "normalized": 0, "failed": 0, "reprompts": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        # Each repaired reply used to fail json.loads or the shape check and trigger a
+        # fresh completion; normalized ones were accepted before and save nothing
+        stats["llm_calls_saved"] = stats["repaired"]
+        return stats
+
+parse_stats = ParseStats()
+
+def parse_structured(text: str, schema: Schema):
+    parse_stats.count("parsed")
+    try:
+        value, repaired = loads_tolerant(text)
+        value, reshaped, normalized = schema.validate(value)
+    except StructuredOutputError:
+        parse_stats.count("failed")
+        raise
+    parse_stats.count("repaired" if repaired or reshaped else "normalized" if normalized else "clean")
+    return value
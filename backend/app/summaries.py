@@ -0,0 +1,251 @@
+import os
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from .models import db, Paper, PaperSummary
+from .spider import download_arxiv_pdf, clean_arxiv_id, ARXIV_PDF_DIR
+from .pdf_extract import analysis_context
+from .analysis import content_analysis, CONTENT_PROMPT_VERSION
+from .analysis_cache import analysis_cache, file_sha256
+from .llm import LLM_MAX_CONCURRENCY
+
+BATCH_DOWNLOAD_WORKERS = int(os.environ.get("BATCH_DOWNLOAD_WORKERS", "4"))
+BATCH_EXTRACT_WORKERS = int(os.environ.get("BATCH_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BATCH_ANALYZE_WORKERS = int(os.environ.get("BATCH_ANALYZE_WORKERS", str(LLM_MAX_CONCURRENCY)))
+BATCH_QUEUE_SIZE = int(os.environ.get("BATCH_QUEUE_SIZE", "8"))
+_DONE = object()
+
+def get_summary(arxiv_id: str, prompt_version: str = CONTENT_PROMPT_VERSION) -> Optional[Dict]:
+    try:
+        summary = db.session.get(PaperSummary, (arxiv_id, prompt_version))
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"[DEBUG] Summary read failed: {e}")
+        return None
+    if summary is None:
+        return None
+    pdf_path = os.path.join(ARXIV_PDF_DIR, f"{arxiv_id}.pdf")
+    return {
+        "analysis": json.loads(summary.result),
+        # Same shape as download_arxiv_pdf's result
+        "download_info": {
+            "arxiv_id": arxiv_id,
+            "pdf_path": pdf_path if os.path.exists(pdf_path) else None,
+            "title": summary.title,
+            "authors": json.loads(summary.authors or "[]"),
+            "pdf_url": summary.pdf_url,
+            "published": summary.published,
+        },
+    }
+
+def save_summary(download_info: Dict, pdf_hash: str, analysis: Dict, prompt_version: str = CONTENT_PROMPT_VERSION):
+    try:
+        db.session.merge(PaperSummary(
+            arxiv_id=download_info["arxiv_id"],
+            prompt_version=prompt_version,
+            pdf_hash=pdf_hash,
+            title=download_info["title"],
+            authors=json.dumps(download_info["authors"], ensure_ascii=False),
+            pdf_url=download_info["pdf_url"],
+            published=download_info["published"],
+            result=json.dumps(analysis, ensure_ascii=False),
+            created_at=datetime.utcnow()
+        ))
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+
+def summarized_ids(arxiv_ids: Sequence[str], prompt_version: str = CONTENT_PROMPT_VERSION) -> set:
+    done = set()
+    for i in range(0, len(arxiv_ids), 500):
+        rows = db.session.query(PaperSummary.arxiv_id).filter(
+            PaperSummary.prompt_version == prompt_version, PaperSummary.arxiv_id.in_(arxiv_ids[i:i + 500])
+        ).all()
+        done.update(row.arxiv_id for row in rows)
+    return done
+
+def month_ids(year: int, month: int) -> List[str]:
+    return [row.id for row in db.session.query(Paper.id).filter_by(year=year, month=month).order_by(Paper.id).all()]
+
+class StageStats:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.done = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0  # waiting for room in the next stage's queue
+        self._lock = threading.Lock()
+
+    def record(self, busy: float, blocked: float = 0.0, ok: bool = True):
+        with self._lock:
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+
+    def to_dict(self, elapsed: float, queued: int) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": queued,
+                "done": self.done,
+                "failed": self.failed,
+                "per_second": round(self.done / elapsed, 2) if elapsed else 0.0,
+                "utilization": round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed else 0.0,
+                "busy_seconds": round(self.busy_seconds, 1),
+                "blocked_seconds": round(self.blocked_seconds, 1),
+            }
+
+# Download, extraction and analysis run as three worker pools joined by bounded
+# queues, so the network, the CPU and the LLM are busy at the same time and a
+# slow stage holds back the ones before it instead of piling up PDFs in memory.
+class SummaryPipeline:
+    def __init__(self, app, arxiv_ids: Sequence[str], progress=None,
+                 download_workers: int = BATCH_DOWNLOAD_WORKERS, extract_workers: int = BATCH_EXTRACT_WORKERS,
+                 analyze_workers: int = BATCH_ANALYZE_WORKERS, queue_size: int = BATCH_QUEUE_SIZE):
+        self.app = app
+        self.arxiv_ids = list(arxiv_ids)
+        self.progress = progress
+        self.stages = {
+            "download": StageStats("download", max(download_workers, 1)),
+            "extract": StageStats("extract", max(extract_workers, 1)),
+            "analyze": StageStats("analyze", max(analyze_workers, 1)),
+        }
+        self.inputs = {
+            "download": queue.Queue(),
+            "extract": queue.Queue(maxsize=queue_size),
+            "analyze": queue.Queue(maxsize=queue_size),
+        }
+        self.summarized = 0
+        self.reused = 0  # taken from the on-demand analysis cache instead of the LLM
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def _download(self, arxiv_id: str):
+        download_info = download_arxiv_pdf(arxiv_id)
+        if 'error' in download_info:
+            raise RuntimeError(download_info['error'])
+        if not download_info['pdf_path']:
+            raise RuntimeError("Download failed")
+        return download_info
+
+    def _extract(self, download_info: Dict):
+        content = analysis_context(download_info['pdf_path'])
+        if not content:
+            raise RuntimeError("Extraction failed")
+        return download_info, file_sha256(download_info['pdf_path']), content
+
+    def _analyze(self, item):
+        download_info, pdf_hash, content = item
+        analysis = analysis_cache.get(download_info['arxiv_id'], pdf_hash, CONTENT_PROMPT_VERSION)
+        if analysis is not None:
+            with self._lock:
+                self.reused += 1
+        else:
+            analysis = content_analysis(content)
+            if not analysis:
+                raise RuntimeError("Analysis failed")
+        save_summary(download_info, pdf_hash, analysis)
+        with self._lock:
+            self.summarized += 1
+        if self.progress:
+            self.progress.advance(pages=1, upserted=1)
+
+    def _key(self, item) -> str:
+        if isinstance(item, str):
+            return item
+        info = item[0] if isinstance(item, tuple) else item
+        return info['arxiv_id']
+
+    def _worker(self, name: str, fn: Callable, sink: Optional[queue.Queue]):
+        stats, source = self.stages[name], self.inputs[name]
+        with self.app.app_context():
+            while True:
+                item = source.get()
+                if item is _DONE:
+                    return
+                started = time.perf_counter()
+                try:
+                    result = fn(item)
+                except Exception as e:
+                    stats.record(time.perf_counter() - started, ok=False)
+                    print(f"[DEBUG] Batch {name} failed for {self._key(item)}: {e}")
+                    if self.progress:
+                        self.progress.advance(pages=1, error=f"{self._key(item)} ({name}): {e}")
+                    continue
+                busy = time.perf_counter() - started
+                blocked = 0.0
+                if sink is not None:
+                    started = time.perf_counter()
+                    sink.put(result)
+                    blocked = time.perf_counter() - started
+                stats.record(busy, blocked)
+
+    def run(self) -> Dict:
+        self.started_at = time.time()
+        if self.progress:
+            self.progress.advance(total=len(self.arxiv_ids))
+        for arxiv_id in self.arxiv_ids:
+            self.inputs["download"].put(arxiv_id)
+        order = [("download", self._download, "extract"), ("extract", self._extract, "analyze"), ("analyze", self._analyze, None)]
+        pools = {}
+        for name, fn, sink in order:
+            pools[name] = [
+                threading.Thread(target=self._worker, args=(name, fn, self.inputs[sink] if sink else None),
+                                 name=f"batch-{name}-{i}", daemon=True)
+                for i in range(self.stages[name].workers)
+            ]
+            for thread in pools[name]:
+                thread.start()
+        # Shut the stages down in order: once a pool has drained, one sentinel per worker of the next
+        for name, _, _ in order:
+            for _ in pools[name]:
+                self.inputs[name].put(_DONE)
+            for thread in pools[name]:
+                thread.join()
+        self.finished_at = time.time()
+        return self.stats()
+
+    def stats(self) -> Dict:
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        stages = {}
+        for name, stats in self.stages.items():
+            stages[name] = stats.to_dict(elapsed, self.inputs[name].qsize())
+        with self._lock:
+            summarized, reused = self.summarized, self.reused
+        return {
+            "papers": len(self.arxiv_ids),
+            "summarized": summarized,
+            "reused": reused,
+            "failed": sum(s["failed"] for s in stages.values()),
+            "elapsed_seconds": round(elapsed, 1),
+            "papers_per_second": round(summarized / elapsed, 3) if elapsed else 0.0,
+            "stages": stages,
+        }
+
+# Job entry point: summarizes a month's papers or the given ids, skipping those
+# already summarized with the current prompt unless force is set
+def summarize_papers(arxiv_ids: Optional[Sequence[str]] = None, year: Optional[int] = None, month: Optional[int] = None,
+                     force: bool = False, progress=None) -> Dict:
+    ids = list(dict.fromkeys(clean_arxiv_id(arxiv_id) for arxiv_id in arxiv_ids)) if arxiv_ids else month_ids(year, month)
+    skipped = 0
+    if not force:
+        done = summarized_ids(ids)
+        skipped = len(done)
+        ids = [arxiv_id for arxiv_id in ids if arxiv_id not in done]
+    pipeline = SummaryPipeline(current_app._get_current_object(), ids, progress)
+    if progress is not None:
+        progress.stages = pipeline.stats
+    result = pipeline.run()
+    result["skipped"] = skipped
+    return result
@@ -0,0 +1,92 @@
+import argparse
+import calendar
+import time
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app import create_app
+from app.jobs import Job
+from app.models import db, CrawlCheckpoint
+from app.spider import monthly_spider, daily_spider
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+def iter_units(start: date, end: date, daily: bool):
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        if daily:
+            last_day = calendar.monthrange(year, month)[1]
+            for day in range(1, last_day + 1):
+                if date(year, month, day) <= date.today():
+                    yield (year, month, day)
+        else:
+            yield (year, month, 0)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def completed_units() -> set:
+    return {(c.year, c.month, c.day) for c in CrawlCheckpoint.query.all()}
+
+def crawl_unit(app, unit) -> Job:
+    year, month, day = unit
+    progress = Job(unit, "backfill")
+    progress.started_at = time.time()
+    with app.app_context():
+        if day:
+            daily_spider(year, month, day, progress=progress)
+        else:
+            monthly_spider(year, month, progress=progress)
+        # A unit with failed detail pages stays unchecked so a resume crawls it again
+        if not progress.errors:
+            db.session.merge(CrawlCheckpoint(
+                year=year, month=month, day=day,
+                pages=progress.pages_fetched,
+                papers=progress.papers_upserted,
+                completed_at=datetime.utcnow()
+            ))
+            db.session.commit()
+    progress.finished_at = time.time()
+    return progress
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Hugging Face papers over a range of months")
+    parser.add_argument("--start", type=parse_month, default=parse_month("2023-05"), help="first month, YYYY-MM")
+    parser.add_argument("--end", type=parse_month, default=date.today(), help="last month, YYYY-MM (default: current month)")
+    parser.add_argument("--daily", action="store_true", help="crawl day pages instead of month pages")
+    parser.add_argument("--workers", type=int, default=3, help="units crawled in parallel")
+    parser.add_argument("--force", action="store_true", help="ignore checkpoints and re-crawl every unit")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        done = set() if args.force else completed_units()
+    units = [u for u in iter_units(args.start, args.end, args.daily) if u not in done]
+    print(f"{len(units)} units to crawl, {len(done)} already checkpointed")
+
+    pages = papers = failed = 0
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        futures = {pool.submit(crawl_unit, app, unit): unit for unit in units}
+        for future in as_completed(futures):
+            year, month, day = futures[future]
+            label = f"{year}-{month:02d}" + (f"-{day:02d}" if day else "")
+            try:
+                progress = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{label}] failed: {e}")
+                continue
+            pages += progress.pages_fetched
+            papers += progress.papers_upserted
+            if progress.errors:
+                failed += 1
+                print(f"[{label}] {len(progress.errors)} errors, not checkpointed: {progress.errors[0]}")
+                continue
+            print(f"[{label}] {progress.pages_fetched} pages, {progress.papers_upserted} papers upserted "
+                  f"in {progress.finished_at - progress.started_at:.1f}s")
+
+    elapsed = max(time.time() - started, 1e-6)
+    print(f"Done: {len(units) - failed}/{len(units)} units, {pages} pages, {papers} papers in {elapsed:.1f}s "
+          f"({pages / elapsed:.2f} pages/s, {papers / elapsed:.2f} papers/s)")
+
+if __name__ == '__main__':
+    main()
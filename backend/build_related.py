@@ -0,0 +1,23 @@
+import argparse
+import time
+from app import create_app
+from app.related import related_graph
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the related-papers graph from authors, content similarity and reading history")
+    parser.add_argument("--k", type=int, default=related_graph.k, help="related papers kept per paper")
+    args = parser.parse_args()
+
+    app = create_app()
+    related_graph.k = args.k
+    started = time.time()
+
+    def progress(done: int, total: int):
+        print(f"\r{done}/{total} papers ({done / max(time.time() - started, 1e-6):.0f}/s)", end="", flush=True)
+
+    with app.app_context():
+        related_graph.build(progress=progress)
+    print(f"\nDone: {len(related_graph)} papers, {related_graph.edge_count} edges in {time.time() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""typed paper columns and query indexes
+
+Adds the typed copies of the scraped paper fields and the composite indexes
+behind /api/query and /api/history to a database created before they existed.
+Fresh databases already get them from db.create_all(), so every step checks
+first. Fill the new columns of existing rows afterwards with
+`flask --app app backfill-typed-fields`.
+
+Revision ID: 3f1a9c2d7e5b
+Revises:
+Create Date: 2025-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7e5b'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+PAPER_COLUMNS = [
+    ('github_stars', sa.Integer),
+    ('author_count', sa.Integer),
+    ('published_date', sa.Date),
+    ('trending_score', sa.Float),
+]
+INDEXES = [
+    ('papers', 'ix_papers_year_month_id', ['year', 'month', 'id']),
+    ('papers', 'ix_papers_like_num_id', ['like_num', 'id']),
+    ('papers', 'ix_papers_comment_num_id', ['comment_num', 'id']),
+    ('papers', 'ix_papers_trending_id', ['trending_score', 'id']),
+    ('papers', 'ix_papers_year_month_trending', ['year', 'month', 'trending_score', 'id']),
+    ('history', 'ix_history_user_time', ['user_id', 'access_time']),
+    ('history', 'ix_history_user_arxiv', ['user_id', 'arxiv_id']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    if 'papers' in tables:
+        present = {column['name'] for column in inspector.get_columns('papers')}
+        for name, column_type in PAPER_COLUMNS:
+            if name not in present:
+                op.add_column('papers', sa.Column(name, column_type()))
+    for table, name, columns in INDEXES:
+        if table in tables and name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, name, _ in INDEXES:
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
+    present = {column['name'] for column in inspector.get_columns('papers')}
+    with op.batch_alter_table('papers') as batch:
+        for name, _ in PAPER_COLUMNS:
+            if name in present:
+                batch.drop_column(name)
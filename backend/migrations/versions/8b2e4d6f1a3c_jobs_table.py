@@ -0,0 +1,44 @@
+"""jobs table
+
+Background jobs are kept in the database so that every worker process can
+report on them and coalesce onto them. Databases where db.create_all() already
+ran have the table.
+
+Revision ID: 8b2e4d6f1a3c
+Revises: 3f1a9c2d7e5b
+Create Date: 2025-10-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a3c'
+down_revision = '3f1a9c2d7e5b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'jobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=20)),
+        sa.Column('status', sa.String(length=20)),
+        sa.Column('active_key', sa.String(length=40)),
+        sa.Column('state', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.Float()),
+        sa.Column('updated_at', sa.Float()),
+        sa.Column('finished_at', sa.Float()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('active_key'),
+    )
+    op.create_index('ix_jobs_finished_at', 'jobs', ['finished_at'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_finished_at', table_name='jobs')
+    op.drop_table('jobs')
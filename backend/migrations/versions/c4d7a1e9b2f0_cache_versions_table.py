@@ -0,0 +1,35 @@
+"""cache versions table
+
+Holds the recommendation cache's corpus version, so that every worker with
+the in-memory cache sees inserts made by the others. Databases where
+db.create_all() already ran have the table.
+
+Revision ID: c4d7a1e9b2f0
+Revises: 8b2e4d6f1a3c
+Create Date: 2025-10-21 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7a1e9b2f0'
+down_revision = '8b2e4d6f1a3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'cache_versions' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
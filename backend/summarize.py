@@ -0,0 +1,59 @@
+import argparse
+import threading
+import time
+from datetime import datetime
+from app import create_app
+from app.jobs import Job
+from app.summaries import summarize_papers
+
+def print_stages(job: Job):
+    stats = job.stages() if job.stages else None
+    if not stats:
+        return
+    line = "  ".join(f"{name}: {s['done']} done/{s['failed']} failed, {s['queued']} queued, "
+                     f"{s['per_second']}/s, {int(s['utilization'] * 100)}% busy"
+                     for name, s in stats["stages"].items())
+    print(f"[{stats['elapsed_seconds']:>6.1f}s] {stats['summarized']}/{stats['papers']} summarized  {line}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-summarize papers so assist_read can answer without the LLM")
+    parser.add_argument("--month", type=lambda v: datetime.strptime(v, "%Y-%m"), help="summarize a month's papers, YYYY-MM")
+    parser.add_argument("--ids", nargs="+", help="arXiv ids to summarize")
+    parser.add_argument("--force", action="store_true", help="redo papers that already have a summary")
+    parser.add_argument("--interval", type=float, default=5, help="seconds between progress lines")
+    args = parser.parse_args()
+    if not args.month and not args.ids:
+        parser.error("one of --month or --ids is required")
+
+    app = create_app()
+    job = Job("summarize", "summaries")
+    job.started_at = time.time()
+
+    def run():
+        with app.app_context():
+            if args.ids:
+                job.result = summarize_papers(arxiv_ids=args.ids, force=args.force, progress=job)
+            else:
+                job.result = summarize_papers(year=args.month.year, month=args.month.month, force=args.force, progress=job)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    while worker.is_alive():
+        worker.join(args.interval)
+        print_stages(job)
+    if job.result is None:
+        raise SystemExit("Batch failed; see the log above")
+
+    result = job.result
+    print(f"Done: {result['summarized']}/{result['papers']} summarized ({result['reused']} from the analysis cache), "
+          f"{result['failed']} failed, {result['skipped']} already summarized, "
+          f"{result['elapsed_seconds']}s ({result['papers_per_second']} papers/s)")
+    print(f"{'stage':<10}{'workers':>8}{'done':>7}{'failed':>8}{'per s':>8}{'busy':>7}{'blocked s':>11}")
+    for name, s in result["stages"].items():
+        print(f"{name:<10}{s['workers']:>8}{s['done']:>7}{s['failed']:>8}{s['per_second']:>8}"
+              f"{int(s['utilization'] * 100):>6}%{s['blocked_seconds']:>11}")
+    for error in job.errors[:20]:
+        print(f"  {error}")
+
+if __name__ == '__main__':
+    main()
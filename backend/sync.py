@@ -0,0 +1,47 @@
+import argparse
+import time
+from datetime import date, timedelta
+from app import create_app
+from app.jobs import Job
+from app.spider import daily_spider
+
+def sync_day(day: date, full: bool) -> Job:
+    progress = Job(day, "sync")
+    progress.started_at = time.time()
+    progress.result = daily_spider(day.year, day.month, day.day, progress=progress, incremental=not full)
+    progress.finished_at = time.time()
+    return progress
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the most recent Hugging Face daily pages, fetching only what changed")
+    parser.add_argument("--days", type=int, default=3, help="number of days to sync, ending today")
+    parser.add_argument("--full", action="store_true", help="ignore stored papers and refetch every detail page")
+    args = parser.parse_args()
+
+    app = create_app()
+    today = date.today()
+    days = [today - timedelta(days=offset) for offset in range(max(args.days, 1))]
+    pages = papers = unchanged = failed = 0
+    started = time.time()
+    with app.app_context():
+        for day in reversed(days):
+            try:
+                progress = sync_day(day, args.full)
+            except Exception as e:
+                failed += 1
+                print(f"[{day}] failed: {e}")
+                continue
+            pages += progress.pages_fetched
+            papers += progress.papers_upserted
+            if progress.result["info"] == "Not modified":
+                unchanged += 1
+                print(f"[{day}] not modified")
+                continue
+            stats = progress.result["stats"]
+            print(f"[{day}] {stats['inserted']} new, {stats['updated']} counters updated, "
+                  f"{progress.pages_fetched - 1} detail pages in {progress.finished_at - progress.started_at:.1f}s")
+    print(f"Done: {len(days) - failed}/{len(days)} days ({unchanged} not modified), {pages} pages, "
+          f"{papers} papers upserted in {time.time() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
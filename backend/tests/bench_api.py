@@ -0,0 +1,284 @@
+# Load-test harness for the Flask API, fully offline.
+#
+#   python tests/bench_api.py --papers 2000 --concurrency 8 --requests 200
+#   python tests/bench_api.py --save baseline        # writes tests/baselines/baseline.json
+#   python tests/bench_api.py --compare baseline     # exits 1 on a regression
+#
+# Starts create_app() on SQLite (or --database-url), seeds synthetic papers,
+# serves Hugging Face pages and PDFs from a local fake and answers GLM prompts
+# with the fake LLM backend, then reports latency percentiles and throughput.
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fakes import FakeHuggingFace, paper_items, seed_arxiv, synthetic_papers, TOPICS
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+MONTHS = [(2025, 7), (2025, 8), (2025, 9)]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+# Each scenario returns (method, path, json body) for the i-th request
+def scenarios(papers: List[Dict], assist_ids: List[str]) -> Dict[str, Callable[[int, random.Random], Tuple]]:
+    def query(i, rng):
+        year, month = rng.choice(MONTHS)
+        body = {"fields": ["id", "title", "like_num"], "limit": 50, "sort": rng.choice(["recent", "likes", "trending"]),
+                "where": {"year": year, "month": month}}
+        return "POST", "/api/query", body
+
+    def recommend(i, rng):
+        # Popular queries repeat, as they do in production
+        keywords = rng.choice(TOPICS[:6]) if rng.random() < 0.7 else " ".join(rng.sample(TOPICS, 2))
+        return "POST", "/api/recommend", {"keywords": keywords}
+
+    def assist_read(i, rng):
+        return "POST", "/api/assist/read", {"arxiv_id": rng.choice(assist_ids)}
+
+    def history(i, rng):
+        return "GET", "/api/history", None
+
+    def search(i, rng):
+        return "GET", f"/api/search?q={rng.choice(TOPICS).replace(' ', '+')}&limit=20", None
+
+    def collect_daily(i, rng):
+        year, month = MONTHS[-1]
+        return "POST", "/api/collect/daily", {"year": year, "month": month, "day": 1 + i % 28}
+
+    def collect_monthly(i, rng):
+        year, month = MONTHS[i % len(MONTHS)]
+        return "POST", "/api/collect/monthly", {"year": year, "month": month}
+
+    return {
+        "query": query,
+        "recommend": recommend,
+        "assist_read": assist_read,
+        "history": history,
+        "search": search,
+        "collect_daily": collect_daily,
+        "collect_monthly": collect_monthly,
+    }
+
+class Client:
+    def __init__(self, base_url: str, token: str):
+        self.base_url = base_url
+        self.token = token
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            self._local.session.headers["Authorization"] = f"Bearer {self.token}"
+        return self._local.session
+
+    def call(self, method: str, path: str, body=None) -> requests.Response:
+        return self.session.request(method, self.base_url + path, json=body, timeout=120)
+
+def run_scenario(client: Client, make_request: Callable, n_requests: int, concurrency: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    plan = [make_request(i, rng) for i in range(n_requests)]
+    latencies = []
+    errors = []
+    job_ids = []
+    lock = threading.Lock()
+
+    def one(request):
+        method, path, body = request
+        started = time.perf_counter()
+        try:
+            response = client.call(method, path, body)
+            elapsed = time.perf_counter() - started
+            ok = response.status_code < 400
+            job_id = response.json().get("job_id") if response.status_code == 202 else None
+        except requests.RequestException as e:
+            elapsed, ok, job_id = time.perf_counter() - started, False, None
+            response = e
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(getattr(response, "status_code", str(response)))
+            if job_id:
+                job_ids.append(job_id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, plan))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "throughput_rps": round(n_requests / wall, 2) if wall else 0.0,
+    }
+    if errors:
+        result["error_samples"] = sorted({str(e) for e in errors})[:5]
+    if job_ids:
+        result.update(wait_for_jobs(client, set(job_ids)))
+    return result
+
+# Collect endpoints only enqueue; this measures how long the queued crawls take
+def wait_for_jobs(client: Client, job_ids: set, timeout: float = 600) -> Dict:
+    deadline = time.time() + timeout
+    durations = {}
+    while job_ids - durations.keys() and time.time() < deadline:
+        for job_id in job_ids - durations.keys():
+            job = client.call("GET", f"/api/jobs/{job_id}").json()
+            if job.get("status") in ("done", "failed") or job.get("error") == "Job not found":
+                durations[job_id] = (job.get("finished_at") or 0) - (job.get("started_at") or 0)
+        time.sleep(0.2)
+    finished = sorted(d for d in durations.values() if d > 0)
+    return {
+        "jobs": len(job_ids),
+        "jobs_unfinished": len(job_ids - durations.keys()),
+        "job_p50_s": round(percentile(finished, 50), 3),
+        "job_max_s": round(finished[-1], 3) if finished else 0.0,
+    }
+
+def start_server(app):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request access log
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def login(base_url: str) -> str:
+    credentials = {"username": "bench", "password": "bench", "email": "bench@example.com"}
+    requests.post(f"{base_url}/auth/register", json=credentials, timeout=30)
+    response = requests.post(f"{base_url}/auth/login", json=credentials, timeout=30)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n{'endpoint':<16}{'p95 ms':>10}{'base':>10}{'delta':>9}{'rps':>10}{'base':>10}{'delta':>9}")
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        p95_delta = (current["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        rps_delta = (current["throughput_rps"] - base["throughput_rps"]) / base["throughput_rps"] if base["throughput_rps"] else 0.0
+        print(f"{name:<16}{current['p95_ms']:>10.1f}{base['p95_ms']:>10.1f}{p95_delta:>+9.0%}"
+              f"{current['throughput_rps']:>10.1f}{base['throughput_rps']:>10.1f}{rps_delta:>+9.0%}")
+        if p95_delta > tolerance or rps_delta < -tolerance:
+            regressions.append(name)
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the API against an offline fixture stack")
+    parser.add_argument("--papers", type=int, default=2000, help="synthetic papers to seed")
+    parser.add_argument("--pdfs", type=int, default=20, help="papers with a seeded arXiv sidecar and PDF")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", default="query,recommend,assist_read,history,search,collect_daily",
+                        help="comma-separated; also available: collect_monthly")
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake GLM call")
+    parser.add_argument("--workdir", help="defaults to a temporary directory")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--save", metavar="NAME", help="save results as tests/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with tests/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput regression")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_api_")
+    per_month = -(-args.papers // len(MONTHS))
+    papers = [p for i, (year, month) in enumerate(MONTHS)
+              for p in synthetic_papers(per_month, year, month, seed=args.seed + i)][:args.papers]
+    source_pdfs = os.path.join(workdir, "hf_pdfs")
+    os.makedirs(source_pdfs, exist_ok=True)
+    hf = FakeHuggingFace(papers, pdf_dir=source_pdfs).start()
+
+    # The app reads these at import time, so they must be set before importing it
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "HF_BASE_URL": hf.url,
+        "SPIDER_RATE_LIMIT": "0",
+        "ARXIV_PDF_DIR": os.path.join(workdir, "arxiv_pdfs"),
+        "EXTRACT_CACHE_DIR": os.path.join(workdir, "cache", "pdf_text"),
+        "RECOMMEND_INDEX_DIR": os.path.join(workdir, "index"),
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+    })
+    from app import create_app
+    from app.llm import gateway, FakeBackend
+    from app.spider import upsert_papers
+
+    gateway.set_backend(FakeBackend(latency=args.llm_latency))
+    assist_papers = papers[:args.pdfs]
+    seed_arxiv(os.environ["ARXIV_PDF_DIR"], assist_papers, hf.url)
+
+    app = create_app()
+    started = time.perf_counter()
+    with app.app_context():
+        for year, month in MONTHS:
+            upsert_papers(paper_items([p for p in papers if (p["year"], p["month"]) == (year, month)], hf.url), year, month)
+    print(f"Seeded {len(papers)} papers in {time.perf_counter() - started:.1f}s ({workdir})")
+
+    server, base_url = start_server(app)
+    client = Client(base_url, login(base_url))
+    available = scenarios(papers, [p["id"] for p in assist_papers])
+    results = {}
+    try:
+        for i, name in enumerate(n.strip() for n in args.endpoints.split(",") if n.strip()):
+            if name not in available:
+                parser.error(f"unknown endpoint {name!r}, expected one of {', '.join(available)}")
+            results[name] = run_scenario(client, available[name], args.requests, args.concurrency, args.seed + i)
+            r = results[name]
+            print(f"{name:<16} p50 {r['p50_ms']:>8.1f}ms  p95 {r['p95_ms']:>8.1f}ms  p99 {r['p99_ms']:>8.1f}ms  "
+                  f"{r['throughput_rps']:>8.1f} req/s  errors {r['errors']}")
+            if "jobs" in r:
+                print(f"{'':<16} {r['jobs']} jobs, {r['jobs_unfinished']} unfinished, p50 {r['job_p50_s']}s, max {r['job_max_s']}s")
+    finally:
+        server.shutdown()
+        hf.stop()
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "papers": len(papers),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "llm_latency": args.llm_latency,
+        },
+        "results": results,
+    }
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {path}")
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# Micro-benchmark for the Hugging Face page parsers against saved fixtures.
+#
+#   python tests/bench_parser.py --repeat 50
+#
+# Compares app.hf_parser with the previous parsel implementation (kept below as
+# the reference) and checks that both produce the same rows for the markup page.
+# The fixtures are synthetic pages in the huggingface.co markup; hf_month_props.html
+# additionally carries the embedded data-props JSON the live site renders.
+import os
+import sys
+import time
+import argparse
+import statistics
+
+from parsel import Selector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import hf_parser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BASE_URL = "https://huggingface.co"
+
+def reference_listing(content_html: str):
+    response = Selector(content_html)
+    result = []
+    for data in response.xpath('//article[@class="relative flex flex-col overflow-hidden rounded-xl border"]'):
+        try:
+            like_num = int(''.join(data.xpath('.//div[@class="leading-none"]/text()').extract())) if data.xpath('.//div[@class="leading-none"]/text()').extract() else 0
+        except:
+            like_num = 0
+        author_num = ''.join(data.xpath('.//div[contains(@class, "flex truncate text-sm")]/text()').extract()).strip()
+        github_num = ''.join(data.xpath('.//a[contains(@class, "flex translate-y-px items-center")]/span/text()').extract()).strip()
+        comment_num = int(''.join(data.xpath('.//a[@slot="anchor"]/text()').extract()).strip()) if data.xpath('.//a[@slot="anchor"]/text()').extract() else 0
+        link = BASE_URL + data.xpath('.//h3/a/@href').extract_first().strip()
+        img_link = ''.join(data.xpath('./a/img/@src').extract())
+        title = ''.join(data.xpath('.//h3/a/text()').extract()).strip().replace('\n', '').replace('\t', '')
+        result.append({
+            "id": link.split('/')[-1],
+            "link": link.replace('//', '/'),
+            "detail_url": link,
+            "title": title,
+            "like_num": like_num,
+            "img_link": img_link,
+            "author_num": author_num,
+            "github_num": github_num,
+            "comment_num": comment_num,
+        })
+    return result
+
+def reference_detail(content_html: str):
+    response = Selector(content_html)
+    authors = '|'.join([data.strip() for data in response.xpath('//div[@class="relative flex flex-wrap items-center gap-2 text-base leading-tight"]//button/text()').extract()])
+    abstract = ''.join(response.xpath('//p[@class="text-gray-600"]//text()').extract())
+    publish_time = ' '.join(response.xpath('//div[contains(text(), "Published")]//text()').extract())
+    return {"authors": authors, "abstract": abstract, 'publish_time': publish_time}
+
+def load(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Hugging Face HTML parsing")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    month, month_props, detail = load("hf_month.html"), load("hf_month_props.html"), load("hf_detail.html")
+    expected = reference_listing(month)
+    assert hf_parser.parse_listing(month, BASE_URL) == expected, "markup parser differs from reference"
+    assert hf_parser.parse_detail(detail) == reference_detail(detail), "detail parser differs from reference"
+    from_props = hf_parser.parse_listing(month_props, BASE_URL)
+    assert [item["id"] for item in from_props] == [item["id"] for item in expected]
+    print(f"{len(expected)} articles per listing page; {sum('abstract' in i for i in from_props)} complete from data-props")
+
+    cases = [
+        ("listing (markup)", lambda: reference_listing(month), lambda: hf_parser.parse_listing(month, BASE_URL)),
+        ("listing (data-props)", lambda: reference_listing(month_props), lambda: hf_parser.parse_listing(month_props, BASE_URL)),
+        ("detail page", lambda: reference_detail(detail), lambda: hf_parser.parse_detail(detail)),
+    ]
+    print(f"{'case':<22}{'parsel ms':>12}{'fast ms':>12}{'speedup':>10}")
+    for name, reference, fast in cases:
+        before, after = measure(reference, args.repeat), measure(fast, args.repeat)
+        print(f"{name:<22}{before * 1000:>12.2f}{after * 1000:>12.2f}{before / after:>9.1f}x")
+    print("With data-props, the detail pages (one request each) are not fetched at all.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# Shared setup for the pytest suite. The app reads its settings from the
+# environment at import time, so the Hugging Face fake is started and the
+# environment pointed at it and at a scratch directory before anything under
+# app/ is imported. Every test gets empty tables.
+import os
+import sys
+import shutil
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fakes import FakeHuggingFace
+
+WORK_DIR = tempfile.mkdtemp(prefix="papers-tests-")
+os.makedirs(os.path.join(WORK_DIR, "hf_pdfs"))
+HF = FakeHuggingFace([], pdf_dir=os.path.join(WORK_DIR, "hf_pdfs")).start()
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(WORK_DIR, 'papers.db')}",
+    HF_BASE_URL=HF.url,
+    SPIDER_RATE_LIMIT="0",
+    SPIDER_BACKOFF="0",
+    LLM_BACKEND="fake",
+    RECOMMEND_INDEX_DIR=os.path.join(WORK_DIR, "index"),
+    ARXIV_PDF_DIR=os.path.join(WORK_DIR, "arxiv_pdfs"),
+    EXTRACT_CACHE_DIR=os.path.join(WORK_DIR, "pdf_text"),
+    PROFILE_DIR=os.path.join(WORK_DIR, "profiles"),
+)
+
+from app import create_app
+from app.models import db, User
+
+# Live-server smoke script, run by hand against a deployed backend
+collect_ignore = ["test_full.py"]
+
+def pytest_unconfigure(config):
+    HF.stop()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+@pytest.fixture(scope="session")
+def app():
+    return create_app({"TESTING": True})
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield
+        db.session.remove()
+
+@pytest.fixture
+def hf():
+    HF.papers.clear()
+    HF.failing.clear()
+    HF.blocked.clear()
+    HF.requests = 0
+    return HF
+
+@pytest.fixture
+def user(ctx):
+    user = User(username="reader", email="reader@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def auth_headers(app, user):
+    from flask_jwt_extended import create_access_token
+    token = create_access_token(identity=user.username, additional_claims={"uid": user.id})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,202 @@
+# Offline stand-ins for the services the backend talks to. FakeHuggingFace serves
+# listing, detail and PDF pages shaped like the real huggingface.co markup,
+# seed_arxiv() pre-populates the arXiv metadata sidecars so no API lookups happen,
+# and GLM is covered by LLM_BACKEND=fake. Nothing here imports the app, so the
+# fakes can be started before the app reads its environment.
+import os
+import json
+import hashlib
+import random
+import threading
+from datetime import date
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import fitz
+
+TOPICS = [
+    "diffusion", "transformer", "reinforcement learning", "image generation", "video generation",
+    "language model", "retrieval", "agents", "reasoning", "multimodal", "speech", "3d reconstruction",
+    "robotics", "code generation", "alignment", "quantization", "distillation", "benchmark",
+]
+NOUNS = ["framework", "model", "dataset", "method", "approach", "pipeline", "study", "system"]
+FIRST_NAMES = ["Wei", "Anna", "Ravi", "Lena", "Jun", "Omar", "Sara", "Ivan", "Mei", "Tom"]
+LAST_NAMES = ["Zhang", "Smith", "Kumar", "Müller", "Chen", "Haddad", "Rossi", "Petrov", "Li", "Brown"]
+
+def published_on(day: date) -> str:
+    return f"Published on {day:%b} {day.day}, {day.year}"
+
+def synthetic_papers(n: int, year: int = 2025, month: int = 9, seed: int = 7) -> List[Dict]:
+    rng = random.Random(seed)
+    papers = []
+    for i in range(n):
+        topic_a, topic_b = rng.sample(TOPICS, 2)
+        day = 1 + i % 28
+        authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 8))]
+        papers.append({
+            "id": f"{year % 100:02d}{month:02d}.{i:05d}",
+            "title": f"{topic_a.title()} {rng.choice(NOUNS)} for {topic_b}",
+            "authors": authors,
+            "abstract": (
+                f"We study {topic_a} in the context of {topic_b}. "
+                f"Our {rng.choice(NOUNS)} improves over prior work on {rng.choice(TOPICS)} "
+                f"and is evaluated on {rng.randint(2, 9)} benchmarks."
+            ),
+            "published": date(year, month, day),
+            "like_num": int(rng.paretovariate(1.2)) - 1,
+            "comment_num": rng.randint(0, 6),
+            "github_num": str(rng.choice([0, 0, 12, 150, 1200])) if rng.random() < 0.6 else "",
+            "year": year,
+            "month": month,
+        })
+    return papers
+
+# Rows in the shape spider.upsert_papers expects
+def paper_items(papers: List[Dict], base_url: str) -> List[Dict]:
+    return [{
+        "id": p["id"],
+        "title": p["title"],
+        "authors": "|".join(p["authors"]),
+        "abstract": p["abstract"],
+        "link": f"{base_url}/papers/{p['id']}",
+        "publish_time": published_on(p["published"]),
+        "like_num": p["like_num"],
+        "author_num": f"{len(p['authors'])} authors",
+        "github_num": p["github_num"],
+        "comment_num": p["comment_num"],
+        "img_link": f"{base_url}/img/{p['id']}.png",
+    } for p in papers]
+
+def listing_html(papers: List[Dict]) -> str:
+    articles = []
+    for p in papers:
+        github = (f'<a class="flex translate-y-px items-center gap-1" href="#"><span>{p["github_num"]}</span></a>'
+                  if p["github_num"] else "")
+        articles.append(f"""
+<article class="relative flex flex-col overflow-hidden rounded-xl border">
+  <a href="/papers/{p['id']}"><img src="/img/{p['id']}.png"></a>
+  <div class="leading-none">{p['like_num']}</div>
+  <div class="flex truncate text-sm text-gray-500">{len(p['authors'])} authors</div>
+  {github}
+  <a slot="anchor" href="/papers/{p['id']}#community">{p['comment_num']}</a>
+  <h3><a href="/papers/{p['id']}">{escape(p['title'])}</a></h3>
+</article>""")
+    return f"<html><body>{''.join(articles)}</body></html>"
+
+def detail_html(paper: Dict) -> str:
+    buttons = "".join(f"<button>{escape(name)}</button>" for name in paper["authors"])
+    return f"""<html><body>
+<div class="relative flex flex-wrap items-center gap-2 text-base leading-tight">{buttons}</div>
+<div>{published_on(paper['published'])}</div>
+<p class="text-gray-600">{escape(paper['abstract'])}</p>
+</body></html>"""
+
+def write_pdf(path: str, paper: Dict):
+    sections = [
+        ("Abstract", paper["abstract"]),
+        ("1 Introduction", f"{paper['title']} addresses an open problem. " * 30),
+        ("2 Method", "We propose a layered architecture with a novel objective. " * 40),
+        ("3 Experiments", "Accuracy improves by 3.1 points on every benchmark considered. " * 40),
+        ("4 Conclusion", "We presented a simple method and leave scaling to future work. " * 10),
+        ("References", "[1] A. Author. A paper. 2024. " * 20),
+    ]
+    doc = fitz.open()
+    for heading, body in sections:
+        page = doc.new_page()
+        page.insert_text((72, 72), heading, fontsize=14, fontname="helv")
+        page.insert_textbox(fitz.Rect(72, 90, page.rect.width - 72, page.rect.height - 72), body, fontsize=10, fontname="helv")
+    doc.save(path)
+    doc.close()
+
+# Writes a metadata sidecar and a small sectioned PDF per paper, exactly where
+# spider.download_arxiv_pdf looks before calling the arXiv API
+def seed_arxiv(directory: str, papers: List[Dict], base_url: str):
+    os.makedirs(directory, exist_ok=True)
+    for p in papers:
+        with open(os.path.join(directory, f"{p['id']}.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "title": p["title"],
+                "authors": p["authors"],
+                "pdf_url": f"{base_url}/pdf/{p['id']}.pdf",
+                "published": p["published"].isoformat(),
+            }, f, ensure_ascii=False)
+        pdf_path = os.path.join(directory, f"{p['id']}.pdf")
+        if not os.path.exists(pdf_path):
+            write_pdf(pdf_path, p)
+
+# Threaded HTTP server for /papers/month/..., /papers/date/..., /papers/<id> and /pdf/<id>.pdf
+class FakeHuggingFace:
+    def __init__(self, papers: List[Dict], pdf_dir: Optional[str] = None, host: str = "127.0.0.1", port: int = 0):
+        self.papers = {p["id"]: p for p in papers}
+        self.pdf_dir = pdf_dir
+        self.requests = 0
+        self.failing = set()  # paper ids whose detail page answers 404
+        self.blocked = set()  # listing paths answering 403 with an HTML block page
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake.requests += 1
+                status, body, content_type = fake.route(self.path)
+                # Listing pages carry an ETag and honour If-None-Match, like the real site
+                etag = f'"{hashlib.md5(body).hexdigest()}"' if self.path.startswith("/papers/") and status == 200 else None
+                if etag and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                if status != 304:
+                    self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, path: str):
+        path = path.split("?")[0]
+        html = "text/html; charset=utf-8"
+        if path in self.blocked:
+            return 403, b"<html><body>Access denied</body></html>", html
+        if path.startswith("/papers/month/"):
+            year, month = (int(x) for x in path.rsplit("/", 1)[1].split("-"))
+            papers = [p for p in self.papers.values() if (p["year"], p["month"]) == (year, month)]
+            return 200, listing_html(papers).encode(), html
+        if path.startswith("/papers/date/"):
+            day = date.fromisoformat(path.rsplit("/", 1)[1])
+            papers = [p for p in self.papers.values() if p["published"] == day]
+            return 200, listing_html(papers).encode(), html
+        if path.startswith("/papers/"):
+            paper = self.papers.get(path.rsplit("/", 1)[1])
+            if paper and paper["id"] not in self.failing:
+                return 200, detail_html(paper).encode(), html
+        if path.startswith("/pdf/") and self.pdf_dir:
+            paper = self.papers.get(path.rsplit("/", 1)[1][:-len(".pdf")])
+            if paper:
+                pdf_path = os.path.join(self.pdf_dir, f"{paper['id']}.pdf")
+                if not os.path.exists(pdf_path):
+                    write_pdf(pdf_path, paper)
+                with open(pdf_path, "rb") as f:
+                    return 200, f.read(), "application/pdf"
+        return 404, b"not found", "text/plain"
+
+    def start(self) -> "FakeHuggingFace":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
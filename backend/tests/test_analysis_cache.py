@@ -0,0 +1,117 @@
+import time
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.analysis_cache import AnalysisResultCache, SingleFlight
+from app.models import db, AnalysisCache
+
+ANALYSIS = {"abstract_summary": "S"}
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF-1.4 one")
+    return str(path)
+
+def test_results_are_keyed_by_paper_pdf_and_prompt(ctx, pdf, tmp_path):
+    cache, calls = AnalysisResultCache(), []
+
+    def compute():
+        calls.append(1)
+        return dict(ANALYSIS, n=len(calls))
+    assert cache.get_or_compute("2509.00001", pdf, "v1", compute)["n"] == 1
+    assert cache.get_or_compute("2509.00001", pdf, "v1", compute)["n"] == 1
+    assert cache.get_or_compute("2509.00001", pdf, "v2", compute)["n"] == 2
+    revised = tmp_path / "revised.pdf"
+    revised.write_bytes(b"%PDF-1.4 two")
+    assert cache.get_or_compute("2509.00001", str(revised), "v1", compute)["n"] == 3
+    assert cache.stats()["hits"] == 1 and cache.stats()["stores"] == 3
+
+def test_empty_results_are_not_stored(ctx, pdf):
+    cache = AnalysisResultCache()
+    assert cache.get_or_compute("2509.00001", pdf, "v1", dict) == {}
+    assert AnalysisCache.query.count() == 0
+
+def test_expired_entries_are_dropped(ctx):
+    cache = AnalysisResultCache(ttl_days=1)
+    cache.put("2509.00001", "hash", "v1", ANALYSIS)
+    db.session.get(AnalysisCache, ("2509.00001", "hash", "v1")).created_at = datetime.utcnow() - timedelta(days=2)
+    db.session.commit()
+    assert cache.get("2509.00001", "hash", "v1") is None
+    assert AnalysisCache.query.count() == 0
+
+def test_least_recently_used_entries_are_evicted(ctx):
+    cache = AnalysisResultCache(max_entries=2)
+    cache.put("old", "hash", "v1", ANALYSIS)
+    cache.put("used", "hash", "v1", ANALYSIS)
+    time.sleep(0.01)
+    assert cache.get("old", "hash", "v1") == ANALYSIS
+    cache.put("new", "hash", "v1", ANALYSIS)
+    assert sorted(entry.arxiv_id for entry in AnalysisCache.query) == ["new", "old"]
+    assert cache.stats()["evictions"] == 1
+
+def test_concurrent_misses_compute_once(app, ctx, pdf):
+    cache, release, calls, results = AnalysisResultCache(), threading.Event(), [], []
+
+    def compute():
+        calls.append(1)
+        release.wait(10)
+        return ANALYSIS
+
+    def read():
+        with app.app_context():
+            results.append(cache.get_or_compute("2509.00001", pdf, "v1", compute))
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    assert calls == [1] and results == [ANALYSIS] * 3
+    assert cache.stats()["coalesced"] == 2
+
+def test_waiters_see_the_leaders_error():
+    flight, started, release = SingleFlight(), threading.Event(), threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        release.wait(10)
+        raise RuntimeError("backend down")
+
+    def call():
+        try:
+            flight.do("key", fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(10)
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(10)
+    follower.join(10)
+    assert errors == ["backend down"] * 2
+    assert flight.do("key", lambda: "next") == ("next", True)
+
+def test_claim_hands_the_leaders_result_to_followers(app, ctx):
+    cache = AnalysisResultCache()
+    analysis, done = cache.claim("2509.00001", "hash", "v1")
+    assert analysis is None and done is not None
+    followers = []
+
+    def follow():
+        with app.app_context():
+            followers.append(cache.claim("2509.00001", "hash", "v1"))
+    thread = threading.Thread(target=follow)
+    thread.start()
+    time.sleep(0.05)
+    done(ANALYSIS)
+    thread.join(10)
+    assert followers == [(ANALYSIS, None)]
+    assert cache.claim("2509.00001", "hash", "v1") == (ANALYSIS, None)
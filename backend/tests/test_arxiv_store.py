@@ -0,0 +1,64 @@
+import os
+import json
+
+import pytest
+
+from fakes import synthetic_papers
+from app import spider
+from app.spider import arxiv_metadata, download_arxiv_pdf, evict_pdfs
+
+PAPER = synthetic_papers(1, 2025, 9, seed=3)[0]
+ARXIV_ID = PAPER["id"]
+
+@pytest.fixture
+def arxiv_api(hf, monkeypatch):
+    hf.papers[ARXIV_ID] = PAPER
+    lookups = []
+
+    def lookup(arxiv_id):
+        lookups.append(arxiv_id)
+        if spider.clean_arxiv_id(arxiv_id) != ARXIV_ID:
+            return None
+        return {"title": PAPER["title"], "authors": PAPER["authors"],
+                "pdf_url": f"{hf.url}/pdf/{ARXIV_ID}.pdf", "published": "2025-09-01"}
+    monkeypatch.setattr(spider, "lookup_arxiv_metadata", lookup)
+    return lookups
+
+def test_metadata_is_looked_up_once_and_kept_in_a_sidecar(tmp_path, arxiv_api):
+    first = arxiv_metadata(f"{ARXIV_ID}v2", str(tmp_path))
+    assert first["arxiv_id"] == ARXIV_ID and first["title"] == PAPER["title"]
+    with open(tmp_path / f"{ARXIV_ID}.json", encoding="utf-8") as f:
+        assert json.load(f)["title"] == PAPER["title"]
+    assert arxiv_metadata(ARXIV_ID, str(tmp_path)) == first
+    assert arxiv_api == [f"{ARXIV_ID}v2"]
+
+def test_unknown_ids_leave_nothing_behind(tmp_path, arxiv_api):
+    assert arxiv_metadata("2509.99999", str(tmp_path)) is None
+    assert "error" in download_arxiv_pdf("2509.99999", str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+def test_pdf_is_downloaded_once(tmp_path, hf, arxiv_api):
+    info = download_arxiv_pdf(ARXIV_ID, str(tmp_path))
+    assert info["pdf_path"] == str(tmp_path / f"{ARXIV_ID}.pdf")
+    with open(info["pdf_path"], "rb") as f:
+        assert f.read(5) == b"%PDF-"
+    hf.requests = 0
+    os.utime(info["pdf_path"], (1000, 1000))
+    assert download_arxiv_pdf(ARXIV_ID, str(tmp_path)) == info
+    assert hf.requests == 0
+    # A cache hit counts as a use for eviction
+    assert os.path.getmtime(info["pdf_path"]) > 1000
+
+def test_failed_download_leaves_no_partial_file(tmp_path, hf, arxiv_api):
+    hf.papers.clear()  # the PDF route now answers 404
+    assert "error" in download_arxiv_pdf(ARXIV_ID, str(tmp_path))
+    assert os.listdir(tmp_path) == [f"{ARXIV_ID}.json"]
+
+def test_eviction_drops_least_recently_used_pdfs_but_keeps_sidecars(tmp_path):
+    for i, name in enumerate(["old", "used", "new"]):
+        (tmp_path / f"{name}.pdf").write_bytes(b"x" * 100)
+        (tmp_path / f"{name}.json").write_text("{}")
+        os.utime(tmp_path / f"{name}.pdf", (1000 + i, 1000 + i))
+    os.utime(tmp_path / "used.pdf", (2000, 2000))
+    evict_pdfs(str(tmp_path), max_bytes=250, keep=str(tmp_path / "new.pdf"))
+    assert sorted(os.listdir(tmp_path)) == ["new.json", "new.pdf", "old.json", "used.json", "used.pdf"]
@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import threading
+
+import pytest
+
+from fakes import seed_arxiv, synthetic_papers
+from app import routes
+from app.analysis import CONTENT_FIELDS
+from app.analysis_cache import analysis_cache
+from app.history import history_writer
+from app.llm import LLMError
+from app.models import db, Paper
+from app.spider import ARXIV_PDF_DIR
+from app.structured import parse_stats
+
+PAPER = synthetic_papers(1, 2025, 9, seed=11)[0]
+ARXIV_ID = PAPER["id"]
+ANALYSIS = {"abstract_summary": "Summary"}
+
+def events(response):
+    parsed = []
+    for block in response.get_data(as_text=True).strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        parsed.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return parsed
+
+def names(sent):
+    return [name for name, _ in sent]
+
+@pytest.fixture
+def client(app, ctx):
+    db.session.execute(Paper.__table__.insert(), [{"id": ARXIV_ID, "title": PAPER["title"], "year": 2025, "month": 9}])
+    db.session.commit()
+    yield app.test_client()
+    history_writer.flush()
+
+# Sidecar and PDF on disk, as after a first read; the arXiv API is never called
+@pytest.fixture
+def seeded(hf, monkeypatch):
+    hf.papers[ARXIV_ID] = PAPER
+    seed_arxiv(ARXIV_PDF_DIR, [PAPER], hf.url)
+    monkeypatch.setattr("app.spider.lookup_arxiv_metadata", pytest.fail)
+    return os.path.join(ARXIV_PDF_DIR, f"{ARXIV_ID}.pdf")
+
+def stream(client, headers):
+    return events(client.post("/api/assist/read/stream", json={"arxiv_id": ARXIV_ID}, headers=headers))
+
+def test_stream_analyzes_and_caches(client, auth_headers, seeded):
+    sent = stream(client, auth_headers)
+    assert names(sent)[:4] == ["metadata", "pdf_ready", "extracted", "token"]
+    assert names(sent)[-2:] == ["analysis", "done"]
+    assert set(sent[-2][1]) == set(CONTENT_FIELDS)
+    # The second read is served from the analysis cache, without tokens
+    assert names(stream(client, auth_headers)) == ["metadata", "pdf_ready", "analysis", "done"]
+
+def test_metadata_is_sent_before_the_pdf_download(client, auth_headers, seeded):
+    os.remove(seeded)
+    response = client.post("/api/assist/read/stream", json={"arxiv_id": ARXIV_ID}, headers=auth_headers, buffered=False)
+    body = iter(response.response)
+    first = next(body).decode()
+    assert first.startswith("event: metadata")
+    assert PAPER["title"] in first
+    assert not os.path.exists(seeded)
+    rest = "".join(chunk.decode() for chunk in body)
+    response.close()
+    assert "event: pdf_ready" in rest
+    assert os.path.exists(seeded)
+
+def test_stream_falls_back_when_the_reply_does_not_parse(client, auth_headers, seeded, monkeypatch):
+    monkeypatch.setattr(routes, "content_analysis_stream", lambda content: iter(["not", " json"]))
+    monkeypatch.setattr(routes, "content_analysis", lambda content: ANALYSIS)
+    reprompts = parse_stats.stats()["reprompts"]
+    sent = stream(client, auth_headers)
+    assert names(sent)[-2:] == ["analysis", "done"]
+    assert sent[-2][1] == ANALYSIS
+    assert parse_stats.stats()["reprompts"] == reprompts + 1
+
+def test_stream_reports_llm_failures_without_reprompting(client, auth_headers, seeded, monkeypatch):
+    def failing_stream(content):
+        yield '{"abstract_summary": '
+        raise LLMError("APIConnectionError: connection reset")
+    monkeypatch.setattr(routes, "content_analysis_stream", failing_stream)
+    monkeypatch.setattr(routes, "content_analysis", pytest.fail)
+    reprompts = parse_stats.stats()["reprompts"]
+    sent = stream(client, auth_headers)
+    assert sent[-1][0] == "error"
+    assert "connection reset" in sent[-1][1]["error"]
+    assert "done" not in names(sent)
+    assert parse_stats.stats()["reprompts"] == reprompts
+
+def test_concurrent_streams_share_one_completion(app, client, auth_headers, seeded, monkeypatch):
+    calls, release = [], threading.Event()
+
+    def slow_stream(content):
+        calls.append(content)
+        release.wait(10)
+        yield json.dumps(ANALYSIS)
+    monkeypatch.setattr(routes, "content_analysis_stream", slow_stream)
+    coalesced = analysis_cache.stats()["coalesced"]
+    results = []
+
+    def read():
+        with app.app_context():
+            results.append(stream(app.test_client(), auth_headers))
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 10
+    while analysis_cache.stats()["coalesced"] == coalesced and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(calls) == 1
+    assert [names(sent)[-2:] for sent in results] == [["analysis", "done"]] * 2
+    assert results[0][-2][1] == results[1][-2][1]
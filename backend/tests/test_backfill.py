@@ -0,0 +1,32 @@
+from datetime import date
+
+import pytest
+import requests
+
+import backfill
+from fakes import synthetic_papers
+
+@pytest.fixture
+def papers(hf):
+    papers = synthetic_papers(60, 2025, 9)
+    hf.papers.update({p["id"]: p for p in papers})
+    return papers
+
+def test_units_cover_the_range_up_to_today():
+    assert list(backfill.iter_units(date(2024, 11, 1), date(2025, 2, 1), daily=False)) == [
+        (2024, 11, 0), (2024, 12, 0), (2025, 1, 0), (2025, 2, 0)]
+    days = list(backfill.iter_units(date(2024, 2, 1), date(2024, 2, 1), daily=True))
+    assert days[0] == (2024, 2, 1) and days[-1] == (2024, 2, 29)
+
+def test_backfill_checkpoints_only_clean_units(app, ctx, hf, papers):
+    hf.failing.add(next(p["id"] for p in papers if p["published"] == date(2025, 9, 3)))
+    failed = backfill.crawl_unit(app, (2025, 9, 3))
+    clean = backfill.crawl_unit(app, (2025, 9, 4))
+    assert failed.errors and not clean.errors
+    assert backfill.completed_units() == {(2025, 9, 4)}
+
+def test_blocked_listing_is_not_checkpointed(app, ctx, hf, papers):
+    hf.blocked.add("/papers/date/2025-09-03")
+    with pytest.raises(requests.HTTPError):
+        backfill.crawl_unit(app, (2025, 9, 3))
+    assert backfill.completed_units() == set()
@@ -0,0 +1,36 @@
+from bench_parser import BASE_URL, load, reference_detail, reference_listing
+from fakes import detail_html, listing_html, synthetic_papers
+from app import hf_parser
+from app.normalize import parse_published
+
+# The fast parser must return exactly what the parsel implementation did
+def test_markup_listing_matches_the_reference():
+    month = load("hf_month.html")
+    assert hf_parser.parse_listing(month, BASE_URL) == reference_listing(month)
+
+def test_detail_matches_the_reference():
+    detail = load("hf_detail.html")
+    assert hf_parser.parse_detail(detail) == reference_detail(detail)
+
+def test_generated_pages_match_the_reference():
+    papers = synthetic_papers(12, 2025, 9, seed=4)
+    listing = listing_html(papers)
+    assert hf_parser.parse_listing(listing, BASE_URL) == reference_listing(listing)
+    for paper in papers[:3]:
+        assert hf_parser.parse_detail(detail_html(paper)) == reference_detail(detail_html(paper))
+
+def test_data_props_listing_is_complete():
+    items = hf_parser.parse_listing(load("hf_month_props.html"), BASE_URL)
+    assert [item["id"] for item in items] == [item["id"] for item in reference_listing(load("hf_month.html"))]
+    item = items[0]
+    assert item["authors"] and item["abstract"]
+    assert parse_published(item["publish_time"]) is not None
+
+def test_broken_props_fall_back_to_the_markup():
+    month = load("hf_month.html").replace("<body>", "<body><div data-props='{not json'></div>", 1)
+    assert hf_parser.parse_listing(month, BASE_URL) == reference_listing(load("hf_month.html"))
+
+def test_empty_pages_parse_to_nothing():
+    assert hf_parser.parse_listing("", BASE_URL) == []
+    assert hf_parser.parse_listing("<html><body>Access denied</body></html>", BASE_URL) == []
+    assert hf_parser.parse_detail("   ") == {"authors": "", "abstract": "", "publish_time": ""}
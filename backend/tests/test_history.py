@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.history import HistoryWriter
+from app.models import db, History, Paper
+from app.summaries import save_summary
+
+@pytest.fixture
+def papers(ctx):
+    db.session.execute(Paper.__table__.insert(), [
+        {"id": f"2509.0000{i}", "title": f"Paper {i}", "like_num": i, "year": 2025, "month": 9} for i in range(3)
+    ])
+    db.session.commit()
+    return ["2509.00000", "2509.00001", "2509.00002"]
+
+@pytest.fixture
+def writer():
+    # Not bound to the app, so no background thread: tests flush by hand
+    return HistoryWriter()
+
+def test_rereads_are_deduped_in_the_buffer_and_in_the_table(user, papers, writer):
+    started = datetime(2025, 9, 1)
+    writer.record(user.id, papers[0], started)
+    writer.record(user.id, papers[1], started)
+    writer.record(user.id, papers[0], started + timedelta(minutes=1))
+    assert writer.stats()["deduped"] == 1
+    assert writer.flush() == 2
+
+    writer.record(user.id, papers[0], started + timedelta(hours=1))
+    assert writer.flush() == 1
+    stats = writer.stats()
+    assert (stats["inserted"], stats["updated"], stats["pending"]) == (2, 1, 0)
+    rows = History.query.filter_by(user_id=user.id, arxiv_id=papers[0]).all()
+    assert len(rows) == 1
+    assert rows[0].access_time == started + timedelta(hours=1)
+
+def test_reads_of_unknown_papers_are_skipped(user, papers, writer):
+    writer.record(user.id, "9999.99999")
+    writer.flush()
+    assert History.query.count() == 0
+
+def test_reads_without_a_user_are_rejected(papers, writer):
+    writer.record(None, papers[0])
+    assert writer.stats()["rejected"] == 1
+    assert writer.flush() == 0
+
+def test_a_row_breaking_a_constraint_does_not_block_the_batch(user, papers, writer):
+    writer.record(user.id, papers[0])
+    # Slipped past record(), e.g. queued before the check existed
+    writer._pending[(None, papers[1])] = datetime.utcnow()
+    writer.record(user.id, papers[2])
+    assert writer.flush() == 2
+    stats = writer.stats()
+    assert (stats["rejected"], stats["failed"], stats["pending"]) == (1, 0, 0)
+    assert History.query.count() == 2
+
+def test_has_pending(user, papers, writer):
+    writer.record(user.id, papers[0])
+    assert writer.has_pending(user.id)
+    assert not writer.has_pending(user.id + 1)
+
+def test_history_shows_a_read_right_away(app, user, papers, auth_headers):
+    info = {"arxiv_id": papers[1], "title": "Paper 1", "authors": [], "pdf_url": f"https://arxiv.org/pdf/{papers[1]}",
+            "published": "2025-09-01"}
+    save_summary(info, "hash", {"abstract_summary": "Stored summary"})
+    client = app.test_client()
+    client.post("/api/assist/read", json={"arxiv_id": papers[1]}, headers=auth_headers)
+    response = client.get("/api/history", headers=auth_headers)
+    assert [row["arxiv_id"] for row in response.json] == [papers[1]]
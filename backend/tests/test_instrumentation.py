@@ -0,0 +1,74 @@
+import os
+import time
+
+from flask import Flask, Response, stream_with_context
+
+from app import instrumentation
+from app.instrumentation import REQUEST_SECONDS, Registry, span
+
+def make_app():
+    app = Flask(__name__)
+    instrumentation.init_app(app)
+
+    @app.route("/plain")
+    def plain():
+        with span("work"):
+            time.sleep(0.01)
+        return "ok"
+
+    @app.route("/stream")
+    def stream():
+        def body():
+            for chunk in ("a", "b"):
+                time.sleep(0.05)
+                yield chunk
+        return Response(stream_with_context(body()), mimetype="text/plain")
+    return app
+
+def request_count(endpoint):
+    return sum(state[2] for labels, state in REQUEST_SECONDS._values.items() if labels[1] == endpoint)
+
+def request_seconds(endpoint):
+    return sum(state[1] for labels, state in REQUEST_SECONDS._values.items() if labels[1] == endpoint)
+
+def test_render_uses_the_prometheus_text_format():
+    registry = Registry()
+    counter = registry.counter("jobs_total", "Jobs run.", ("kind",))
+    histogram = registry.histogram("job_seconds", "Job time.", buckets=(0.1, 1))
+    counter.inc('say "hi"')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Jobs run.",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="say \\"hi\\""} 1',
+        "# HELP job_seconds Job time.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.1"} 1',
+        'job_seconds_bucket{le="1"} 2',
+        'job_seconds_bucket{le="+Inf"} 2',
+        "job_seconds_sum 0.55",
+        "job_seconds_count 2",
+    ]
+
+def test_spans_show_up_in_server_timing():
+    response = make_app().test_client().get("/plain")
+    timings = dict(part.split(";dur=") for part in response.headers["Server-Timing"].split(", "))
+    assert set(timings) == {"work", "total"}
+    assert float(timings["work"]) >= 10
+    assert request_count("/plain") >= 1
+
+def test_streamed_response_is_recorded_when_the_body_finishes(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "PROFILE_SLOW_MS", 60)
+    monkeypatch.setattr(instrumentation, "PROFILE_DIR", str(tmp_path))
+    count, seconds = request_count("/stream"), request_seconds("/stream")
+    response = make_app().test_client().get("/stream", buffered=False)
+    assert "headers;dur=" in response.headers["Server-Timing"]
+    assert request_count("/stream") == count
+    assert response.get_data(as_text=True) == "ab"
+    response.close()
+    assert request_count("/stream") == count + 1
+    assert request_seconds("/stream") - seconds >= 0.1
+    # The profiler kept sampling while the body ran, so the slow stream was dumped
+    [profile] = os.listdir(tmp_path)
+    assert "body" in open(tmp_path / profile, encoding="utf-8").read()
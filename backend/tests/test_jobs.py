@@ -0,0 +1,82 @@
+import time
+import threading
+
+import pytest
+
+from app.jobs import JobQueue, StoredJob
+from app.models import db, JobRecord
+
+@pytest.fixture
+def workers(app, ctx):
+    # Two worker processes sharing one database
+    queues = [JobQueue(max_workers=2, sync_interval=0.05, stale_seconds=1) for _ in range(2)]
+    for queue in queues:
+        queue.init_app(app)
+    yield queues
+    app.extensions["job_queue"] = None
+
+def crawl(release, progress=None):
+    progress.advance(total=4)
+    release.wait(10)
+    progress.advance(pages=4, upserted=7)
+    return {"inserted": 7}
+
+def wait_for(queue, job_id, done):
+    deadline = time.time() + 10
+    while not done(queue.get(job_id).to_dict()) and time.time() < deadline:
+        time.sleep(0.02)
+        db.session.remove()
+    return queue.get(job_id).to_dict()
+
+def status_is(status):
+    return lambda state: state["status"] == status
+
+def test_submissions_coalesce_across_workers(workers):
+    release = threading.Event()
+    first = workers[0].submit(("monthly", 2025, 9), "monthly", crawl, release)
+    again = workers[0].submit(("monthly", 2025, 9), "monthly", crawl, release)
+    elsewhere = workers[1].submit(("monthly", 2025, 9), "monthly", crawl, release)
+    other = workers[1].submit(("monthly", 2025, 10), "monthly", crawl, release)
+    assert again is first
+    assert isinstance(elsewhere, StoredJob) and elsewhere.id == first.id
+    assert other.id != first.id
+    release.set()
+    assert wait_for(workers[0], other.id, status_is("done"))["result"] == {"inserted": 7}
+
+def test_any_worker_reports_progress_and_the_result(workers):
+    release = threading.Event()
+    job = workers[0].submit(("daily", 2025, 9, 3), "daily", crawl, release)
+    assert wait_for(workers[1], job.id, lambda state: state["pages_total"])["status"] == "running"
+    release.set()
+    state = wait_for(workers[1], job.id, status_is("done"))
+    assert (state["pages_fetched"], state["papers_upserted"], state["result"]) == (4, 7, {"inserted": 7})
+    assert db.session.get(JobRecord, job.id).active_key is None
+    # A finished job no longer coalesces
+    assert workers[1].submit(("daily", 2025, 9, 3), "daily", crawl, release).id != job.id
+
+def test_failures_are_recorded(workers):
+    def broken(progress=None):
+        raise ValueError("listing changed")
+    job = workers[0].submit(("daily", 2025, 9, 4), "daily", broken)
+    state = wait_for(workers[1], job.id, status_is("failed"))
+    assert state["errors"] == ["ValueError: listing changed"]
+
+def test_a_job_whose_worker_died_is_failed_and_replaced(workers):
+    release = threading.Event()
+    stale = workers[0].submit(("monthly", 2025, 8), "monthly", crawl, release)
+    wait_for(workers[1], stale.id, lambda state: state["pages_total"])
+    # The process running it stops saving, as if it had died
+    workers[0]._save_lock.acquire()
+    try:
+        db.session.execute(JobRecord.__table__.update().where(JobRecord.id == stale.id).values(updated_at=time.time() - 5))
+        db.session.commit()
+        assert workers[1].get(stale.id).status == "failed"
+        release.set()
+        replacement = workers[1].submit(("monthly", 2025, 8), "monthly", crawl, release)
+        assert replacement.id != stale.id
+        assert wait_for(workers[1], replacement.id, status_is("done"))["result"] == {"inserted": 7}
+    finally:
+        workers[0]._save_lock.release()
+
+def test_unknown_job_is_none(workers):
+    assert workers[0].get("missing") is None
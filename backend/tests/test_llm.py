@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from app import analysis
+from app.llm import CircuitBreaker, CircuitOpenError, FakeBackend, LLMError, LLMGateway, TransientLLMError
+
+class BrokenBackend:
+    name = "broken"
+
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    def complete(self, messages, timeout):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return "ok", {"prompt_tokens": 1, "completion_tokens": 1}
+
+    def stream(self, messages, timeout):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        yield "ok"
+
+def gateway_for(backend, **kwargs) -> LLMGateway:
+    kwargs.setdefault("breaker", CircuitBreaker(threshold=1, reset_timeout=0.05))
+    return LLMGateway(backend=backend, backoff_base=0, **kwargs)
+
+def test_transient_errors_are_retried():
+    backend = BrokenBackend(TransientLLMError("busy"))
+    gateway = gateway_for(backend, max_retries=2, breaker=CircuitBreaker(threshold=10))
+    with pytest.raises(TransientLLMError):
+        gateway.complete("system", "content")
+    assert backend.calls == 3
+    assert gateway.stats()["retries"] == 2
+
+def test_open_breaker_rejects_until_the_trial_call():
+    backend = BrokenBackend(TransientLLMError("APIInternalError: 500"))
+    gateway = gateway_for(backend, max_retries=0)
+    with pytest.raises(LLMError):
+        gateway.complete("system", "content")
+    with pytest.raises(CircuitOpenError):
+        gateway.complete("system", "content")
+    assert backend.calls == 1
+
+    time.sleep(0.06)
+    backend.error = None
+    assert gateway.complete("system", "content") == "ok"
+    assert gateway.breaker.state == "closed"
+
+def test_refused_requests_do_not_open_the_breaker():
+    backend = BrokenBackend(LLMError("APIRequestFailedError: content filter"))
+    gateway = gateway_for(backend, max_retries=0, breaker=CircuitBreaker(threshold=2))
+    for _ in range(5):
+        with pytest.raises(LLMError) as raised:
+            gateway.complete("system", "content")
+        assert not isinstance(raised.value, CircuitOpenError)
+    assert backend.calls == 5
+    assert gateway.breaker.state == "closed"
+    assert gateway.stats()["failures"] == 5
+
+@pytest.mark.parametrize("error", [IndexError("list index out of range"), AttributeError("choices")])
+def test_unexpected_errors_release_the_half_open_trial(error):
+    backend = BrokenBackend(error)
+    gateway = gateway_for(backend, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(LLMError):
+            gateway.complete("system", "content")
+        time.sleep(0.06)
+    assert backend.calls == 2
+    assert gateway.breaker.state == "half_open"
+    assert not gateway.breaker._trial_in_flight
+
+    backend.error = None
+    assert gateway.complete("system", "content") == "ok"
+
+def test_stream_errors_are_llm_errors():
+    gateway = gateway_for(BrokenBackend(IndexError("no choices")), max_retries=0)
+    with pytest.raises(LLMError):
+        list(gateway.stream("system", "content"))
+
+def test_glm_analysis_swallows_backend_bugs(monkeypatch):
+    monkeypatch.setattr(analysis, "gateway", gateway_for(BrokenBackend(IndexError("no choices")), max_retries=0))
+    assert analysis.glm_analysis("content", analysis.CONTENT_ANALYSIS_PROMPT) == {}
+
+def test_content_analysis_with_the_fake_backend(monkeypatch):
+    monkeypatch.setattr(analysis, "gateway", gateway_for(FakeBackend()))
+    result = analysis.content_analysis("Some paper text")
+    assert set(result) == set(analysis.CONTENT_FIELDS)
+    assert result["datasets"] == "SyntheticSet"
@@ -0,0 +1,41 @@
+import math
+from datetime import date
+
+import pytest
+
+from app.normalize import TRENDING_DECAY_DAYS, parse_count, parse_published, trending_score, typed_fields
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 0), ("", 0), ("n/a", 0), (7, 7), (3.9, 3),
+    ("5 authors", 5), ("1,234", 1234), ("1.2k", 1200), ("2.5M stars", 2_500_000), ("12 K", 12_000),
+])
+def test_parse_count(value, expected):
+    assert parse_count(value) == expected
+
+@pytest.mark.parametrize("value, default_year, expected", [
+    ("Published on Sep 2, 2025", None, date(2025, 9, 2)),
+    ("Published on September 2nd, 2024", 2025, date(2024, 9, 2)),
+    ("Submitted by someone on Jan 5", 2025, date(2025, 1, 5)),
+    ("Submitted by someone on Jan 5", None, None),
+    ("Published on Sept. 30", 2025, None),
+    ("Published on Feb 30, 2025", None, None),
+    ("", 2025, None),
+])
+def test_parse_published(value, default_year, expected):
+    assert parse_published(value, default_year) == expected
+
+def test_trending_score_trades_recency_for_engagement():
+    day = date(2025, 9, 1)
+    assert trending_score(10, 2, 0, day) > trending_score(10, 1, 0, day)
+    week_later = date(2025, 9, 8)
+    # A paper a week newer needs about e times less engagement to rank the same
+    assert trending_score(0, 0, 0, week_later) - trending_score(0, 0, 0, day) == pytest.approx(7 / TRENDING_DECAY_DAYS)
+    assert trending_score(None, None, None, None) == 0.0
+    assert trending_score(0, 0, 100, day) == pytest.approx(math.log1p(5 * math.log1p(100)) + (day - date(2023, 1, 1)).days / 7)
+
+def test_typed_fields_fall_back_to_the_crawl_month():
+    row = {"publish_time": "", "github_num": "1.5k", "author_num": "4 authors", "like_num": 3, "comment_num": 1}
+    fields = typed_fields(row, 2025, 9)
+    assert fields["published_date"] == date(2025, 9, 1)
+    assert (fields["github_stars"], fields["author_count"]) == (1500, 4)
+    assert fields["trending_score"] == trending_score(3, 1, 1500, date(2025, 9, 1))
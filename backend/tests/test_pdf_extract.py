@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from fakes import synthetic_papers, write_pdf
+from app import pdf_extract
+from app.pdf_extract import build_analysis_context, detect_sections, evict_extracts, extract_document
+
+PAPER = synthetic_papers(1, 2025, 9, seed=5)[0]
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    write_pdf(path, PAPER)
+    return path
+
+def test_sections_are_detected_from_headings(pdf):
+    document = extract_document(pdf)
+    assert document["page_count"] == 6
+    assert list(document["sections"]) == ["abstract", "introduction", "method", "experiments", "conclusion", "references"]
+    assert document["sections"]["method"].startswith("We propose")
+
+def test_inline_headings_need_a_hint():
+    pages = [[("Results", False), ("Abstract", True), ("A summary.", False), ("2 Results", False), ("Numbers.", False)]]
+    assert detect_sections(pages) == {"front": "Results", "abstract": "A summary.", "experiments": "Numbers."}
+
+def test_context_budget_flows_unused_share_forward():
+    document = {"sections": {"abstract": "a" * 10, "method": "m" * 10000, "references": "r" * 10000}}
+    context = build_analysis_context(document, token_budget=100)
+    assert "## Method" in context and "References" not in context
+    # The abstract's unused share goes to the method
+    assert context.count("m") == int(400 * 0.28 / 0.40) + int(400 * 0.12 / 0.40) - 10
+
+def test_context_without_structure_uses_leading_pages():
+    document = {"sections": {"front": "x"}, "pages": ["p" * 300, "q" * 300]}
+    assert build_analysis_context(document, token_budget=100) == "p" * 300 + "\n" + "q" * 99
+
+def test_parallel_extraction_matches_serial(pdf, monkeypatch):
+    serial = pdf_extract._extract_range(pdf, 0, 5)
+    monkeypatch.setattr(pdf_extract, "PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(pdf_extract, "EXTRACT_WORKERS", 2)
+    assert pdf_extract._extract_lines(pdf, 0, 5) == serial
+    assert pdf_extract._get_pool()._mp_context.get_start_method() == "forkserver"
+
+def test_cached_extract_is_reused(pdf, monkeypatch):
+    first = extract_document(pdf, 0, 2)
+    monkeypatch.setattr(pdf_extract, "_extract_lines", pytest.fail)
+    assert extract_document(pdf, 0, 2) == first
+
+def test_eviction_drops_least_recently_used_extracts(tmp_path):
+    for i, name in enumerate(["old.json", "used.json", "new.json"]):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    os.utime(tmp_path / "used.json", (2000, 2000))
+    evict_extracts(str(tmp_path), max_bytes=250, keep=str(tmp_path / "new.json"))
+    assert sorted(os.listdir(tmp_path)) == ["new.json", "used.json"]
+    evict_extracts(str(tmp_path), max_bytes=50, keep=str(tmp_path / "new.json"))
+    assert os.listdir(tmp_path) == ["new.json"]
@@ -0,0 +1,70 @@
+import base64
+import json
+
+import pytest
+
+from fakes import paper_items, synthetic_papers
+from app.query import QueryError, decode_cursor, encode_cursor, query_page
+from app.spider import upsert_papers
+
+def _cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+@pytest.fixture
+def papers(ctx):
+    papers = synthetic_papers(45, 2025, 9)
+    upsert_papers(paper_items(papers, "http://hf.test"), 2025, 9)
+    return papers
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([2025, 9, "2509.00001"])) == [2025, 9, "2509.00001"]
+
+@pytest.mark.parametrize("cursor", ["***", _cursor({"year": 2025}), _cursor(5), _cursor([[2025], 9, "x"])])
+def test_malformed_cursor_is_a_query_error(cursor):
+    with pytest.raises(QueryError):
+        decode_cursor(cursor)
+
+@pytest.mark.parametrize("sort", ["recent", "likes", "oldest"])
+def test_keyset_pages_cover_every_row_once(papers, sort):
+    seen = []
+    body = {"fields": ["id"], "sort": sort, "limit": 10}
+    while True:
+        page = query_page(body)
+        seen.extend(row["id"] for row in page["rows"])
+        if not page["next_cursor"]:
+            break
+        body["cursor"] = page["next_cursor"]
+    assert sorted(seen) == sorted(p["id"] for p in papers)
+    assert len(seen) == len(set(seen))
+
+def test_likes_sort_breaks_ties_by_id(papers):
+    rows = query_page({"fields": ["id", "like_num"], "sort": "likes", "limit": 1000})["rows"]
+    assert rows == sorted(rows, key=lambda r: (r["like_num"], r["id"]), reverse=True)
+
+def test_filters(papers):
+    rows = query_page({"fields": ["id", "like_num"], "where": {"like_num": {"gte": 3}}, "limit": 1000})["rows"]
+    assert sorted(r["id"] for r in rows) == sorted(p["id"] for p in papers if p["like_num"] >= 3)
+    with pytest.raises(QueryError):
+        query_page({"where": {"abstract": "x"}})
+
+def test_cursor_must_match_sort(papers):
+    with pytest.raises(QueryError):
+        query_page({"sort": "likes", "cursor": encode_cursor([2025, 9, "2509.00001"])})
+
+@pytest.mark.parametrize("body", [
+    {"cursor": _cursor({"year": 2025})},
+    {"cursor": _cursor([[1], 2, 3])},
+    {"limit": "ten"},
+    {"limit": "ten", "format": "csv"},
+])
+def test_bad_input_is_a_400(app, papers, auth_headers, body):
+    response = app.test_client().post("/api/query", json=body, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_export_streams_csv(app, papers, auth_headers):
+    response = app.test_client().post("/api/query", json={"fields": ["id", "title"], "format": "csv", "limit": "5"},
+                                      headers=auth_headers)
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.status_code == 200
+    assert lines[0] == "id,title"
+    assert len(lines) == 6
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from app.related import RelatedGraph, REASON_AUTHORS, REASON_CONTENT, _pack, _unpack
+
+def random_adjacency(n: int, k: int, rng: random.Random):
+    adjacency = []
+    for i in range(n):
+        targets = rng.sample([j for j in range(n) if j != i], min(k, n - 1))
+        edges = [(j, round(rng.random(), 3), rng.choice([REASON_CONTENT, REASON_AUTHORS])) for j in targets]
+        adjacency.append(sorted(edges, key=lambda e: -e[1]))
+    return adjacency
+
+def make_graph(tmp_path, adjacency) -> RelatedGraph:
+    graph = RelatedGraph(index_dir=str(tmp_path), k=5)
+    graph.ids = [f"2509.{i:05d}" for i in range(len(adjacency))]
+    graph.titles = [f"Paper {i}" for i in range(len(adjacency))]
+    graph._positions = {paper_id: i for i, paper_id in enumerate(graph.ids)}
+    graph._set_adjacency(adjacency)
+    return graph
+
+def rows(graph: RelatedGraph):
+    return [[(j, pytest.approx(w), r) for j, w, r in graph._row(i)] for i in range(len(graph.ids))]
+
+def test_pack_round_trip():
+    strings = ["2509.00001", "", "Müller et al.", "漢字"]
+    assert _unpack(*_pack(strings)) == strings
+    assert _unpack(*_pack([])) == []
+
+@pytest.mark.parametrize("seed", range(5))
+def test_splice_matches_a_full_rebuild(tmp_path, seed):
+    rng = random.Random(seed)
+    adjacency = random_adjacency(30, 5, rng)
+    graph = make_graph(tmp_path, adjacency)
+
+    # Replace a few existing rows (including the first and last) and append new papers
+    appended = 4
+    graph.ids = graph.ids + [f"2510.{i:05d}" for i in range(appended)]
+    graph.titles = graph.titles + ["New"] * appended
+    total = len(graph.ids)
+    changed = {position: random_adjacency(total, rng.randint(0, 5), rng)[position]
+               for position in {0, 29, *rng.sample(range(30), 5), *range(30, total)}}
+    graph._splice(changed)
+
+    expected = [changed.get(i, adjacency[i] if i < len(adjacency) else []) for i in range(total)]
+    assert rows(graph) == [[(j, pytest.approx(w), r) for j, w, r in edges] for edges in expected]
+    assert graph.edge_count == sum(len(edges) for edges in expected)
+
+def test_splice_can_empty_a_row(tmp_path):
+    graph = make_graph(tmp_path, random_adjacency(6, 3, random.Random(1)))
+    graph._splice({2: []})
+    assert graph._row(2) == []
+    assert graph.edge_count == 15
+
+def test_related_lists_best_first_with_reasons(tmp_path):
+    graph = make_graph(tmp_path, [[(1, 0.9, REASON_CONTENT | REASON_AUTHORS), (2, 0.4, REASON_CONTENT)], [], []])
+    result = graph.related("2509.00000", k=1)
+    assert result == [{"arxiv_id": "2509.00001", "title": "Paper 1", "score": 0.9, "reasons": ["authors", "content"]}]
+    assert graph.related("9999.99999") is None
+
+def test_save_and_load(tmp_path):
+    adjacency = random_adjacency(10, 3, random.Random(2))
+    graph = make_graph(tmp_path, adjacency)
+    graph._save()
+    loaded = RelatedGraph(index_dir=str(tmp_path))
+    loaded.ensure_loaded()
+    assert loaded.loaded and loaded.ids == graph.ids
+    assert rows(loaded) == rows(graph)
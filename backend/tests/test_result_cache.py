@@ -0,0 +1,83 @@
+import time
+import threading
+
+from app.result_cache import MemoryBackend, RecommendationCache, normalize_keywords
+
+class Compute:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [f"result {self.calls}"]
+
+def make_cache(**kwargs) -> RecommendationCache:
+    return RecommendationCache(backend=MemoryBackend(max_entries=kwargs.pop("max_entries", 10)), **kwargs)
+
+def wait_for_refresh(cache, refreshes):
+    deadline = time.time() + 10
+    while cache.stats()["refreshes"] < refreshes and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_keywords_are_normalized():
+    assert normalize_keywords("AI image-generation") == normalize_keywords("generation  image ai")
+
+def test_hits_are_served_from_the_cache(ctx):
+    cache, compute = make_cache(), Compute()
+    assert cache.get_or_compute("ai", "plain", compute) == ["result 1"]
+    assert cache.get_or_compute("AI", "plain", compute) == ["result 1"]
+    assert cache.get_or_compute("ai", "reranked", compute) == ["result 2"]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+def test_stale_entries_are_served_while_refreshing(ctx):
+    cache, compute = make_cache(fresh_seconds=0), Compute()
+    cache.get_or_compute("ai", "plain", compute)
+    assert cache.get_or_compute("ai", "plain", compute) == ["result 1"]
+    wait_for_refresh(cache, 1)
+    assert cache.get_or_compute("ai", "plain", compute) == ["result 2"]
+    assert cache.stats()["stale_hits"] == 2
+
+def test_expired_entries_are_recomputed(ctx):
+    cache, compute = make_cache(ttl_seconds=0), Compute()
+    cache.get_or_compute("ai", "plain", compute)
+    assert cache.get_or_compute("ai", "plain", compute) == ["result 2"]
+    assert cache.backend.evictions == 1
+
+def test_a_version_bump_in_another_process_makes_entries_stale(ctx):
+    cache, other_worker, compute = make_cache(), make_cache(), Compute()
+    cache.get_or_compute("ai", "plain", compute)
+    other_worker.bump_version()  # e.g. backfill.py inserting papers
+    assert cache.stats()["corpus_version"] == 1
+    assert cache.get_or_compute("ai", "plain", compute) == ["result 1"]
+    wait_for_refresh(cache, 1)
+    assert cache.get_or_compute("ai", "plain", compute) == ["result 2"]
+    assert cache.stats()["hits"] == 1
+
+def test_concurrent_misses_compute_once(app, ctx):
+    cache, release, calls = make_cache(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        release.wait(10)
+        return ["shared"]
+    results = []
+
+    def lookup():
+        with app.app_context():
+            results.append(cache.get_or_compute("ai", "plain", slow))
+    threads = [threading.Thread(target=lookup) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    assert calls == [1] and results == [["shared"]] * 3
+
+def test_backend_outage_degrades_to_computing(ctx, monkeypatch):
+    cache, compute = make_cache(), Compute()
+    def unreachable():
+        raise ConnectionError("cache down")
+    monkeypatch.setattr(cache.backend, "version", unreachable)
+    assert cache.get_or_compute("ai", "plain", compute) == ["result 1"]
+    assert cache.stats()["errors"] == 1
@@ -0,0 +1,60 @@
+import pytest
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import inspect, text
+
+from app.models import db, Paper
+
+# The papers table as created before the typed columns existed
+OLD_PAPERS = """
+CREATE TABLE papers (
+    id VARCHAR(50) PRIMARY KEY, title VARCHAR(500), authors TEXT, abstract TEXT, publish_time VARCHAR(100),
+    pdf_link TEXT, year INTEGER, month INTEGER, like_num INTEGER, author_num VARCHAR(100),
+    github_num VARCHAR(100), comment_num INTEGER, img_link TEXT
+)
+"""
+
+@pytest.fixture
+def old_database(ctx):
+    db.session.remove()
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE papers"))
+        conn.execute(text(OLD_PAPERS))
+        conn.execute(text("DROP INDEX ix_history_user_time"))
+        conn.execute(text(
+            "INSERT INTO papers (id, title, publish_time, year, month, like_num, author_num, github_num, comment_num) "
+            "VALUES ('2509.00001', 'T', 'Published on Sep 3, 2025', 2025, 9, 12, '3 authors', '1.2k', 4)"
+        ))
+    yield
+    db.session.remove()
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    # Pooled SQLite connections keep the schema they saw before the rebuild
+    db.engine.dispose()
+
+def test_migration_adds_columns_and_indexes_then_backfill_fills_them(app, old_database):
+    upgrade()
+    inspector = inspect(db.engine)
+    columns = {column["name"] for column in inspector.get_columns("papers")}
+    assert {"github_stars", "author_count", "published_date", "trending_score"} <= columns
+    assert "ix_papers_trending_id" in {index["name"] for index in inspector.get_indexes("papers")}
+    assert "ix_history_user_time" in {index["name"] for index in inspector.get_indexes("history")}
+
+    result = app.test_cli_runner().invoke(args=["backfill-typed-fields"])
+    assert result.output.strip() == "1 papers updated"
+    paper = db.session.get(Paper, "2509.00001")
+    assert (paper.github_stars, paper.author_count, str(paper.published_date)) == (1200, 3, "2025-09-03")
+    assert paper.trending_score is not None
+
+    # Nothing left to do on a second run, and the migration is reversible
+    assert app.test_cli_runner().invoke(args=["backfill-typed-fields"]).output.strip() == "0 papers updated"
+    db.session.remove()
+    downgrade(revision="base")
+    assert "trending_score" not in {column["name"] for column in inspect(db.engine).get_columns("papers")}
+
+def test_migration_is_a_no_op_on_a_fresh_database(ctx):
+    expected = {index.name for index in Paper.__table__.indexes}
+    upgrade()
+    assert {index["name"] for index in inspect(db.session.connection()).get_indexes("papers")} == expected
+    db.session.remove()
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
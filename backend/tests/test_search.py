@@ -0,0 +1,58 @@
+from app.models import db, Paper
+from app.search import SearchIndex, search_index, tokenize
+
+def paper(paper_id, title, abstract=""):
+    return {"id": paper_id, "title": title, "abstract": abstract}
+
+def ids(hits):
+    return [doc_id for doc_id, _ in hits]
+
+def test_tokenize_drops_case_punctuation_and_stopwords():
+    assert tokenize("The Diffusion-Model of 3D scenes!") == ["diffusion", "model", "3d", "scenes"]
+
+def test_title_matches_outrank_abstract_matches():
+    index = SearchIndex()
+    index.add_many([
+        paper("a", "Efficient transformers", "We study attention."),
+        paper("b", "Graph networks", "Efficient message passing."),
+        paper("c", "Protein folding", "Structure prediction."),
+    ])
+    assert ids(index.search("efficient")) == ["a", "b"]
+    assert index.search("unrelated words") == []
+
+def test_rarer_terms_weigh_more():
+    index = SearchIndex()
+    index.add_many([paper("a", "vision model"), paper("b", "vision model"), paper("c", "vision tokenizer")])
+    assert ids(index.search("vision tokenizer"))[0] == "c"
+
+def test_re_adding_a_paper_replaces_its_terms():
+    index = SearchIndex()
+    index.add("a", "old title", "")
+    index.add("a", "new title", "")
+    assert index.search("old") == []
+    assert ids(index.search("new")) == ["a"]
+    index.remove("a")
+    assert len(index) == 0 and index.search("new") == []
+
+def test_loading_follows_the_papers_table(ctx):
+    db.session.add_all([Paper(id="2509.00001", title="Sparse attention"), Paper(id="2509.00002", title="Dense retrieval")])
+    db.session.commit()
+    index = SearchIndex()
+    index.ensure_loaded()
+    assert ids(index.search("attention")) == ["2509.00001"]
+
+    db.session.delete(db.session.get(Paper, "2509.00001"))
+    db.session.add(Paper(id="2509.00003", title="Attention sinks"))
+    db.session.commit()
+    index._synced_at = 0  # as if SYNC_INTERVAL_SECONDS had passed
+    index.ensure_loaded()
+    assert ids(index.search("attention")) == ["2509.00003"]
+
+def test_search_route_returns_ranked_rows(app, ctx, auth_headers):
+    db.session.add_all([Paper(id="2509.00011", title="Ranking with BM25", abstract="Sparse retrieval"),
+                        Paper(id="2509.00012", title="Dense retrieval", abstract="")])
+    db.session.commit()
+    search_index._synced_at = 0
+    response = app.test_client().get("/api/search?q=retrieval&limit=1", headers=auth_headers)
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json] == ["2509.00012"]
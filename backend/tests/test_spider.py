@@ -0,0 +1,33 @@
+from datetime import date
+
+import pytest
+
+from fakes import synthetic_papers
+from app.jobs import Job
+from app.models import db, Paper, PageValidator
+from app.spider import daily_spider
+
+DAY = date(2025, 9, 3)
+
+@pytest.fixture
+def papers(hf):
+    papers = synthetic_papers(60, 2025, 9)
+    hf.papers.update({p["id"]: p for p in papers})
+    return papers
+
+def day_papers(papers):
+    return [p for p in papers if p["published"] == DAY]
+
+def test_failed_detail_pages_are_left_out_and_reported(ctx, hf, papers):
+    broken = day_papers(papers)[0]["id"]
+    hf.failing.add(broken)
+    progress = Job("unit", "collect")
+    result = daily_spider(2025, 9, 3, progress=progress)
+    assert result["stats"]["inserted"] == len(day_papers(papers)) - 1
+    assert db.session.get(Paper, broken) is None
+    assert len(progress.errors) == 1
+    # The listing was not marked unchanged, so the next crawl picks the paper up
+    assert PageValidator.query.count() == 0
+    hf.failing.clear()
+    assert daily_spider(2025, 9, 3, incremental=True)["stats"]["inserted"] == 1
+    assert db.session.get(Paper, broken).abstract
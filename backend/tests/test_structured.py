@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from app.analysis import CONTENT_SCHEMA, SUGGESTION_SCHEMA
+from app.structured import Field, Schema, StructuredOutputError, loads_tolerant, parse_structured, parse_stats
+
+def test_strict_json_inside_fences_is_not_a_repair():
+    assert loads_tolerant('```json\n{"a": 1}\n```') == ({"a": 1}, False)
+
+def test_prose_single_quotes_and_trailing_commas_are_repaired():
+    value, repaired = loads_tolerant("Here you go: {'a': 'it's fine', 'b': [1, 2,],} Hope it helps")
+    assert value == {"a": "it's fine", "b": [1, 2]}
+    assert repaired
+
+def test_python_literals_are_read():
+    assert loads_tolerant("{'a': None, 'b': True}") == ({"a": None, "b": True}, True)
+    assert loads_tolerant('{"a": null, "b": false,}') == ({"a": None, "b": False}, True)
+
+def test_truncated_reply_is_closed():
+    assert loads_tolerant('{"a": 1, "b": [1, 2') == ({"a": 1, "b": [1, 2]}, True)
+
+@pytest.mark.parametrize("text", [None, "", "no structure here"])
+def test_unparsable_reply_raises(text):
+    with pytest.raises(StructuredOutputError):
+        loads_tolerant(text)
+
+def test_field_coercion():
+    assert Field(str).coerce("f", ["a", " b ", None]) == ("a; b", True)
+    assert Field(float, minimum=0, maximum=10).coerce("f", "score: 12") == (10, True)
+    assert Field(int).coerce("f", 7) == (7, False)
+    with pytest.raises(StructuredOutputError):
+        Field(float).coerce("f", "n/a")
+
+def test_suggestions_keep_valid_items_from_a_truncated_list():
+    reply = '[{"arxiv_id": "2509.00001", "title": "A", "suggest_score": "8/10"}, {"title": "no id"}, {"arxiv_id": "2509.00003", "sugg'
+    assert parse_structured(reply, SUGGESTION_SCHEMA) == [
+        {"arxiv_id": "2509.00001", "title": "A", "suggest_score": 8.0},
+        {"arxiv_id": "2509.00003", "title": "", "suggest_score": 0.0},
+    ]
+
+def test_suggestions_unwrap_a_wrapping_object():
+    reply = '{"papers": [{"arxiv_id": "2509.00002", "suggest_score": 3}]}'
+    assert parse_structured(reply, SUGGESTION_SCHEMA) == [{"arxiv_id": "2509.00002", "title": "", "suggest_score": 3.0}]
+
+def test_suggestions_need_min_items():
+    with pytest.raises(StructuredOutputError):
+        parse_structured('[{"title": "no id"}]', SUGGESTION_SCHEMA)
+
+def test_content_analysis_fills_missing_fields_and_drops_unknown_ones():
+    result = parse_structured('{"abstract_summary": "S", "datasets": ["A", "B"], "extra": 1}', CONTENT_SCHEMA)
+    assert set(result) == set(CONTENT_SCHEMA.fields)
+    assert result["abstract_summary"] == "S"
+    assert result["datasets"] == "A; B"
+    assert result["limitations"] == ""
+
+def test_content_analysis_rejects_unrelated_objects():
+    with pytest.raises(StructuredOutputError):
+        parse_structured('{"echo": "hi"}', CONTENT_SCHEMA)
+    assert parse_structured("{}", CONTENT_SCHEMA) == {}
+    with pytest.raises(StructuredOutputError):
+        parse_structured("{}", Schema("strict", {"a": Field(str)}, allow_empty=False))
+
+def test_only_syntax_and_shape_repairs_count_as_saved_calls():
+    before = parse_stats.stats()
+    complete = {name: "x" for name in CONTENT_SCHEMA.fields}
+    parse_structured(json.dumps(complete), CONTENT_SCHEMA)
+    # Valid JSON that only lacks optional fields was always accepted
+    parse_structured('{"abstract_summary": "S", "datasets": ["A"]}', CONTENT_SCHEMA)
+    parse_structured("{'abstract_summary': 'S',}", CONTENT_SCHEMA)
+    # An object where a list was asked for used to be rejected
+    parse_structured('{"arxiv_id": "2509.00001", "suggest_score": 5}', SUGGESTION_SCHEMA)
+    with pytest.raises(StructuredOutputError):
+        parse_structured("nothing", CONTENT_SCHEMA)
+    after = parse_stats.stats()
+    delta = {key: after[key] - before[key] for key in ("parsed", "clean", "normalized", "repaired", "failed", "llm_calls_saved")}
+    assert delta == {"parsed": 5, "clean": 1, "normalized": 1, "repaired": 2, "failed": 1, "llm_calls_saved": 2}
@@ -0,0 +1,76 @@
+import os
+import json
+
+import pytest
+
+from fakes import seed_arxiv, synthetic_papers
+from app import routes
+from app.history import history_writer
+from app.models import db, Paper, PaperSummary
+from app.spider import ARXIV_PDF_DIR
+from app.summaries import get_summary, save_summary, summarize_papers
+
+PAPERS = synthetic_papers(3, 2025, 9, seed=21)
+ARXIV_ID = PAPERS[0]["id"]
+DOWNLOAD_INFO = {
+    "arxiv_id": ARXIV_ID, "title": PAPERS[0]["title"], "authors": PAPERS[0]["authors"],
+    "pdf_url": f"https://arxiv.org/pdf/{ARXIV_ID}", "published": "2025-09-01",
+}
+ANALYSIS = {"abstract_summary": "Stored summary"}
+
+@pytest.fixture
+def client(app, ctx):
+    db.session.execute(Paper.__table__.insert(), [
+        {"id": p["id"], "title": p["title"], "year": 2025, "month": 9} for p in PAPERS
+    ])
+    db.session.commit()
+    yield app.test_client()
+    history_writer.flush()
+
+# Sidecars and PDFs on disk; the arXiv API only hears about unknown ids
+@pytest.fixture
+def seeded(hf, monkeypatch):
+    hf.papers.update({p["id"]: p for p in PAPERS})
+    seed_arxiv(ARXIV_PDF_DIR, PAPERS, hf.url)
+    lookups = []
+    monkeypatch.setattr("app.spider.lookup_arxiv_metadata", lambda arxiv_id: lookups.append(arxiv_id))
+    return lookups
+
+@pytest.mark.parametrize("requested", [ARXIV_ID, f"{ARXIV_ID}v2"])
+def test_assist_read_serves_a_stored_summary(client, auth_headers, monkeypatch, requested):
+    save_summary(DOWNLOAD_INFO, "hash", ANALYSIS)
+    monkeypatch.setattr(routes, "download_arxiv_pdf", pytest.fail)
+    response = client.post("/api/assist/read", json={"arxiv_id": requested}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json["analysis"] == ANALYSIS
+    assert response.json["pdf_url"] == DOWNLOAD_INFO["pdf_url"]
+
+@pytest.mark.parametrize("requested", [ARXIV_ID, f"{ARXIV_ID}v2"])
+def test_stream_of_a_stored_summary_sends_pdf_ready(client, auth_headers, monkeypatch, requested):
+    save_summary(DOWNLOAD_INFO, "hash", ANALYSIS)
+    monkeypatch.setattr(routes, "download_arxiv_pdf", pytest.fail)
+    body = client.post("/api/assist/read/stream", json={"arxiv_id": requested}, headers=auth_headers).get_data(as_text=True)
+    sent = [block.split("\n", 1) for block in body.strip().split("\n\n")]
+    assert [event[len("event: "):] for event, _ in sent] == ["metadata", "pdf_ready", "analysis", "done"]
+    assert json.loads(sent[1][1][len("data: "):]) == {"pdf_url": DOWNLOAD_INFO["pdf_url"], "filename": f"{ARXIV_ID}.pdf"}
+    assert json.loads(sent[2][1][len("data: "):]) == ANALYSIS
+
+def test_batch_summarizes_a_month_and_skips_done_papers(client, seeded):
+    result = summarize_papers(year=2025, month=9)
+    assert (result["papers"], result["summarized"], result["failed"]) == (3, 3, 0)
+    summary = get_summary(ARXIV_ID)
+    assert summary["download_info"]["title"] == PAPERS[0]["title"]
+    assert os.path.exists(summary["download_info"]["pdf_path"])
+
+    rerun = summarize_papers(year=2025, month=9)
+    assert (rerun["skipped"], rerun["papers"]) == (3, 0)
+    forced = summarize_papers(arxiv_ids=[f"{ARXIV_ID}v1"], force=True)
+    assert (forced["papers"], forced["summarized"] + forced["reused"]) == (1, 1)
+    assert PaperSummary.query.count() == 3
+    assert seeded == []
+
+def test_batch_reports_papers_it_cannot_fetch(client, seeded):
+    result = summarize_papers(arxiv_ids=[ARXIV_ID, "2509.99999"])
+    assert (result["summarized"], result["failed"]) == (1, 1)
+    assert get_summary("2509.99999") is None
+    assert seeded == ["2509.99999"]
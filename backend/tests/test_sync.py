@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+import requests
+
+import sync
+from fakes import synthetic_papers
+from app.models import db, Paper, PageValidator
+from app.spider import daily_spider, monthly_spider
+
+DAY = date(2025, 9, 3)
+
+@pytest.fixture
+def papers(hf):
+    papers = synthetic_papers(60, 2025, 9)
+    hf.papers.update({p["id"]: p for p in papers})
+    return papers
+
+def day_papers(papers):
+    return [p for p in papers if p["published"] == DAY]
+
+def test_incremental_crawl_fetches_only_new_or_blank_papers(ctx, hf, papers):
+    daily_spider(2025, 9, 3)
+    blank = day_papers(papers)[1]["id"]
+    stored = db.session.get(Paper, blank)
+    stored.abstract = ""
+    stored.authors = ""
+    PageValidator.query.delete()
+    db.session.commit()
+
+    hf.requests = 0
+    result = daily_spider(2025, 9, 3, incremental=True)
+    assert hf.requests == 2  # the listing and the one blank paper's detail page
+    assert result["stats"]["updated"] == 1
+    assert db.session.get(Paper, blank).abstract == day_papers(papers)[1]["abstract"]
+
+def test_unchanged_listing_answers_not_modified(ctx, hf, papers):
+    monthly_spider(2025, 9, incremental=True)
+    hf.requests = 0
+    assert monthly_spider(2025, 9, incremental=True)["info"] == "Not modified"
+    assert hf.requests == 1
+
+def test_sync_day_picks_up_only_new_papers(ctx, hf, papers):
+    first = sync.sync_day(DAY, full=False)
+    assert first.result["stats"]["inserted"] == len(day_papers(papers))
+    added = dict(day_papers(papers)[0], id="2509.09999", title="Posted later that day")
+    hf.papers[added["id"]] = added
+    hf.requests = 0
+    second = sync.sync_day(DAY, full=False)
+    assert second.result["stats"]["inserted"] == 1
+    assert hf.requests == 2  # the changed listing and the new paper's detail page
+
+def test_blocked_listing_is_an_error_not_an_empty_day(ctx, hf, papers):
+    hf.blocked.add("/papers/date/2025-09-03")
+    with pytest.raises(requests.HTTPError):
+        daily_spider(2025, 9, 3, incremental=True)
+    assert PageValidator.query.count() == 0
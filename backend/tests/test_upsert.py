@@ -0,0 +1,28 @@
+from datetime import date
+
+from fakes import paper_items, synthetic_papers
+from app.models import db, Paper
+from app.spider import upsert_papers
+
+def test_upsert_counts(ctx):
+    items = paper_items(synthetic_papers(5, 2025, 9), "http://hf.test")
+    assert upsert_papers(items, 2025, 9) == {"inserted": 5, "updated": 0, "skipped": 0}
+    # Unchanged rows are skipped, changed counters are updated, id-less items are dropped
+    items[0]["like_num"] += 10
+    assert upsert_papers(items + [{"title": "no id"}], 2025, 9) == {"inserted": 0, "updated": 1, "skipped": 5}
+    assert db.session.get(Paper, items[0]["id"]).like_num == items[0]["like_num"]
+
+def test_upsert_dedupes_ids_within_a_batch(ctx):
+    items = paper_items(synthetic_papers(3, 2025, 9), "http://hf.test")
+    stats = upsert_papers(items + [dict(items[0])], 2025, 9)
+    assert stats["inserted"] == 3
+    assert Paper.query.count() == 3
+
+def test_upsert_refills_blank_details(ctx):
+    items = paper_items(synthetic_papers(2, 2025, 9), "http://hf.test")
+    blank = dict(items[0], authors="", abstract="", publish_time="")
+    upsert_papers([blank, items[1]], 2025, 9)
+    assert upsert_papers(items, 2025, 9)["updated"] == 1
+    stored = db.session.get(Paper, items[0]["id"])
+    assert stored.abstract == items[0]["abstract"]
+    assert stored.published_date == date(2025, 9, 1)
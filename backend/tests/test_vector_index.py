@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.models import db, Paper
+from app.recommender import VectorIndex
+
+ROWS = [
+    {"id": "a", "title": "Diffusion models for image generation", "abstract": "Denoising diffusion synthesizes images."},
+    {"id": "b", "title": "Image generation with diffusion transformers", "abstract": "Scaling diffusion for images."},
+    {"id": "c", "title": "Protein structure prediction", "abstract": "Folding proteins with attention."},
+    {"id": "d", "title": "Protein language models", "abstract": "Protein sequences and structure."},
+    {"id": "e", "title": "Speech recognition at scale", "abstract": "Audio transcription with transformers."},
+]
+
+def make_index(tmp_path, rows=ROWS) -> VectorIndex:
+    index = VectorIndex(index_dir=str(tmp_path), dim=256)
+    index.build(rows)
+    return index
+
+def test_vectors_are_unit_length(tmp_path):
+    index = make_index(tmp_path)
+    assert np.allclose(np.linalg.norm(np.asarray(index._matrix), axis=1), 1, atol=1e-5)
+    assert not index.vectorize("").any()
+
+def test_query_ranks_by_cosine_and_honours_exclude(tmp_path):
+    index = make_index(tmp_path)
+    hits = index.query("diffusion image generation", k=2)
+    assert {paper_id for paper_id, _ in hits} == {"a", "b"}
+    assert hits[0][1] >= hits[1][1]
+    assert [paper_id for paper_id, _ in index.query("protein structure", k=1, exclude=["c"])] == ["d"]
+
+def test_batched_queries_match_single_ones(tmp_path):
+    index = make_index(tmp_path)
+    queries = np.stack([index.vectorize("protein folding"), index.vectorize("speech audio")])
+    assert index.query_vectors(queries, k=3) == [index.query("protein folding", k=3), index.query("speech audio", k=3)]
+
+def test_appended_papers_are_searchable_without_a_refit(tmp_path):
+    index = make_index(tmp_path)
+    idf = dict(index._idf)
+    index.add_many([{"id": "f", "title": "Protein design with diffusion", "abstract": ""}])
+    assert len(index) == 6 and "f" in index
+    assert index._idf == idf
+    assert index.query("protein design diffusion", k=1)[0][0] == "f"
+
+def test_another_process_sees_the_appended_rows(tmp_path):
+    writer = make_index(tmp_path)
+    reader = VectorIndex(index_dir=str(tmp_path), dim=256)
+    reader._load()
+    writer.add_many([{"id": "f", "title": "Speech synthesis", "abstract": ""}])
+    reader._load_if_changed()
+    assert reader.ids == writer.ids
+    assert np.array_equal(np.asarray(reader.vector("f")), np.asarray(writer.vector("f")))
+
+def test_a_torn_append_is_ignored_and_overwritten(tmp_path):
+    index = make_index(tmp_path)
+    with open(index._vectors_path, "ab") as f:
+        f.write(b"\0" * 100)  # an append that died before writing its metadata
+    index._load()
+    assert len(index) == 5
+    index.add_many([{"id": "f", "title": "Speech synthesis", "abstract": ""}])
+    assert os.path.getsize(index._vectors_path) == 6 * 256 * 4
+
+def test_dimension_mismatch_is_refused(tmp_path):
+    make_index(tmp_path)
+    with pytest.raises(ValueError):
+        VectorIndex(index_dir=str(tmp_path), dim=128)._load()
+
+def test_ensure_loaded_builds_from_the_papers_table(ctx, tmp_path):
+    db.session.add_all([Paper(id=row["id"], title=row["title"], abstract=row["abstract"]) for row in ROWS])
+    db.session.commit()
+    index = VectorIndex(index_dir=str(tmp_path), dim=256)
+    index.ensure_loaded()
+    assert sorted(index.ids) == sorted(row["id"] for row in ROWS)
+    assert index.query("speech recognition", k=1)[0][0] == "e"
@@ -174,7 +174,16 @@ const CollectPage: React.FC = () => {
       setPapers([]);
 
       const res = await axios.post(`/api/collect/${type}`, data);
-      const result = res.data;
+      let job = res.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        setMessage(
+          `Collecting... ${job.pages_fetched}/${job.pages_total || '?'} pages` +
+            (job.eta_seconds != null ? `, about ${Math.ceil(job.eta_seconds)}s left` : '')
+        );
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = (await axios.get(`/api/jobs/${job.job_id}`)).data;
+      }
+      const result = job.result || { info: job.errors?.[0] || 'Job failed' };
 
       if (result.info === 'Success') {
         const formatted = result.result.map((item: any, idx: number) => ({
@@ -288,7 +297,7 @@ const CollectPage: React.FC = () => {
 
                       {message && (
                         <Fade in={!!message}>
-                          <Alert severity={message.includes('successful') ? 'success' : 'error'}>
+                          <Alert severity={message.includes('successful') ? 'success' : message.startsWith('Collecting') ? 'info' : 'error'}>
                             {message}
                           </Alert>
                         </Fade>
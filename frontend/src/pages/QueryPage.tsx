@@ -32,7 +32,7 @@ const QueryPage: React.FC = () => {
       setLoading(true);
       setError('');
       const resp = await axios.post('/api/query', { fields, limit, where });
-      setResults(resp.data);
+      setResults(resp.data.rows);
     } catch (err: any) {
       setError(err.response?.data?.error || 'Query failed');
     } finally {